@@ -1,6 +1,5 @@
 """ rodario - Simple, redis-backed Python actor framework """
 
-# 3rd party
-from redis import StrictRedis
-
-get_redis_connection = StrictRedis  # pylint: disable=C0103
+# local
+from rodario.connections import (get_async_redis_connection,
+                                 get_redis_connection)
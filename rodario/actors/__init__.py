@@ -3,5 +3,9 @@
 from rodario.actors.actor import Actor
 from rodario.actors.proxy import ActorProxy
 from rodario.actors.clusterproxy import ClusterProxy
+from rodario.actors.shardedproxy import ShardedProxy
+from rodario.actors.asyncactor import AsyncActor
+from rodario.actors.asyncproxy import AsyncActorProxy
 
-__all__ = ('Actor', 'ActorProxy', 'ClusterProxy',)
+__all__ = ('Actor', 'ActorProxy', 'ClusterProxy', 'ShardedProxy',
+           'AsyncActor', 'AsyncActorProxy',)
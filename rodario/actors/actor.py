@@ -2,18 +2,224 @@
 
 # stdlib
 import atexit
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from functools import partial
+from hashlib import blake2b
+from os import getpid
+from time import time
 from uuid import uuid4
-from time import sleep
-from threading import Thread, Event
-import pickle
+from threading import Event, Lock, Thread, local
+from weakref import ref
 import inspect
 
 # local
 from rodario import get_redis_connection
+from rodario.batch import BATCH_METHOD
+from rodario.codecs import (HOST, decode, discard, encode, get_codec,
+                            is_local, lost_call)
+from rodario.decorators import SKIP, DecoratedMethod
+from rodario.dispatcher import Dispatcher
+from rodario.future import Future
+from rodario.pump import MessagePump
+from rodario.streams import QUEUE_CLAIM_IDLE, StreamPump
 from rodario.registry import Registry
-from rodario.exceptions import UUIDInUseException
+from rodario.exceptions import (UUIDInUseException, RemoteException,
+                                InvalidActorException, UnknownMethodException,
+                                PayloadLostException)
 
 REGISTRY = Registry()
+LOGGER = logging.getLogger(__name__)
+#: Public methods that proxies don't expose
+RESERVED_METHODS = frozenset(('proxy', 'start', 'stop', 'part', 'join',
+                              'spawn',))
+#: Private methods that proxies may call anyway
+INTERNAL_METHODS = frozenset(('_get_methods',))
+
+#: Per-thread state of the bulk spawn in progress, if any
+_SPAWNING = local()
+
+
+def _unbound(attr, cls):
+    """
+    Return a callable for a class attribute that takes the instance first.
+
+    :param mixed attr: The class attribute
+    :param type cls: The class it belongs to
+    :rtype: callable
+    :returns: The callable, or None if the attribute isn't a method
+    """
+
+    if isinstance(attr, DecoratedMethod):
+        return attr._compiled  # pylint: disable=W0212
+
+    if isinstance(attr, staticmethod):
+        func = attr.__func__
+
+        return lambda _, *args, **kwargs: func(*args, **kwargs)
+
+    if isinstance(attr, classmethod):
+        func = attr.__func__
+
+        return lambda _, *args, **kwargs: func(cls, *args, **kwargs)
+
+    if inspect.isfunction(attr):
+        return attr
+
+    return None
+
+
+def _result(data, fanout, value, failed):
+    """
+    Build the reply to a call.
+
+    :param tuple data: The decoded method call
+    :param int fanout: Number of local actors that shared the delivery
+    :param mixed value: The return value (or exception)
+    :param bool failed: Whether ``value`` is an exception
+    :rtype: :class:`tuple`
+    """
+
+    # a declined call is answered, but without a result
+    skipped = value is SKIP
+
+    return (data[0], None if skipped else value, fanout, failed, skipped)
+
+
+def _unencodable(result, ex):
+    """
+    Replace a reply (or a list of replies) that couldn't be encoded.
+
+    :param tuple result: The reply
+    :param Exception ex: The reason it couldn't be encoded
+    :rtype: :class:`tuple`
+    """
+
+    error = RemoteException(type(ex).__name__, str(ex))
+
+    if result[0] is None:
+        # a list of replies
+        return (None, [(reply[0], error, reply[2], True, False)
+                       for reply in result[1]])
+
+    return (result[0], error, result[2], True, False)
+
+
+def _submit(executor, call):
+    """
+    Run a call on a worker pool, unless the pool has been shut down.
+
+    :param concurrent.futures.Executor executor: The worker pool
+    :param callable call: The call
+    :rtype: :class:`bool`
+    :returns: Whether the call was submitted
+    """
+
+    try:
+        executor.submit(call)
+    except RuntimeError:
+        return False
+
+    return True
+
+
+def _serving(actor):
+    """
+    Tell the registry whether an actor is serving, without keeping it alive.
+
+    :param weakref.ref actor: Reference to the actor
+    :rtype: :class:`bool`
+    """
+
+    actor = actor()
+
+    return actor is not None and actor.is_serving
+
+
+def _countdown(count, func):
+    """
+    Wrap a function so it only runs on the last of a number of calls.
+
+    :param int count: The number of calls to wait for
+    :param callable func: The function to run
+    :rtype: :class:`callable`
+    """
+
+    lock = Lock()
+    remaining = [count]
+
+    def tick():
+        """ Count a call; run the function if it was the last one. """
+
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+
+        if last:
+            func()
+
+    return tick
+
+
+# pylint: disable=R0903
+class _ReplyBatch(object):
+
+    """ Replies to a packed batch of calls, published together """
+
+    def __init__(self, actor, proxy, codec, pending):
+        """
+        Initialize the batch.
+
+        :param rodario.actors.Actor actor: The Actor answering the calls
+        :param str proxy: ID of the caller's reply channel
+        :param rodario.codecs.Codec codec: The codec to reply with
+        :param int pending: The number of replies to wait for
+        """
+
+        #: The Actor answering the calls
+        self._actor = actor
+        #: ID of the caller's reply channel
+        self._proxy = proxy
+        #: Codec to reply with
+        self._codec = codec
+        #: Number of replies still to come
+        self._pending = pending
+        #: Replies so far
+        self._results = []
+        #: Lock guarding the replies
+        self._lock = Lock()
+
+    # pylint: disable=R0913
+    def add(self, data, fanout, codec, value, failed):
+        """
+        Add the reply to a call; publish them all once the last one is in.
+
+        :param tuple data: The decoded method call
+        :param int fanout: Number of local actors that shared the delivery
+        :param rodario.codecs.Codec codec: The codec to reply with
+        :param mixed value: The return value (or exception)
+        :param bool failed: Whether ``value`` is an exception
+        """
+
+        if data[0] is None:
+            # one-way calls don't count
+            self._actor._reply(  # pylint: disable=W0212
+                data, fanout, codec, value, failed)
+
+            return
+
+        with self._lock:
+            self._results.append(_result(data, fanout, value, failed))
+            self._pending -= 1
+
+            if self._pending:
+                return
+
+        # a reply with no call UUID carries a list of replies
+        self._actor._publish(  # pylint: disable=W0212
+            (None, self._results), self._codec, self._proxy)
 
 
 # pylint: disable=E1101
@@ -24,40 +230,264 @@ class Actor(object):
     #: Threading Event to tell the message handling loop to die
     # (needed in __del__ so must be defined here)
     _stop = None
-    #: Redis PubSub client
-    _pubsub = None
-
-    def __init__(self, uuid=None):
+    #: Message pump for pubsub channels
+    _pump = None
+    #: Whether to use the process-wide Dispatcher instead of a private pump
+    shared = False
+    #: Size of the worker pool for method calls (0 runs them on the pump)
+    workers = 0
+    #: Worker pool for method calls
+    _executor = None
+    #: Whether the worker pool was created by (and is shut down with) this
+    #: Actor
+    _owns_executor = False
+    #: Codec (or codec name) for calls made through this Actor's proxies
+    codec = None
+    #: Whether to also read calls from a durable stream mailbox
+    durable = False
+    #: Stream mailbox reader (for durable actors)
+    _mailbox = None
+    #: Reader for the work queues this Actor has joined
+    _queue_pump = None
+    #: Callables for each method proxies may call, by name (per class)
+    _method_table = {}
+    #: Names of the public methods proxies expose (per class)
+    _interface = frozenset()
+    #: Names of the public methods marked one-way (per class)
+    _oneway = frozenset()
+    #: Key identifying the class's interface in the registry (per class)
+    _interface_key = None
+
+    def __init_subclass__(cls, **kwargs):
+        """ Build the method table for each Actor subclass. """
+
+        super(Actor, cls).__init_subclass__(**kwargs)
+        cls._build_method_table()
+
+    @classmethod
+    def _build_method_table(cls):
+        """ Build the table of methods proxies may call. """
+
+        table = {}
+
+        # walk the MRO base-first, so overrides replace what they override
+        for klass in reversed(cls.__mro__):
+            for name, attr in vars(klass).items():
+                if name in INTERNAL_METHODS or not (
+                        name[0] == '_' or name in RESERVED_METHODS):
+                    method = _unbound(attr, cls)
+
+                    if method is not None:
+                        table[name] = method
+                    else:
+                        # e.g. a method replaced by a property or constant
+                        table.pop(name, None)
+
+        cls._method_table = table
+        cls._interface = frozenset(name for name in table
+                                   if name not in INTERNAL_METHODS)
+        cls._oneway = frozenset(
+            name for name in cls._interface
+            if 'oneway' in getattr(table[name], 'decorations', ()))
+        # the digest changes along with the interface, so caches of it never
+        # go stale
+        digest = blake2b(' '.join(sorted(cls._interface) + ['!'] +
+                                  sorted(cls._oneway)).encode('utf-8'),
+                         digest_size=8).hexdigest()
+        cls._interface_key = '%s.%s:%s' % (cls.__module__, cls.__qualname__,
+                                           digest)
+
+    # pylint: disable=R0913
+    def __init__(self, uuid=None, timeout=None, shared=None, workers=None,
+                 executor=None, codec=None, durable=None):
         """
         Initialize the Actor object.
 
         :param str uuid: Optionally-provided UUID
+        :param float timeout: Seconds the message pump blocks per read
+        :param bool shared: Whether to use the process-wide Dispatcher
+            (defaults to the class's ``shared`` attribute)
+        :param int workers: Size of the thread pool that runs method calls
+            (defaults to the class's ``workers`` attribute)
+        :param concurrent.futures.Executor executor: Worker pool to use
+            instead of creating a thread pool; it must run calls in this
+            process, since they act on this Actor's state
+        :param codec: Codec (or codec name) for calls made through
+            :meth:`proxy`; replies always use the codec of the call they
+            answer
+        :param bool durable: Whether to also read calls from the
+            ``mailbox:<uuid>`` stream (defaults to the class's ``durable``
+            attribute)
         """
 
+        # actors created by spawn() share its connection and registration
+        spawning = getattr(_SPAWNING, 'actors', None)
         atexit.register(self.__del__)
         self._stop = Event()
-        #: Separate Thread for handling messages
-        self._proc = None
         #: Redis connection
-        self._redis = get_redis_connection()
-        # pylint: disable=E1123
-        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._redis = (_SPAWNING.redis if spawning is not None
+                       else get_redis_connection())
+        #: Handlers for each subscribed channel
+        self._channels = {}
+        #: Handlers for each joined work queue
+        self._queues = {}
+        #: Cluster channels this Actor is a member of
+        self._clusters = set()
+        #: Seconds the message pumps block per read
+        self._timeout = timeout
+        #: Mailbox of serialized calls (remote and local) waiting to run
+        self._serial_calls = deque()
+        #: Lock guarding the mailbox
+        self._serial_lock = Lock()
+        #: Whether a thread is draining the mailbox
+        self._serial_running = False
+
+        if workers is not None:
+            self.workers = workers
+
+        self.codec = get_codec(self.codec if codec is None else codec)
+
+        self._owns_executor = executor is None and bool(self.workers)
+
+        if executor is not None:
+            self._executor = executor
+        elif self.workers:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+
+        if shared is not None:
+            self.shared = shared
+        elif spawning is not None:
+            self.shared = True
+
+        if self.shared:
+            self._pump = Dispatcher(timeout=timeout)
+        else:
+            self._pump = MessagePump(self._redis, timeout)
 
         if uuid:
             self.uuid = uuid
         else:
             self.uuid = str(uuid4())
 
-        if not REGISTRY.exists(self.uuid):
-            REGISTRY.register(self.uuid)
+        if durable is not None:
+            self.durable = durable
+
+        if self.durable:
+            # consume as the actor's UUID, so a restarted actor gets back the
+            # calls it had read but not finished
+            self._mailbox = StreamPump(self.uuid, self._redis, timeout)
+
+        metadata = {
+            'class': '%s.%s' % (type(self).__module__,
+                                type(self).__qualname__),
+            'host': HOST,
+            'pid': getpid(),
+            'started': time(),
+        }
+
+        # heartbeats stop while the actor isn't reading its calls
+        serving = partial(_serving, ref(self))
+
+        if spawning is not None:
+            spawning.append((self.uuid, self._interface_key, self._interface,
+                             self._oneway, metadata, serving))
+        elif not REGISTRY.exists(self.uuid):
+            REGISTRY.register(self.uuid, self._interface_key,
+                              self._interface, self._oneway, metadata,
+                              serving)
         else:
             self.uuid = None
             raise UUIDInUseException('UUID is already taken')
 
+    @classmethod
+    def spawn(cls, count=None, uuids=None, start=True, **kwargs):
+        """
+        Create (and start) many actors of this class at once.
+
+        The actors share one redis connection and the process-wide
+        Dispatcher (unless ``shared`` says otherwise), are registered in a
+        single pipelined round trip, and have their channels subscribed with
+        one command, instead of one of each per actor. If any of the UUIDs
+        is taken, none of the actors are kept.
+
+        AsyncActors should be spawned with ``start`` off, and started on
+        their event loop.
+
+        :param int count: Number of actors to create, with random UUIDs
+        :param list uuids: UUIDs of the actors to create, instead of
+            ``count``; each may only be given once
+        :param bool start: Whether to start the actors
+        :param dict kwargs: Arguments for each actor's constructor
+        :rtype: :class:`list`
+        :returns: The actors
+        """
+
+        if uuids is None:
+            uuids = [str(uuid4()) for _ in range(count or 0)]
+
+        seen = set()
+        repeated = set()
+
+        for uuid in uuids:
+            (repeated if uuid in seen else seen).add(uuid)
+
+        if repeated:
+            raise UUIDInUseException('UUIDs given more than once: %s'
+                                     % ', '.join(sorted(repeated)))
+
+        actors = []
+        registrations = []
+        _SPAWNING.redis = get_redis_connection()
+        _SPAWNING.actors = registrations
+
+        try:
+            for uuid in uuids:
+                actors.append(cls(uuid=uuid, **kwargs))
+        finally:
+            _SPAWNING.actors = _SPAWNING.redis = None
+
+        taken = REGISTRY.register_many(registrations)
+
+        if taken:
+            for actor in actors:
+                if actor.uuid in taken:
+                    # the UUID belongs to someone else; just let go of it
+                    actor.uuid = None
+                    actor.stop()
+                else:
+                    actor.__del__()
+
+            raise UUIDInUseException('UUIDs already taken: %s'
+                                     % ', '.join(taken))
+
+        if not start:
+            return actors
+
+        # subscribe the actors' channels on the shared Dispatcher together
+        handlers = {}
+
+        for actor in actors:
+            channels = actor._prepare_start()  # pylint: disable=W0212
+
+            if any(channel in handlers for channel in channels):
+                # one handler per channel and command
+                Dispatcher().subscribe(**handlers)
+                handlers = {}
+
+            handlers.update(channels)
+
+        if handlers:
+            Dispatcher().subscribe(**handlers)
+
+        return actors
+
     def __del__(self):
         """ Clean up. """
 
         if hasattr(self, 'uuid'):
+            for channel in list(getattr(self, '_clusters', ())):
+                REGISTRY.part(channel, self.uuid)
+
             REGISTRY.unregister(self.uuid)
 
         self.stop()
@@ -72,6 +502,23 @@ class Actor(object):
 
         return not self._stop.is_set()
 
+    @property
+    def is_serving(self):
+        """
+        Return True if this Actor is alive and its message pump is reading
+        its calls.
+
+        :rtype: :class:`bool`
+        """
+
+        if not self.is_alive or self._pump is None:
+            return False
+
+        if self.shared:
+            return self._pump.is_serving('actor:%s' % self.uuid)
+
+        return self._pump.is_alive
+
     def _handler(self, message):
         """
         Send proxied method call results back through pubsub.
@@ -79,88 +526,470 @@ class Actor(object):
         :param tuple message: The message to dissect
         """
 
-        data = pickle.loads(message['data'])
+        try:
+            data, codec = decode(message['data'], self._redis)
+        except PayloadLostException as ex:
+            # e.g. an out-of-band payload that expired before it was read;
+            # tell the caller rather than leave it waiting
+            LOGGER.exception('Unable to decode call for actor %s', self.uuid)
+            lost = lost_call(ex, message.get('fanout', 1))
+
+            if lost is not None:
+                self._publish(lost[1], ex.codec, lost[0])
+
+            return
+        except Exception:  # pylint: disable=W0703
+            LOGGER.exception('Unable to decode call for actor %s', self.uuid)
+            return
 
         if not data[2]:
             # empty method call; bail out
             return
 
+        fanout = message.get('fanout', 1)
+
+        if data[2] != BATCH_METHOD:
+            # a stream entry is acknowledged once the call has run, not when
+            # it is queued
+            self._accept(data, fanout, codec, self._reply,
+                         message.pop('ack', None))
+
+            return
+
+        # a packed batch of calls, answered together
+        calls = data[3]
+        replies = _ReplyBatch(self, data[1], codec,
+                              sum(1 for call in calls if call[0] is not None))
+        done = message.pop('ack', None) if calls else None
+
+        if done is not None:
+            done = _countdown(len(calls), done)
+
+        for call in calls:
+            self._accept(call, fanout, codec, replies.add, done)
+
+    # pylint: disable=R0913
+    def _accept(self, data, fanout, codec, reply, done=None):
+        """
+        Queue a call in the mailbox, or reject it if it is unknown.
+
+        :param tuple data: The decoded method call
+        :param int fanout: Number of local actors that shared the delivery
+        :param rodario.codecs.Codec codec: The codec to reply with
+        :param callable reply: Delivers the reply (see :meth:`_reply`)
+        :param callable done: Called once the call has been answered (e.g.
+            to acknowledge the stream entry it came from)
+        """
+
+        method = self._method_table.get(data[2])
+
+        if method is None:
+            # answer right away; nothing to queue
+            try:
+                reply(data, fanout, codec, UnknownMethodException(data[2]),
+                      True)
+            finally:
+                if done is not None:
+                    done()
+
+            return
+
+        self._dispatch(data[2], partial(self._invoke, method, data, fanout,
+                                        codec, reply, done))
+
+    def _dispatch(self, name, call, local=False):
+        """
+        Run a call to one of this Actor's methods, or queue it in the mailbox.
+
+        Serialized calls run one at a time, in order: on the worker pool if
+        there is one, otherwise on whichever thread finds the mailbox idle
+        (the pump, or a local proxy's caller).
+
+        :param str name: Name of the method being called
+        :param callable call: Runs the method and delivers its result
+        :param bool local: Whether the call comes from a caller in this
+            process, which runs its own call but no one else's
+        """
+
+        # read once; stop() may shut the pool down and drop it meanwhile
+        executor = self._executor
+
+        if (executor is not None
+                and 'concurrent' in getattr(self._method_table[name],
+                                            'decorations', ())):
+            if not _submit(executor, call):
+                call()
+
+            return
+
+        with self._serial_lock:
+            self._serial_calls.append(call)
+
+            if self._serial_running:
+                return
+
+            self._serial_running = True
+
+        if executor is None or not _submit(executor, self._drain):
+            # the mailbox must drain somewhere, or it never will again
+            self._drain(handoff=local)
+
+    # pylint: disable=R0913
+    def _call(self, name, args, kwargs, copy=False, oneway=False):
+        """
+        Call one of this Actor's methods from this process, without redis.
+
+        The call goes through the same mailbox as calls arriving over pubsub,
+        so it never runs alongside this Actor's other serialized calls.
+
+        :param str name: Name of the method to call
+        :param tuple args: The arguments to pass
+        :param dict kwargs: The keyword arguments to pass
+        :param bool copy: Whether to deep-copy the arguments and result, so
+            the caller and the Actor never share mutable objects
+        :param bool oneway: Whether to skip the result entirely
+        :rtype: :class:`rodario.future.Future`
+        :returns: The Future, or None for one-way calls
+        """
+
+        method = self._method_table.get(name)
+
+        if method is None:
+            raise UnknownMethodException(name)
+
+        if not self.is_alive:
+            raise InvalidActorException('Actor is not running')
+
+        if copy:
+            args, kwargs = deepcopy((args, kwargs))
+
+        future = None if oneway else Future()
+        self._dispatch(name, partial(self._invoke_local, future, method,
+                                     args, kwargs, copy), local=True)
+
+        return future
+
+    # pylint: disable=R0913
+    def _invoke_local(self, future, method, args, kwargs, copy):
+        """
+        Call a method and resolve a local caller's Future with its result.
+
+        :param rodario.future.Future future: The caller's Future (None for
+            one-way calls)
+        :param callable method: The method (from the method table)
+        :param tuple args: The arguments to pass
+        :param dict kwargs: The keyword arguments to pass
+        :param bool copy: Whether to deep-copy the result
+        """
+
+        try:
+            value = method(self, *args, **kwargs)
+        except Exception as ex:  # pylint: disable=W0703
+            if future is None:
+                LOGGER.exception('Unhandled error in one-way call to %s',
+                                 method.__name__)
+            else:
+                future.set_exception(ex)
+
+            return
+
+        if future is None:
+            return
+
+        if value is SKIP:
+            value = None
+
+        future.set_result(deepcopy(value) if copy else value)
+
+    # pylint: disable=R0913
+    def _invoke(self, method, data, fanout, codec, reply, done=None):
+        """
+        Call a method and publish its result.
+
+        :param callable method: The method (from the method table)
+        :param tuple data: The decoded method call
+        :param int fanout: Number of local actors that shared the delivery
+        :param rodario.codecs.Codec codec: The codec to reply with
+        :param callable reply: Delivers the reply (see :meth:`_reply`)
+        :param callable done: Called once the call has been answered
+        """
+
         # call the function and respond to the proxy object with return value
-        uuid = data[0]
-        proxy = data[1]
-        func = getattr(self, data[2])
-        result = (uuid, func(*data[3], **data[4]))
-        self._redis.publish('proxy:%s' % proxy, pickle.dumps(result))
+        # (or the exception it raised)
+        try:
+            value = method(self, *data[3], **data[4])
+            failed = False
+        except Exception as ex:  # pylint: disable=W0703
+            value = ex
+            failed = True
+
+        try:
+            reply(data, fanout, codec, value, failed)
+        finally:
+            if done is not None:
+                done()
+
+    # pylint: disable=R0913
+    def _reply(self, data, fanout, codec, value, failed):
+        """
+        Publish the reply to a call.
+
+        The reply also reports how many local actors shared the call's
+        delivery, since redis only counts one subscriber per (shared)
+        connection.
+
+        :param tuple data: The decoded method call
+        :param int fanout: Number of local actors that shared the delivery
+        :param rodario.codecs.Codec codec: The codec to reply with
+        :param mixed value: The return value (or exception)
+        :param bool failed: Whether ``value`` is an exception
+        """
+
+        if data[0] is None:
+            # one-way call; nobody is listening
+            if failed:
+                LOGGER.error('Unhandled error in one-way call to %s', data[2],
+                             exc_info=value)
+
+            return
+
+        self._publish(_result(data, fanout, value, failed), codec, data[1])
+
+    def _publish(self, result, codec, proxy):
+        """
+        Publish a reply (or a list of replies) to a caller.
+
+        :param tuple result: The reply
+        :param rodario.codecs.Codec codec: The codec to use
+        :param str proxy: ID of the caller's reply channel
+        """
+
+        data = self._encode_reply(result, codec, proxy)
+
+        if not self._redis.publish('proxy:%s' % proxy, data):
+            # the caller is gone
+            discard(data)
+
+    def _encode_reply(self, result, codec, proxy):
+        """
+        Encode a reply, or the reason it can't be encoded.
+
+        Large replies to a caller on this host go through shared memory.
+
+        :param tuple result: The reply
+        :param rodario.codecs.Codec codec: The codec to use
+        :param str proxy: ID of the caller's reply channel
+        :rtype: :class:`bytes`
+        """
+
+        try:
+            return encode(result, codec, self._redis, is_local(proxy))
+        except Exception as ex:  # pylint: disable=W0703
+            # the caller would otherwise wait forever for its reply
+            return encode(_unencodable(result, ex), codec)
+
+    def _drain(self, handoff=False):
+        """
+        Run calls from the mailbox until it is empty.
+
+        :param bool handoff: Whether to run only the first call and leave the
+            rest to a thread of their own (for a local caller, which must not
+            be kept waiting on other callers' calls)
+        """
+
+        ran = False
+
+        while True:
+            with self._serial_lock:
+                if not self._serial_calls:
+                    self._serial_running = False
+
+                    return
+
+                if ran and handoff:
+                    break
+
+                call = self._serial_calls.popleft()
+
+            ran = True
+
+            try:
+                call()
+            except Exception:  # pylint: disable=W0703
+                # keep draining; a failed reply must not stall the queue
+                LOGGER.exception('Unable to complete call for actor %s',
+                                 self.uuid)
+
+        # still marked as running, so nothing else starts draining meanwhile
+        thread = Thread(target=self._drain)
+        thread.daemon = True
+        thread.start()
 
     def _get_methods(self):
         """
         List all of this Actor's methods (for creating remote proxies).
 
-        :rtype: :class:`list`
+        :rtype: :class:`set`
         """
 
-        methods = inspect.getmembers(self, predicate=callable)
-        method_list = set()
+        return set(self._interface)
 
-        for name, _ in methods:
-            if (name in ('proxy', 'start', 'stop', 'part', 'join',)
-                    or name[0] == '_'):
-                continue
+    def _subscribe(self, channel, handler):
+        """
+        Subscribe a handler to a channel and remember it.
 
-            method_list.add(name)
+        :param str channel: The channel to subscribe to
+        :param callable handler: The message handler function
+        """
 
-        return method_list
+        self._channels[channel] = handler
+        self._pump.subscribe(**{channel: handler})
 
-    def join(self, channel, func=None):
+    def join(self, channel, func=None, queue=False):
         """
         Join this Actor to a pubsub cluster channel.
 
+        With ``queue``, the Actor joins the cluster's work queue instead:
+        each call sent by a work-queue :class:`rodario.actors.ClusterProxy`
+        goes to just one of the members, whichever reads it first.
+
         :param str channel: The channel to join
         :param callable func: The message handler function
+        :param bool queue: Whether to join the cluster's work queue
         """
 
-        self._pubsub.subscribe(**{'cluster:%s' % channel: func
-                                                          if func is not None
-                                                          else self._handler})
+        handler = func if func is not None else self._handler
+        self._clusters.add(channel)
+        REGISTRY.join(channel, self.uuid)
+
+        if not queue:
+            self._subscribe('cluster:%s' % channel, handler)
+
+            return
+
+        if self._queue_pump is None:
+            # one entry at a time, and not before the last one has run, so
+            # idle members get the next call; take over the calls of
+            # members that died with them
+            self._queue_pump = StreamPump(self.uuid, self._redis,
+                                          self._timeout, batch=1, wait=True,
+                                          claim_idle=QUEUE_CLAIM_IDLE)
+
+        self._queues['queue:%s' % channel] = handler
+        self._queue_pump.subscribe(**{'queue:%s' % channel: handler})
+        self._queue_pump.start()
 
     def part(self, channel):
         """
-        Remove this Actor from a pubsub cluster channel.
+        Remove this Actor from a pubsub cluster channel (and its work queue).
 
         :param str channel: The channel to part
         """
 
-        self._pubsub.unsubscribe('cluster:%s' % channel)
+        self._clusters.discard(channel)
+        REGISTRY.part(channel, self.uuid)
+
+        if self._queues.pop('queue:%s' % channel, None) is not None:
+            self._queue_pump.unsubscribe('queue:%s' % channel)
+
+        channel = 'cluster:%s' % channel
+        handler = self._channels.pop(channel, None)
+
+        # a shared pump would drop every local handler for a None one
+        if handler is not None:
+            self._pump.unsubscribe(**{channel: handler})
 
-    def proxy(self):
+    def proxy(self, local=False, copy=False):
         """
         Wrap this Actor in an ActorProxy object.
 
+        :param bool local: Whether to call the Actor directly instead of
+            through redis
+        :param bool copy: Whether local calls deep-copy their arguments and
+            results
         :rtype: :class:`rodario.actors.ActorProxy`
         """
 
         # avoid cyclic import
         proxy_module = __import__('rodario.actors', fromlist=('ActorProxy',))
 
-        return proxy_module.ActorProxy(self)
+        return proxy_module.ActorProxy(self, codec=self.codec, local=local,
+                                       copy=copy)
 
     def start(self):
         """ Fire up the message handler thread. """
 
-        def pubsub_thread():
-            """ Call get_message in loop to fire _handler. """
+        handlers = self._prepare_start()
+
+        if handlers:
+            self._pump.subscribe(**handlers)
+
+    def _prepare_start(self):
+        """
+        Start everything but this Actor's subscriptions on the shared
+        Dispatcher, and return those instead (so :meth:`spawn` can subscribe
+        many actors' channels together).
+
+        :rtype: :class:`dict`
+        :returns: Handlers to subscribe on the shared Dispatcher, by channel
+            (none, for an Actor with a private pump)
+        """
+
+        if self._owns_executor and self._executor is None:
+            # shut down by stop()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+
+        # the personal channel, subscribed along with the others below
+        self._stop.clear()
+        self._channels['actor:%s' % self.uuid] = self._handler
+
+        if self._mailbox is not None:
+            self._mailbox.subscribe(**{'mailbox:%s' % self.uuid:
+                                       self._handler})
+            self._mailbox.start()
+
+        if self._queues:
+            self._queue_pump.subscribe(**self._queues)
+            self._queue_pump.start()
 
-            while not self._stop.is_set():
-                self._pubsub.get_message()
-                sleep(0.01)
+        if self.shared:
+            # restore any channels dropped from the dispatcher by stop()
+            return dict(self._channels)
 
-        # subscribe to personal channel and fire up the message handler
-        self._pubsub.subscribe(**{'actor:%s' % self.uuid: self._handler})
-        self._proc = Thread(target=pubsub_thread)
-        self._proc.daemon = True
-        self._proc.start()
+        self._pump.subscribe(**{'actor:%s' % self.uuid: self._handler})
+        self._pump.start()
+
+        return {}
 
     def stop(self):
-        """ Kill the message handler thread. """
+        """
+        Kill the message handler thread.
+
+        Actors on the shared Dispatcher leave its channels instead, since the
+        dispatcher's threads belong to the whole process.
+        """
 
         self._stop.set()
+
+        if self._mailbox is not None:
+            self._mailbox.stop()
+
+        if self._queue_pump is not None:
+            self._queue_pump.stop()
+
+        if self._owns_executor and self._executor is not None:
+            # let queued calls finish, then release the threads; start()
+            # creates a new pool
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+        if self._pump is None:
+            return
+
+        if self.shared:
+            self._pump.unsubscribe(**self._channels)
+        else:
+            self._pump.stop()
+
+
+Actor._build_method_table()  # pylint: disable=W0212
@@ -0,0 +1,290 @@
+""" Asyncio actor for rodario framework """
+
+# stdlib
+import asyncio
+import inspect
+
+# local
+from rodario import get_async_redis_connection
+from rodario.batch import BATCH_METHOD
+from rodario.codecs import (decode_async, discard, encode, encode_async,
+                            is_local, lost_call)
+from rodario.exceptions import PayloadLostException, UnknownMethodException
+from rodario.actors.actor import (Actor, LOGGER, REGISTRY, _result,
+                                  _unencodable)
+
+
+# pylint: disable=E1101
+class AsyncActor(Actor):
+
+    """
+    Actor whose message loop runs on an asyncio event loop
+
+    Methods may be plain functions or coroutine functions; coroutines are
+    awaited before their result is sent back. Messages are handled one at a
+    time, in the order they arrive, just like a threaded :class:`Actor`.
+    """
+
+    #: Task running the message loop
+    _task = None
+
+    def __init__(self, uuid=None, timeout=None, codec=None):
+        """
+        Initialize the AsyncActor object.
+
+        :param str uuid: Optionally-provided UUID
+        :param float timeout: Unused; kept for signature compatibility
+        :param codec: Codec (or codec name) for calls made through
+            :meth:`proxy`
+        """
+
+        # the message loop has its own pubsub client, and stream mailboxes
+        # are read from a thread, not the event loop
+        super(AsyncActor, self).__init__(uuid, timeout, shared=False,
+                                         codec=codec, durable=False)
+        #: Asyncio redis PubSub client, while the message loop is running
+        self._apubsub = None
+
+    @property
+    def _aredis(self):
+        """
+        Retrieve the asyncio redis connection for the running event loop.
+
+        :rtype: :class:`redis.asyncio.StrictRedis`
+        """
+
+        return get_async_redis_connection()
+
+    @property
+    def is_serving(self):
+        """
+        Return True if this AsyncActor is alive and its message loop task is
+        running.
+
+        :rtype: :class:`bool`
+        """
+
+        return (self.is_alive and self._task is not None
+                and not self._task.done())
+
+    async def _handler(self, message):
+        """
+        Send proxied method call results back through pubsub.
+
+        :param tuple message: The message to dissect
+        """
+
+        try:
+            data, codec = await decode_async(message['data'], self._aredis)
+        except PayloadLostException as ex:
+            # e.g. an out-of-band payload that expired before it was read;
+            # tell the caller rather than leave it waiting
+            LOGGER.exception('Unable to decode call for actor %s', self.uuid)
+            lost = lost_call(ex, message.get('fanout', 1))
+
+            if lost is not None:
+                await self._publish_async(lost[1], ex.codec, lost[0])
+
+            return
+        except Exception:  # pylint: disable=W0703
+            LOGGER.exception('Unable to decode call for actor %s', self.uuid)
+            return
+
+        if not data[2]:
+            # empty method call; bail out
+            return
+
+        fanout = message.get('fanout', 1)
+
+        if data[2] != BATCH_METHOD:
+            result = await self._invoke_async(data, fanout)
+        else:
+            # a packed batch of calls, answered together
+            results = []
+
+            for call in data[3]:
+                reply = await self._invoke_async(call, fanout)
+
+                if reply is not None:
+                    results.append(reply)
+
+            result = (None, results) if results else None
+
+        if result is not None:
+            await self._publish_async(result, codec, data[1])
+
+    async def _publish_async(self, result, codec, proxy):
+        """
+        Publish a reply (or a list of replies) to a caller.
+
+        :param tuple result: The reply
+        :param rodario.codecs.Codec codec: The codec to use
+        :param str proxy: ID of the caller's reply channel
+        """
+
+        data = await self._encode_reply(result, codec, proxy)
+
+        if not await self._aredis.publish('proxy:%s' % proxy, data):
+            # the caller is gone
+            discard(data)
+
+    async def _invoke_async(self, data, fanout):
+        """
+        Call a method (awaiting it if need be) and build its reply.
+
+        :param tuple data: The decoded method call
+        :param int fanout: Number of local actors that shared the delivery
+        :rtype: :class:`tuple`
+        :returns: The reply, or None for one-way calls
+        """
+
+        method = self._method_table.get(data[2])
+
+        try:
+            if method is None:
+                raise UnknownMethodException(data[2])
+
+            value = method(self, *data[3], **data[4])
+
+            if inspect.isawaitable(value):
+                value = await value
+
+            failed = False
+        except Exception as ex:  # pylint: disable=W0703
+            value = ex
+            failed = True
+
+        if data[0] is None:
+            # one-way call; nobody is listening
+            if failed:
+                LOGGER.error('Unhandled error in one-way call to %s', data[2],
+                             exc_info=value)
+
+            return None
+
+        return _result(data, fanout, value, failed)
+
+    async def _encode_reply(self, result, codec, proxy):
+        """
+        Encode a reply, or the reason it can't be encoded.
+
+        :param tuple result: The reply
+        :param rodario.codecs.Codec codec: The codec to use
+        :param str proxy: ID of the caller's reply channel
+        :rtype: :class:`bytes`
+        """
+
+        try:
+            return await encode_async(result, codec, self._aredis,
+                                      is_local(proxy))
+        except Exception as ex:  # pylint: disable=W0703
+            # the caller would otherwise wait forever for its reply
+            return encode(_unencodable(result, ex), codec)
+
+    async def _run(self, ready):
+        """
+        Subscribe to this actor's channels and handle their messages.
+
+        :param asyncio.Future ready: Resolved once the actor is subscribed
+        """
+
+        # pylint: disable=E1123
+        self._apubsub = self._aredis.pubsub(ignore_subscribe_messages=True)
+
+        try:
+            await self._apubsub.subscribe(**self._channels)
+            ready.set_result(True)
+
+            while True:
+                await self._apubsub.get_message(timeout=None)
+        except Exception as ex:
+            if not ready.done():
+                ready.set_exception(ex)
+
+            raise
+        finally:
+            if not ready.done():
+                ready.cancel()
+
+            pubsub, self._apubsub = self._apubsub, None
+            await pubsub.aclose()
+
+    async def join(self, channel, func=None):
+        """
+        Join this Actor to a pubsub cluster channel.
+
+        :param str channel: The channel to join
+        :param callable func: The message handler function (may be a
+            coroutine function)
+        """
+
+        self._clusters.add(channel)
+        REGISTRY.join(channel, self.uuid)
+        channel = 'cluster:%s' % channel
+        self._channels[channel] = func if func is not None else self._handler
+
+        if self._apubsub is not None:
+            await self._apubsub.subscribe(**{channel: self._channels[channel]})
+
+    async def part(self, channel):
+        """
+        Remove this Actor from a pubsub cluster channel.
+
+        :param str channel: The channel to part
+        """
+
+        self._clusters.discard(channel)
+        REGISTRY.part(channel, self.uuid)
+        channel = 'cluster:%s' % channel
+        self._channels.pop(channel, None)
+
+        if self._apubsub is not None:
+            await self._apubsub.unsubscribe(channel)
+
+    def proxy(self):
+        """
+        Wrap this Actor in an AsyncActorProxy object.
+
+        :rtype: :class:`rodario.actors.AsyncActorProxy`
+        """
+
+        # avoid cyclic import
+        proxy_module = __import__('rodario.actors',
+                                  fromlist=('AsyncActorProxy',))
+
+        return proxy_module.AsyncActorProxy(self, codec=self.codec)
+
+    def start(self):
+        """
+        Start the message loop as a task on the running event loop.
+
+        Await the returned future to wait until the actor is subscribed.
+
+        :rtype: :class:`asyncio.Future`
+        """
+
+        loop = asyncio.get_event_loop()
+        ready = loop.create_future()
+        self._stop.clear()
+        self._channels['actor:%s' % self.uuid] = self._handler
+
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run(ready))
+        else:
+            ready.set_result(True)
+
+        return ready
+
+    def stop(self):
+        """ Cancel the message loop task. """
+
+        self._stop.set()
+
+        if self._task is None or self._task.done():
+            return
+
+        try:
+            self._task.cancel()
+        except RuntimeError:
+            # the event loop is already closed (e.g. at exit)
+            pass
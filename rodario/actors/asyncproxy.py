@@ -0,0 +1,263 @@
+""" Asyncio actor proxy for rodario framework """
+
+# stdlib
+import asyncio
+import logging
+import types
+from uuid import uuid4
+from weakref import WeakKeyDictionary
+
+# local
+from rodario import get_async_redis_connection
+from rodario.codecs import (decode_async, discard, encode_async, get_codec,
+                            lost_replies, reply_channel_id)
+from rodario.exceptions import (InvalidActorException, InvalidProxyException,
+                                PayloadLostException)
+
+LOGGER = logging.getLogger(__name__)
+
+
+# pylint: disable=C1001
+class _AsyncReplies(object):
+
+    """
+    Reply channel for the proxied calls made from one event loop
+
+    Mirrors :class:`rodario.dispatcher.Replies`, but listens with the
+    asyncio redis client from a task, so replies resolve asyncio futures
+    without a thread hop.
+    """
+
+    #: Reply channels by event loop
+    _instances = WeakKeyDictionary()
+
+    def __init__(self):
+        """ Initialize the reply channel. """
+
+        #: ID of this loop's reply channel (prefixed with the host name)
+        self.proxyid = reply_channel_id()
+        #: Asyncio redis connection
+        self._redis = get_async_redis_connection()
+        #: Futures awaiting replies, by call UUID
+        self._futures = {}
+        #: Future resolved once the channel is subscribed
+        self._ready = None
+        #: Task listening on the channel
+        self._task = None
+
+    @classmethod
+    async def get(cls):
+        """
+        Retrieve the subscribed reply channel for the running event loop.
+
+        :rtype: :class:`rodario.actors.asyncproxy._AsyncReplies`
+        """
+
+        loop = asyncio.get_running_loop()
+        replies = cls._instances.get(loop)
+
+        if replies is None:
+            replies = cls._instances[loop] = cls()
+            replies._ready = loop.create_future()
+            replies._task = loop.create_task(replies._run())
+
+        await asyncio.shield(replies._ready)
+
+        return replies
+
+    async def _route(self, message):
+        """
+        Resolve the future waiting on a reply's call UUID.
+
+        :param dict message: The pubsub message
+        """
+
+        try:
+            data = (await decode_async(message['data'], self._redis))[0]
+        except PayloadLostException as ex:
+            # e.g. an out-of-band payload that expired before it was read;
+            # fail the calls rather than leave their callers waiting
+            LOGGER.exception('Unable to decode reply')
+
+            for reply in lost_replies(ex):
+                self._resolve(reply)
+
+            return
+        except Exception:  # pylint: disable=W0703
+            LOGGER.exception('Unable to decode reply')
+            return
+
+        self._resolve(data)
+
+    def _resolve(self, data):
+        """
+        Resolve the future waiting on a decoded reply's call UUID.
+
+        :param tuple data: The decoded reply
+        """
+
+        future = self._futures.pop(data[0], None)
+
+        if future is None or future.done():
+            # nobody is waiting (anymore); drop it
+            return
+
+        if data[3]:
+            future.set_exception(data[1])
+        else:
+            future.set_result(data[1])
+
+    async def _run(self):
+        """ Subscribe to the reply channel and route its messages. """
+
+        # pylint: disable=E1123
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+
+        try:
+            await pubsub.subscribe(**{'proxy:%s' % self.proxyid: self._route})
+            self._ready.set_result(True)
+
+            while True:
+                await pubsub.get_message(timeout=None)
+        except Exception as ex:
+            if not self._ready.done():
+                self._ready.set_exception(ex)
+
+            raise
+        finally:
+            await pubsub.aclose()
+
+    def expect(self, uuid):
+        """
+        Create a future for replies to the given call.
+
+        :param str uuid: The call UUID
+        :rtype: :class:`asyncio.Future`
+        """
+
+        future = self._futures[uuid] = \
+            asyncio.get_running_loop().create_future()
+
+        return future
+
+    def forget(self, uuid):
+        """
+        Stop routing replies for the given call.
+
+        :param str uuid: The call UUID
+        """
+
+        self._futures.pop(uuid, None)
+
+
+class AsyncActorProxy(object):  # pylint: disable=R0903
+
+    """
+    Proxy object whose calls are awaitable
+
+    Has the same shape as :class:`rodario.actors.ActorProxy`, but each
+    proxied call is a coroutine that resolves to the method's return value
+    (or raises its exception). Works with threaded and asyncio actors alike.
+    """
+
+    def __init__(self, actor=None, uuid=None, methods=None, codec=None):
+        """
+        Initialize instance of AsyncActorProxy.
+
+        Accepts either an Actor object to clone or a UUID, but not both.
+        Since the constructor can't wait on the network, a proxy built from a
+        UUID resolves any attribute to a remote call unless ``methods`` is
+        given.
+
+        :param rodario.actors.Actor actor: Actor to clone
+        :param str uuid: UUID of Actor to clone
+        :param set methods: The names of the Actor's public methods
+        :param codec: Codec (or codec name) for method calls
+        """
+
+        #: Codec for method calls
+        self._codec = get_codec(codec)
+        #: Names of the proxied methods (None if unknown)
+        self._methods = None
+        #: Whether the Actor is known to live on this host
+        self._local = False
+        # avoid cyclic import
+        actor_module = __import__('rodario.actors', fromlist=('Actor',))
+
+        if isinstance(actor, actor_module.Actor):
+            # proxying an Actor directly
+            self.uuid = actor.uuid
+            self._local = True
+            methods = actor._get_methods()  # pylint: disable=W0212
+        elif isinstance(uuid, str):
+            self.uuid = uuid
+        else:
+            raise InvalidProxyException('No actor or UUID provided')
+
+        if methods is not None:
+            self._methods = frozenset(methods)
+
+        # create proxy methods for each public method of the original Actor
+        for name in methods or ():
+            setattr(self, name, types.MethodType(self._get_lambda(name), self))
+
+    @property
+    def _redis(self):
+        """
+        Retrieve the asyncio redis connection for the running event loop.
+
+        :rtype: :class:`redis.asyncio.StrictRedis`
+        """
+
+        return get_async_redis_connection()
+
+    def __getattr__(self, name):
+        """
+        Proxy unknown public attributes when the interface is unknown.
+
+        :param str name: Name of the attribute being requested
+        :rtype: instancemethod
+        """
+
+        if name[0] == '_' or self._methods is not None:
+            raise AttributeError(name)
+
+        return types.MethodType(self._get_lambda(name), self)
+
+    def _get_lambda(self, name):
+        """
+        Generate a lambda function to proxy the given method.
+
+        :param str name: Name of the method to proxy
+        :rtype: :expression:`lambda`
+        """
+
+        return lambda _, *args, **kwargs: self._proxy(name, *args, **kwargs)
+
+    async def _proxy(self, method_name, *args, **kwargs):
+        """
+        Proxy a method call to redis pubsub and await its reply.
+
+        :param str method_name: The method to proxy
+        :param tuple args: The arguments to pass
+        :param dict kwargs: The keyword arguments to pass
+        :rtype: mixed
+        """
+
+        replies = await _AsyncReplies.get()
+        # register the future first; the reply may beat publish()
+        uuid = str(uuid4())
+        future = replies.expect(uuid)
+
+        try:
+            data = await encode_async((uuid, replies.proxyid, method_name,
+                                       args, kwargs,), self._codec,
+                                      self._redis, self._local)
+
+            if not await self._redis.publish('actor:%s' % self.uuid, data):
+                discard(data)
+                raise InvalidActorException('No such actor')
+
+            return await future
+        finally:
+            replies.forget(uuid)
@@ -1,19 +1,34 @@
 """ Cluster Proxy for rodario framework """
 
 # stdlib
-import pickle
 import types
-from multiprocessing import Queue, Event
-from threading import Thread
-from time import sleep
+from fractions import Fraction
+from functools import partial
+from threading import Lock, local as thread_local
 from uuid import uuid4
 
 # local
 from rodario import get_redis_connection
-from rodario.future import Future
+from rodario.batch import Batch
+from rodario.codecs import encode, get_codec
+from rodario.dispatcher import Replies
+from rodario.future import ClusterFuture, Future
+from rodario.streams import send
 from rodario.exceptions import EmptyClusterException
 
 
+def _fail(future, exception):
+    """
+    Fail a cluster call's future and mark it complete.
+
+    :param rodario.future.ClusterFuture future: The future
+    :param Exception exception: The exception for it to raise
+    """
+
+    future.set_exception(exception)
+    future.finish()
+
+
 # pylint: disable=R0903
 class ClusterProxy(object):
 
@@ -24,47 +39,44 @@ class ClusterProxy(object):
     their own API methods for coordinating the Actors in their channel.
     """
 
-    #: Flag for Stopping the message handler thread
-    _stop = None
-
-    def __init__(self, channel):
+    def __init__(self, channel, codec=None, queue=False):
         """
         Initialize instance of ClusterProxy.
 
+        By default, each call is broadcast to every member of the cluster.
+        With ``queue``, calls go to the cluster's work queue instead, where
+        each one is taken by a single member (see
+        :meth:`rodario.actors.Actor.join`) and its Future resolves to that
+        member's result alone. Queued calls wait until a member is free to
+        take them, even if the cluster has no members yet.
+
         :param str channel: The cluster channel to use
+        :param codec: Codec (or codec name) for method calls
+        :param bool queue: Whether to send calls to the work queue
         """
 
         #: Cluster channel
         self.channel = channel
+        #: Whether calls go to the work queue
+        self._queue = queue
         #: Redis connection
         self._redis = get_redis_connection()
-        #: Redis PubSub client
-        self._pubsub = None
-        #: This proxy object's UUID for creating unique channels
-        self.proxyid = str(uuid4())
-        #: Response queues for sandboxing method calls
-        self._response_queues = {}
-        #: Response counters for the response queue
+        #: Codec for method calls
+        self._codec = get_codec(codec)
+        #: Process-wide reply channel
+        self._replies = Replies()
+        #: UUID of the reply channel (shared by every proxy in the process)
+        self.proxyid = self._replies.proxyid
+        #: Pending futures for sandboxing method calls
+        self._futures = {}
+        #: Outstanding subscriber connections for each future
         self._response_counters = {}
-        self._stop = Event()
-        # pylint: disable=E1123
-        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
-        self._pubsub.subscribe(**{'proxy:%s' % self.proxyid: self._handler})
-
-        def pubsub_thread():
-            """ Call get_message in loop to fire _handler. """
-
-            try:
-                while not self._stop.is_set():
-                    self._pubsub.get_message()
-                    sleep(0.001)
-            except:  # pylint: disable=W0702
-                pass
-
-        # fire up the message handler thread as a daemon
-        proc = Thread(target=pubsub_thread)
-        proc.daemon = True
-        proc.start()
+        #: Members that have answered each future so far
+        self._recipients = {}
+        #: Lock held while a call is being published and registered
+        self._lock = Lock()
+        #: The batch each thread has open, if any
+        self._batching = thread_local()
 
     def __getattribute__(self, name):
         """
@@ -89,25 +101,71 @@ class ClusterProxy(object):
         except AttributeError:
             return types.MethodType(get_lambda(name), self)
 
-    def _handler(self, message):
+    def batch(self, packed=False):
         """
-        Handle message response via Queue object.
+        Buffer this proxy's calls and send them in a single round trip.
 
-        :param tuple message: The message to dissect
+        Use it as a context manager; calls made through the proxy on the
+        same thread inside the ``with`` block are sent when it ends. Calls
+        that reach no members fail their ClusterFutures with
+        :class:`rodario.exceptions.EmptyClusterException` instead of raising.
+
+        :param bool packed: Whether to send the calls as a single message,
+            which each member answers with a single reply
+        :rtype: :class:`rodario.batch.Batch`
         """
 
-        # throw its value in the associated response queue
-        data = pickle.loads(message['data'])
+        return Batch(self._batching, self._redis, self._codec, self.proxyid,
+                     packed=packed, lock=self._lock)
+
+    def _handler(self, data):
+        """
+        Handle message response via Future object.
+
+        :param tuple data: The decoded reply
+        """
+
+        # throw its value (or exception) in the associated future; members
+        # that declined the call still answer, but without a result
+        with self._lock:
+            future = self._futures[data[0]]
+
+            if data[3]:
+                future.add_exception(data[1])
+            elif not data[4]:
+                future.add_result(data[1])
+
+            # each of a connection's local recipients answers for a share
+            # of that connection, so the number of members is only known
+            # once they all have
+            self._response_counters[data[0]] -= Fraction(1, data[2])
+            self._recipients[data[0]] += 1
+
+            if self._response_counters[data[0]] > 0:
+                return
+
+            self._replies.forget(data[0])
+            self._futures.pop(data[0])
+            self._response_counters.pop(data[0])
+            recipients = self._recipients.pop(data[0])
+
+        # outside the lock: the future's callbacks may call this proxy again
+        future.finish(recipients)
 
-        if data[1] != False:
-            queue = self._response_queues[data[0]]
-            queue.put(data[1])
-            self._response_queues[data[0]] = queue
+    def _queue_handler(self, data):
+        """
+        Handle the response to a queued call via its Future object.
+
+        :param tuple data: The decoded reply
+        """
 
-        self._response_counters[data[0]] -= 1
+        self._replies.forget(data[0])
+        future = self._futures.pop(data[0])
 
-        if self._response_counters[data[0]] <= 0:
-            self._response_queues.pop(data[0])
+        if data[3]:
+            future.set_exception(data[1])
+        else:
+            future.set_result(data[1])
 
     def _proxy(self, method_name, *args, **kwargs):
         """
@@ -120,22 +178,80 @@ class ClusterProxy(object):
         :paramstr method_name: The method to proxy
         :param tuple args: The arguments to pass
         :param dict kwargs: The keyword arguments to pass
-        :rtype: :class:`rodario.future.Future`
-        :returns: A Future whose first value is the number of expected responses
+        :rtype: :class:`rodario.future.ClusterFuture`
+        :returns: A ClusterFuture whose first value is the number of members
+            the call reached (members that decline it send no result), or
+            (for a work queue) a Future whose value is the result
         """
 
         uuid = str(uuid4())
         data = (uuid, self.proxyid, method_name, args, kwargs,)
-        # fire off the method call to the original Actors over pubsub
-        count = self._redis.publish('cluster:%s' % self.channel,
-                                    pickle.dumps(data))
+        batch = getattr(self._batching, 'batch', None)
+
+        if self._queue:
+            future = Future()
+            # register the future first; the reply may beat send()
+            self._futures[uuid] = future
+            self._replies.expect(uuid, self._queue_handler)
+
+            if batch is not None:
+                batch.add('queue:%s' % self.channel, data, stream=True)
+            else:
+                # inline, so the payload lasts as long as the call waits
+                send(self._redis, 'queue:%s' % self.channel,
+                     encode(data, self._codec))
+
+            return future
+
+        future = ClusterFuture()
+
+        if batch is not None:
+            # the batch holds the lock while it publishes and counts
+            with self._lock:
+                self._replies.expect(uuid, self._handler)
+                self._futures[uuid] = future
+
+            batch.add('cluster:%s' % self.channel, data,
+                      lambda count: self._published(uuid, count))
+
+            return future
+
+        # hold the lock so replies can't be handled before they're expected
+        with self._lock:
+            self._replies.expect(uuid, self._handler)
+            # fire off the method call to the original Actors over pubsub
+            count = self._redis.publish('cluster:%s' % self.channel,
+                                        encode(data, self._codec,
+                                               self._redis))
+
+            if count == 0:
+                self._replies.forget(uuid)
+                raise EmptyClusterException()
+
+            self._futures[uuid] = future
+            self._response_counters[uuid] = count
+            self._recipients[uuid] = 0
+
+        return future
+
+    def _published(self, uuid, count):
+        """
+        Start counting the replies to a batched call (with the lock held).
+
+        :param str uuid: The call UUID
+        :param int count: The number of subscribers that received it
+        :rtype: :class:`callable`
+        :returns: For a call that reached nobody, a function that fails its
+            future, for the batch to call once the lock is released
+        """
 
         if count == 0:
-            raise EmptyClusterException()
+            self._replies.forget(uuid)
+
+            return partial(_fail, self._futures.pop(uuid),
+                           EmptyClusterException())
 
-        queue = Queue()
-        queue.put(count)
-        self._response_queues[uuid] = queue
         self._response_counters[uuid] = count
+        self._recipients[uuid] = 0
 
-        return Future(queue)
+        return None
@@ -2,15 +2,17 @@
 
 # stdlib
 import types
-import pickle
-from multiprocessing import Queue
-from threading import Thread
+from threading import local as thread_local
 from uuid import uuid4
-from time import sleep
 
 # local
 from rodario import get_redis_connection
+from rodario.batch import Batch
+from rodario.codecs import discard, encode, get_codec
+from rodario.dispatcher import Replies
 from rodario.future import Future
+from rodario.registry import Registry
+from rodario.streams import send
 from rodario.exceptions import InvalidActorException, InvalidProxyException
 
 
@@ -18,83 +20,172 @@ class ActorProxy(object):  # pylint: disable=R0903
 
     """ Proxy object that fires calls to an actor over redis pubsub """
 
-    def __init__(self, actor=None, uuid=None):
+    # pylint: disable=R0913
+    def __init__(self, actor=None, uuid=None, codec=None, local=False,
+                 copy=False, durable=None, lazy=False):
         """
         Initialize instance of ActorProxy.
 
         Accepts either an Actor object to clone or a UUID, but not both.
 
+        A proxy built from a UUID reads the Actor's interface from the
+        registry, and only asks the Actor itself if it didn't publish one. A
+        ``lazy`` proxy skips discovery altogether and resolves any public
+        attribute to a remote call.
+
+        Calls to the Actor's one-way methods return None, and no reply is
+        sent back. Any call can be made one-way through the ``oneway``
+        attribute of the proxied method, e.g. ``proxy.notify.oneway(value)``.
+
+        A ``local`` proxy for an Actor object hands calls straight to the
+        Actor's mailbox, skipping redis and serialization entirely; calls are
+        still serialized with the Actor's other calls and return Futures.
+
         :param rodario.actors.Actor actor: Actor to clone
         :param str uuid: UUID of Actor to clone
+        :param codec: Codec (or codec name) for method calls
+        :param bool local: Whether to call the Actor object directly
+        :param bool copy: Whether local calls deep-copy their arguments and
+            results
+        :param bool durable: Whether to send calls to the Actor's stream
+            mailbox, where they wait until the Actor reads them (defaults to
+            the Actor's ``durable`` attribute, or False when proxying by UUID)
+        :param bool lazy: Whether to skip discovering the Actor's methods
         """
 
         #: Redis connection
         self._redis = get_redis_connection()
-        #: Redis PubSub client
-        self._pubsub = None
-        #: This proxy object's UUID for creating unique channels
-        self.proxyid = str(uuid4())
-        #: Response queues for sandboxing method calls
-        self._response_queues = {}
+        #: Codec for method calls
+        self._codec = get_codec(codec)
+        #: Process-wide reply channel
+        self._replies = Replies()
+        #: UUID of the reply channel (shared by every proxy in the process)
+        self.proxyid = self._replies.proxyid
+        #: Pending futures for sandboxing method calls
+        self._futures = {}
+        #: Whether the Actor is known to live on this host
+        self._local = False
+        #: Actor to call directly, for local proxies
+        self._actor = None
+        #: Whether local calls deep-copy their arguments and results
+        self._copy = copy
+        #: Whether calls go to the Actor's stream mailbox
+        self._durable = bool(durable)
+        #: Whether any public attribute is proxied
+        self._lazy = False
+        #: Names of the Actor's one-way methods
+        self._oneway = frozenset()
+        #: The batch each thread has open, if any
+        self._batching = thread_local()
         # avoid cyclic import
         actor_module = __import__('rodario.actors', fromlist=('Actor',))
-        # pylint: disable=E1123
-        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
-        self._pubsub.subscribe(**{'proxy:%s' % self.proxyid: self._handler})
 
         methods = set()
 
-        def pubsub_thread():
-            """ Call get_message in loop to fire _handler. """
-
-            try:
-                while self._pubsub:
-                    self._pubsub.get_message()
-                    sleep(0.001)
-            except:  # pylint: disable=W0702
-                pass
-
-        # fire up the message handler thread as a daemon
-        proc = Thread(target=pubsub_thread)
-        proc.daemon = True
-        proc.start()
-
         if isinstance(actor, actor_module.Actor):
             # proxying an Actor directly
             self.uuid = actor.uuid
+            self._local = True
+
+            if durable is None:
+                self._durable = actor.durable
+
+            if local:
+                self._actor = actor
+
             methods = actor._get_methods()  # pylint: disable=W0212
+            self._oneway = actor._oneway  # pylint: disable=W0212
         elif isinstance(uuid, str):
-            # proxying by UUID; get actor methods over pubsub
             self.uuid = uuid
-            methods = self._proxy('_get_methods').get()
+            self._lazy = lazy
+
+            if not lazy:
+                interface = Registry().interface(uuid)
+
+                if interface is None:
+                    # no published interface; get actor methods over pubsub
+                    methods = self._proxy('_get_methods').get()
+                else:
+                    methods, self._oneway = interface
         else:
             raise InvalidProxyException('No actor or UUID provided')
 
-        def get_lambda(name):
-            """
-            Generate a lambda function to proxy the given method.
+        # create proxy methods for each public method of the original Actor
+        for name in methods:
+            setattr(self, name, types.MethodType(self._get_lambda(name), self))
 
-            :param str name: Name of the method to proxy
-            :rtype: :expression:`lambda`
-            """
+    def __getattr__(self, name):
+        """
+        Proxy unknown public attributes for lazy proxies.
 
-            return lambda _, *args, **kwargs: self._proxy(name, *args, **kwargs)
+        :param str name: Name of the attribute being requested
+        :rtype: instancemethod
+        """
 
-        # create proxy methods for each public method of the original Actor
-        for name in methods:
-            setattr(self, name, types.MethodType(get_lambda(name), self))
+        if name[0] == '_' or not self._lazy:
+            raise AttributeError(name)
 
-    def _handler(self, message):
+        method = types.MethodType(self._get_lambda(name), self)
+        # later lookups find it directly
+        setattr(self, name, method)
+
+        return method
+
+    def _get_lambda(self, name):
         """
-        Handle message response via Queue object.
+        Generate a lambda function to proxy the given method.
 
-        :param tuple message: The message to dissect
+        :param str name: Name of the method to proxy
+        :rtype: :expression:`lambda`
         """
 
-        # throw its value in the associated response queue
-        data = pickle.loads(message['data'])
-        self._response_queues[data[0]].put(data[1])
-        self._response_queues.pop(data[0])
+        if name in self._oneway:
+            proxied = lambda _, *args, **kwargs: \
+                self._tell(name, *args, **kwargs)
+        else:
+            proxied = lambda _, *args, **kwargs: \
+                self._proxy(name, *args, **kwargs)
+
+        # reachable through the bound method, e.g. proxy.method.oneway()
+        proxied.oneway = lambda *args, **kwargs: \
+            self._tell(name, *args, **kwargs)
+
+        return proxied
+
+    def batch(self, packed=False):
+        """
+        Buffer this proxy's calls and send them in a single round trip.
+
+        Use it as a context manager; calls made through the proxy on the
+        same thread inside the ``with`` block are sent when it ends. Calls
+        to an Actor that isn't listening fail their Futures with
+        :class:`rodario.exceptions.InvalidActorException` instead of raising.
+        Local calls are never buffered. An Actor method named ``batch`` hides
+        this one; use ``ActorProxy.batch(proxy)`` instead.
+
+        :param bool packed: Whether to send the calls as a single message,
+            which the Actor answers with a single reply
+        :rtype: :class:`rodario.batch.Batch`
+        """
+
+        return Batch(self._batching, self._redis, self._codec, self.proxyid,
+                     self._local, packed)
+
+    def _handler(self, data):
+        """
+        Handle message response via Future object.
+
+        :param tuple data: The decoded reply
+        """
+
+        # resolve the associated future with the value or exception
+        self._replies.forget(data[0])
+        future = self._futures.pop(data[0])
+
+        if data[3]:
+            future.set_exception(data[1])
+        else:
+            future.set_result(data[1])
 
     def _proxy(self, method_name, *args, **kwargs):
         """
@@ -107,19 +198,99 @@ class ActorProxy(object):  # pylint: disable=R0903
         :param str method_name: The method to proxy
         :param tuple args: The arguments to pass
         :param dict kwargs: The keyword arguments to pass
-        :rtype: :class:`multiprocessing.Queue`
+        :rtype: :class:`rodario.future.Future`
         """
 
-        # fire off the method call to the original Actor over pubsub
+        if self._actor is not None:
+            # pylint: disable=W0212
+            return self._actor._call(method_name, args, kwargs, self._copy)
+
+        # register the future first; the reply may beat publish()
         uuid = str(uuid4())
-        count = self._redis.publish('actor:%s' % self.uuid,
-                                    pickle.dumps((uuid, self.proxyid,
-                                                  method_name, args, kwargs,)))
+        future = Future()
+        self._futures[uuid] = future
+        self._replies.expect(uuid, self._handler)
+        self._send((uuid, self.proxyid, method_name, args, kwargs,))
+
+        return future
+
+    def _tell(self, method_name, *args, **kwargs):
+        """
+        Send a one-way method call, which is never replied to.
+
+        :param str method_name: The method to call
+        :param tuple args: The arguments to pass
+        :param dict kwargs: The keyword arguments to pass
+        """
+
+        if self._actor is not None:
+            # pylint: disable=W0212
+            self._actor._call(method_name, args, kwargs, self._copy, True)
+
+            return
+
+        self._send((None, None, method_name, args, kwargs,))
+
+    def _send(self, call):
+        """
+        Encode a method call and send it to the Actor (or add it to the
+        thread's open batch).
+
+        :param tuple call: The method call
+        """
+
+        batch = getattr(self._batching, 'batch', None)
+
+        if self._durable:
+            # the call waits in the mailbox, even if the Actor is down, so
+            # its payload goes inline rather than out-of-band, where it would
+            # expire
+            if batch is not None:
+                batch.add('mailbox:%s' % self.uuid, call, stream=True)
+            else:
+                send(self._redis, 'mailbox:%s' % self.uuid,
+                     encode(call, self._codec))
+
+            return
+
+        if batch is not None:
+            batch.add('actor:%s' % self.uuid, call,
+                      lambda count: self._sent(call[0], count, False))
+
+            return
+
+        # fire off the method call to the original Actor over pubsub
+        data = encode(call, self._codec, self._redis, self._local)
+        count = self._redis.publish('actor:%s' % self.uuid, data)
+
+        if not count:
+            discard(data)
+
+        self._sent(call[0], count)
+
+    def _sent(self, uuid, count, throw=True):
+        """
+        Check that a call reached the Actor.
+
+        :param str uuid: The call UUID (None for one-way calls)
+        :param int count: The number of subscribers that received it
+        :param bool throw: Whether to raise if it wasn't received, rather
+            than failing its Future
+        """
+
+        if count:
+            return
+
+        future = None
+
+        if uuid is not None:
+            self._replies.forget(uuid)
+            future = self._futures.pop(uuid, None)
 
-        if count == 0:
-            raise InvalidActorException('No such actor')
+        error = InvalidActorException('No such actor')
 
-        queue = Queue()
-        self._response_queues[uuid] = queue
+        if throw:
+            raise error
 
-        return Future(queue)
+        if future is not None:
+            future.set_exception(error)
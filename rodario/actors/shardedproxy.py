@@ -0,0 +1,208 @@
+""" Sharded cluster proxy for rodario framework """
+
+# stdlib
+import types
+from bisect import bisect
+from hashlib import blake2b
+from threading import Lock
+from time import monotonic
+from uuid import uuid4
+
+# local
+from rodario import get_redis_connection
+from rodario.codecs import encode, get_codec
+from rodario.dispatcher import Replies
+from rodario.future import Future
+from rodario.registry import Registry
+from rodario.exceptions import EmptyClusterException
+
+#: Points each member gets on the hash ring
+SHARD_REPLICAS = 100
+#: Seconds between refreshes of the cluster's membership
+SHARD_REFRESH = 5.0
+
+
+def _hash(value):
+    """
+    Hash a value onto the ring.
+
+    :param str value: The value to hash
+    :rtype: :class:`int`
+    """
+
+    return int.from_bytes(blake2b(value.encode('utf-8'),
+                                  digest_size=8).digest(), 'big')
+
+
+# pylint: disable=R0903
+class ShardedProxy(object):
+
+    """
+    Proxy object that routes each call to one cluster member by key
+
+    Members are the actors that joined the cluster channel (see
+    :meth:`rodario.actors.Actor.join`). Each member owns a share of a
+    consistent-hash ring, and a call goes straight to the ``actor:<uuid>``
+    channel of the member that owns its key: its first argument. The same
+    key goes to the same member for as long as the membership holds, so
+    members can keep per-key state; when members join or leave, only the
+    keys on the ring segments they take over (or give up) move.
+    """
+
+    def __init__(self, channel, codec=None, replicas=None, refresh=None):
+        """
+        Initialize instance of ShardedProxy.
+
+        :param str channel: The cluster channel to use
+        :param codec: Codec (or codec name) for method calls
+        :param int replicas: Points each member gets on the ring (defaults
+            to :data:`SHARD_REPLICAS`)
+        :param float refresh: Seconds between membership refreshes (defaults
+            to :data:`SHARD_REFRESH`)
+        """
+
+        #: Cluster channel
+        self.channel = channel
+        #: Redis connection
+        self._redis = get_redis_connection()
+        #: Codec for method calls
+        self._codec = get_codec(codec)
+        #: Process-wide reply channel
+        self._replies = Replies()
+        #: UUID of the reply channel (shared by every proxy in the process)
+        self.proxyid = self._replies.proxyid
+        #: Pending futures for sandboxing method calls
+        self._futures = {}
+        #: Points each member gets on the ring
+        self._replicas = SHARD_REPLICAS if replicas is None else replicas
+        #: Seconds between membership refreshes
+        self._refresh_interval = SHARD_REFRESH if refresh is None else refresh
+        #: When the membership was last refreshed
+        self._refreshed = None
+        #: Current members
+        self._members = frozenset()
+        #: Sorted hashes of the ring's points and the member owning each
+        self._ring = ((), ())
+        #: Lock guarding ring rebuilds
+        self._lock = Lock()
+
+    def __getattribute__(self, name):
+        """
+        Return transparent callables for everything and proxy the calls.
+
+        :param str name: Name of the attribute being requested
+        :rtype: lambda
+        """
+
+        def get_lambda(name):
+            """
+            Create a proxied callable.
+
+            :param str name: Name of the callable to wrap
+            :rtype: instancemethod
+            """
+
+            return lambda _, key, *args, **kwargs: \
+                self._proxy(name, key, *args, **kwargs)
+
+        try:
+            return object.__getattribute__(self, name)
+        except AttributeError:
+            return types.MethodType(get_lambda(name), self)
+
+    def _refresh(self, force=False):
+        """
+        Reload the cluster's members and rebuild the ring if they changed.
+
+        :param bool force: Whether to reload even if the ring is fresh
+        """
+
+        now = monotonic()
+
+        if (not force and self._refreshed is not None
+                and now - self._refreshed < self._refresh_interval):
+            return
+
+        members = frozenset(Registry().members(self.channel))
+
+        with self._lock:
+            self._refreshed = now
+
+            if members == self._members:
+                return
+
+            points = sorted((_hash('%s:%d' % (member, replica)), member)
+                            for member in members
+                            for replica in range(self._replicas))
+            self._ring = (tuple(point[0] for point in points),
+                          tuple(point[1] for point in points))
+            self._members = members
+
+    def _route(self, key):
+        """
+        Find the member that owns a key.
+
+        :param key: The key (hashed by its string form)
+        :rtype: :class:`str`
+        :returns: The UUID of the owning member
+        """
+
+        self._refresh()
+        hashes, owners = self._ring
+
+        if not hashes:
+            raise EmptyClusterException()
+
+        return owners[bisect(hashes, _hash(str(key))) % len(owners)]
+
+    def _proxy(self, method_name, key, *args, **kwargs):
+        """
+        Proxy a method call to the member that owns a key.
+
+        The key is passed to the method as its first argument.
+
+        :param str method_name: The method to proxy
+        :param key: The key to route by
+        :param tuple args: The other arguments to pass
+        :param dict kwargs: The keyword arguments to pass
+        :rtype: :class:`rodario.future.Future`
+        """
+
+        # a member that vanished without parting gets one chance: reload the
+        # members and try the key's new owner
+        for attempt in range(2):
+            member = self._route(key)
+            uuid = str(uuid4())
+            future = Future()
+            # register the future first; the reply may beat publish()
+            self._futures[uuid] = future
+            self._replies.expect(uuid, self._handler)
+            data = encode((uuid, self.proxyid, method_name,
+                           (key,) + args, kwargs,), self._codec, self._redis)
+            count = self._redis.publish('actor:%s' % member, data)
+
+            if count:
+                return future
+
+            self._replies.forget(uuid)
+            self._futures.pop(uuid)
+
+            if attempt == 0:
+                self._refresh(force=True)
+
+        raise EmptyClusterException('No member for key')
+
+    def _handler(self, data):
+        """
+        Handle message response via Future object.
+
+        :param tuple data: The decoded reply
+        """
+
+        self._replies.forget(data[0])
+        future = self._futures.pop(data[0])
+
+        if data[3]:
+            future.set_exception(data[1])
+        else:
+            future.set_result(data[1])
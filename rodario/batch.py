@@ -0,0 +1,190 @@
+""" Batched proxy calls for rodario framework """
+
+# stdlib
+from contextlib import nullcontext
+
+# local
+from rodario.codecs import discard, encode
+from rodario.streams import send
+
+#: Method name of a packed envelope of calls
+BATCH_METHOD = '_batch'
+
+
+class Batch(object):
+
+    """
+    Proxy calls buffered until the end of a ``with`` block
+
+    While a batch is open, the calls its proxy makes (on the same thread)
+    return their Futures as usual, but nothing is sent until the block ends;
+    then every call goes out in a single redis pipeline, in order. Calls that
+    turn out to have reached nobody fail their Futures instead of raising.
+
+    A ``packed`` batch also wraps the calls bound for each channel in one
+    envelope, so each actor receives, decodes and answers them as a single
+    message, and sends their replies back together.
+    """
+
+    # pylint: disable=R0913
+    def __init__(self, slot, redis, codec, proxyid, local=False,
+                 packed=False, lock=None):
+        """
+        Initialize the batch.
+
+        :param threading.local slot: The proxy's per-thread batch slot
+        :param redis.StrictRedis redis: The redis connection to use
+        :param rodario.codecs.Codec codec: Codec for method calls
+        :param str proxyid: ID of the reply channel
+        :param bool local: Whether the recipients live on this host
+        :param bool packed: Whether to pack each channel's calls together
+        :param threading.Lock lock: Lock to hold while the calls are sent
+            and their callbacks run
+        """
+
+        #: Whether each channel's calls are packed together
+        self.packed = packed
+        #: The proxy's per-thread batch slot
+        self._slot = slot
+        #: Redis connection
+        self._redis = redis
+        #: Codec for method calls
+        self._codec = codec
+        #: ID of the reply channel
+        self._proxyid = proxyid
+        #: Whether the recipients live on this host
+        self._local = local
+        #: Lock held while sending
+        self._lock = lock
+        #: Buffered calls: target, whether it is a stream, call, callback
+        self._calls = []
+        #: The batch this one is nested in, if any
+        self._outer = None
+
+    def __enter__(self):
+        """
+        Start buffering the proxy's calls.
+
+        :rtype: :class:`rodario.batch.Batch`
+        """
+
+        self._outer = getattr(self._slot, 'batch', None)
+        self._slot.batch = self
+
+        return self
+
+    def __exit__(self, *args):
+        """ Send the buffered calls. """
+
+        self._slot.batch = self._outer
+        self.execute()
+
+    def __len__(self):
+        """
+        Return the number of buffered calls.
+
+        :rtype: :class:`int`
+        """
+
+        return len(self._calls)
+
+    def add(self, target, call, callback=None, stream=False):
+        """
+        Buffer a call.
+
+        :param str target: The channel (or stream) to send it to
+        :param tuple call: The method call
+        :param callable callback: Called with the publish count (or, for a
+            stream, the entry ID) once the call is sent, while the batch's
+            lock is held; it may return a function to call once the lock is
+            released
+        :param bool stream: Whether ``target`` is a stream
+        """
+
+        self._calls.append((target, stream, call, callback))
+
+    def _groups(self, calls):
+        """
+        Group buffered calls into messages.
+
+        :param list calls: The buffered calls
+        :rtype: :class:`list`
+        :returns: The target, whether it is a stream, and the calls, for
+            each message
+        """
+
+        if not self.packed:
+            return [(target, stream, [(call, callback)])
+                    for target, stream, call, callback in calls]
+
+        groups = {}
+
+        # dicts keep insertion order, so channels go out in order of their
+        # first call
+        for target, stream, call, callback in calls:
+            groups.setdefault((target, stream), []).append((call, callback))
+
+        return [(target, stream, group)
+                for (target, stream), group in groups.items()]
+
+    def _envelope(self, calls):
+        """
+        Wrap calls in a single message.
+
+        :param list calls: The calls (and their callbacks)
+        :rtype: :class:`tuple`
+        """
+
+        if len(calls) == 1:
+            return calls[0][0]
+
+        # one-way calls need no reply channel
+        proxyid = (self._proxyid if any(call[0] is not None
+                                        for call, _ in calls) else None)
+
+        return (None, proxyid, BATCH_METHOD,
+                tuple(call for call, _ in calls), {},)
+
+    def execute(self):
+        """ Send the buffered calls in a single round trip. """
+
+        calls, self._calls = self._calls, []
+
+        if not calls:
+            return
+
+        groups = self._groups(calls)
+        pipe = self._redis.pipeline(transaction=False)
+        messages = []
+
+        for target, stream, group in groups:
+            # stream entries may wait longer than out-of-band payloads last
+            data = (encode(self._envelope(group), self._codec) if stream
+                    else encode(self._envelope(group), self._codec,
+                                self._redis, self._local))
+            messages.append(data)
+
+            if stream:
+                send(pipe, target, data)
+            else:
+                pipe.publish(target, data)
+
+        deferred = []
+
+        with self._lock if self._lock is not None else nullcontext():
+            results = pipe.execute()
+
+            for (_, stream, group), data, result in zip(groups, messages,
+                                                        results):
+                if not (stream or result):
+                    # reached nobody; free its shared memory
+                    discard(data)
+
+                for _, callback in group:
+                    if callback is not None:
+                        deferred.append(callback(result))
+
+        # e.g. completing Futures, whose callbacks may call the proxy again
+        for func in deferred:
+            if func is not None:
+                func()
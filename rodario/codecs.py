@@ -0,0 +1,852 @@
+""" Serialization codecs for rodario framework """
+
+# stdlib
+import pickle
+import struct
+import zlib
+from collections import OrderedDict
+from hashlib import blake2b
+from os import stat
+from socket import gethostname
+from threading import Lock, Timer
+from time import monotonic
+from uuid import uuid4
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:  # pragma: no cover
+    resource_tracker = shared_memory = None  # pylint: disable=C0103
+
+# 3rd party
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None  # pylint: disable=C0103
+
+try:
+    import lz4.frame as lz4
+except ImportError:  # pragma: no cover
+    lz4 = None  # pylint: disable=C0103
+
+# local
+from rodario.exceptions import (CodecException, PayloadLostException,
+                                RemoteException)
+
+#: Message header: codec ID, flags
+HEADER = struct.Struct('!BB')
+#: Name of the codec used when none is configured
+DEFAULT_CODEC = 'pickle'
+#: Header flag: the payload is zlib-compressed
+FLAG_ZLIB = 0x01
+#: Header flag: the payload is lz4-compressed
+FLAG_LZ4 = 0x02
+#: Payloads larger than this many bytes are compressed (None disables)
+COMPRESS_THRESHOLD = 64 * 1024
+#: Compression for large payloads: 'zlib' or 'lz4' (``lz4`` extra)
+COMPRESSION = 'zlib'
+#: Header flag: the payload is the name of a redis key holding it
+FLAG_KEY = 0x04
+#: Header flag: the payload names a shared memory block holding it
+FLAG_SHM = 0x08
+#: Payloads still larger than this many bytes after compression are sent
+#: out-of-band (None disables)
+OOB_THRESHOLD = 1024 * 1024
+#: Header flag: the payload is followed by a routing stub (see
+#: :func:`lost_call`)
+FLAG_STUB = 0x10
+#: Milliseconds an out-of-band payload stays in redis (or in shared memory,
+#: if it is never read)
+OOB_TTL = 60000
+#: Name of this host
+HOST = gethostname()
+#: Paths identifying the shared memory this process can reach: the kernel's
+#: boot ID and the device of the shared memory mount
+SHM_IDS = ('/proc/sys/kernel/random/boot_id', '/dev/shm')
+
+
+
+def _shm_domain():
+    """
+    Identify the shared memory this process can reach.
+
+    Containers (or machines) may share a host name without sharing memory,
+    so the host name is qualified with the kernel's boot ID and the device of
+    its shared memory mount, where they are available.
+
+    :rtype: :class:`str`
+    """
+
+    ids = []
+
+    try:
+        with open(SHM_IDS[0], 'rb') as boot_id:
+            ids.append(boot_id.read().strip())
+
+        ids.append(str(stat(SHM_IDS[1]).st_dev).encode('utf-8'))
+    except OSError:
+        # not Linux; fall back to the host name alone
+        return HOST
+
+    return '%s/%s' % (HOST,
+                      blake2b(b'/'.join(ids), digest_size=8).hexdigest())
+
+
+#: Identifies the shared memory this process can reach, for deciding when
+#: shared memory can be used
+SHM_DOMAIN = _shm_domain()
+
+_CODECS = {}
+#: Deadlines of the shared memory blocks this process created, by name
+_SHARED = OrderedDict()
+#: Lock guarding _SHARED and the sweeper
+_SHARED_LOCK = Lock()
+#: Timer that unlinks the blocks nobody read
+_SWEEPER = None
+
+
+class Codec(object):
+
+    """
+    Base serialization codec
+
+    Every message starts with a header recording the ID of the codec that
+    encoded it, so the receiver always knows how to decode it and can answer
+    in kind.
+    """
+
+    #: Unique ID recorded in message headers (1-15, which no pickle can
+    #: start with)
+    codec_id = None
+    #: Name used to select the codec
+    name = None
+
+    def dumps(self, obj):
+        """
+        Serialize an object.
+
+        :param mixed obj: The object to serialize
+        :rtype: :class:`bytes`
+        """
+
+        raise NotImplementedError()
+
+    def loads(self, data):
+        """
+        Deserialize an object.
+
+        :param bytes data: The serialized object
+        :rtype: mixed
+        """
+
+        raise NotImplementedError()
+
+
+class PickleCodec(Codec):
+
+    """ Codec using the highest available pickle protocol """
+
+    codec_id = 1
+    name = 'pickle'
+
+    def __init__(self, protocol=pickle.HIGHEST_PROTOCOL):
+        """
+        Initialize the codec.
+
+        :param int protocol: The pickle protocol to use
+        """
+
+        self.protocol = protocol
+
+    def dumps(self, obj):
+        """
+        Serialize an object.
+
+        :param mixed obj: The object to serialize
+        :rtype: :class:`bytes`
+        """
+
+        return pickle.dumps(obj, self.protocol)
+
+    def loads(self, data):
+        """
+        Deserialize an object.
+
+        :param bytes data: The serialized object
+        :rtype: mixed
+        """
+
+        return pickle.loads(data)
+
+
+class MsgpackCodec(Codec):
+
+    """
+    Codec using msgpack (requires the ``msgpack`` extra)
+
+    Only msgpack-native types survive the trip; tuples and sets arrive as
+    lists. Exceptions are sent as extension type 1 holding
+    ``[type name, message]`` and arrive as
+    :class:`rodario.exceptions.RemoteException`. Clients in other languages
+    can call actors with this codec.
+    """
+
+    codec_id = 2
+    name = 'msgpack'
+    #: msgpack extension type code for exceptions
+    EXCEPTION_TYPE = 1
+
+    @classmethod
+    def _default(cls, obj):
+        """
+        Encode types msgpack doesn't handle natively.
+
+        :param mixed obj: The object to encode
+        :rtype: :class:`msgpack.ExtType`
+        """
+
+        if isinstance(obj, BaseException):
+            if isinstance(obj, RemoteException):
+                info = list(obj.args[:2])
+            else:
+                info = [type(obj).__name__, str(obj)]
+
+            return msgpack.ExtType(cls.EXCEPTION_TYPE, msgpack.packb(info))
+
+        if isinstance(obj, (set, frozenset)):
+            return list(obj)
+
+        raise TypeError('Cannot serialize %r' % type(obj))
+
+    @classmethod
+    def _ext_hook(cls, code, data):
+        """
+        Decode extension types.
+
+        :param int code: The extension type code
+        :param bytes data: The extension payload
+        :rtype: mixed
+        """
+
+        if code == cls.EXCEPTION_TYPE:
+            return RemoteException(*msgpack.unpackb(data, raw=False))
+
+        return msgpack.ExtType(code, data)
+
+    def dumps(self, obj):
+        """
+        Serialize an object.
+
+        :param mixed obj: The object to serialize
+        :rtype: :class:`bytes`
+        """
+
+        if msgpack is None:
+            raise CodecException('msgpack is not installed')
+
+        return msgpack.packb(obj, default=self._default, use_bin_type=True)
+
+    def loads(self, data):
+        """
+        Deserialize an object.
+
+        :param bytes data: The serialized object
+        :rtype: mixed
+        """
+
+        if msgpack is None:
+            raise CodecException('msgpack is not installed')
+
+        return msgpack.unpackb(data, ext_hook=self._ext_hook, raw=False)
+
+
+def register_codec(codec):
+    """
+    Make a codec available by name and ID.
+
+    :param rodario.codecs.Codec codec: The codec to register
+    """
+
+    if not 0 < codec.codec_id < 16:
+        raise CodecException('Codec IDs must be between 1 and 15')
+
+    _CODECS[codec.codec_id] = codec
+    _CODECS[codec.name] = codec
+
+
+def get_codec(codec=None):
+    """
+    Look up a codec.
+
+    :param codec: A codec, the name or ID of a registered codec, or None for
+        the default codec
+    :rtype: :class:`rodario.codecs.Codec`
+    """
+
+    if isinstance(codec, Codec):
+        return codec
+
+    try:
+        return _CODECS[DEFAULT_CODEC if codec is None else codec]
+    except KeyError:
+        raise CodecException('Unknown codec: %r' % (codec,))
+
+
+def _compress(payload):
+    """
+    Compress a payload if it is over the size threshold.
+
+    :param bytes payload: The serialized payload
+    :rtype: :class:`tuple`
+    :returns: The header flags and the (possibly compressed) payload
+    """
+
+    if COMPRESS_THRESHOLD is None or len(payload) <= COMPRESS_THRESHOLD:
+        return 0, payload
+
+    if COMPRESSION == 'lz4':
+        if lz4 is None:
+            raise CodecException('lz4 is not installed')
+
+        flags, compressed = FLAG_LZ4, lz4.compress(payload)
+    elif COMPRESSION == 'zlib':
+        flags, compressed = FLAG_ZLIB, zlib.compress(payload, 1)
+    else:
+        raise CodecException('Unknown compression: %r' % (COMPRESSION,))
+
+    if len(compressed) >= len(payload):
+        # incompressible; don't make the receiver pay for nothing
+        return 0, payload
+
+    return flags, compressed
+
+
+def _decompress(flags, payload):
+    """
+    Decompress a payload according to its header flags.
+
+    :param int flags: The header flags
+    :param bytes payload: The payload
+    :rtype: :class:`bytes`
+    """
+
+    if flags & FLAG_ZLIB:
+        return zlib.decompress(payload)
+
+    if flags & FLAG_LZ4:
+        if lz4 is None:
+            raise CodecException('lz4 is not installed')
+
+        return lz4.decompress(payload)
+
+    return payload
+
+
+def _share(payload):
+    """
+    Copy a payload into a new shared memory block.
+
+    The block is handed off to the receiver, which unlinks it, so the
+    sender's resource tracker must not clean it up (or warn) at exit.
+
+    :param bytes payload: The payload
+    :rtype: :class:`bytes`
+    :returns: The handle for the block
+    """
+
+    try:
+        block = shared_memory.SharedMemory(create=True, size=len(payload),
+                                           track=False)
+    except TypeError:
+        # Python < 3.13
+        block = shared_memory.SharedMemory(create=True, size=len(payload))
+        # pylint: disable=W0212
+        resource_tracker.unregister(block._name, 'shared_memory')
+
+    try:
+        block.buf[:len(payload)] = payload
+    finally:
+        block.close()
+
+    _track(block.name)
+
+    return ('%s:%d' % (block.name, len(payload))).encode('utf-8')
+
+
+def _track(name):
+    """
+    Remember a shared memory block, so it is unlinked if nobody reads it.
+
+    :param str name: The block's name
+    """
+
+    global _SWEEPER  # pylint: disable=W0603
+
+    with _SHARED_LOCK:
+        _SHARED[name] = monotonic() + OOB_TTL / 1000.0
+
+        if _SWEEPER is None:
+            _SWEEPER = Timer(OOB_TTL / 1000.0, _sweep)
+            _SWEEPER.daemon = True
+            _SWEEPER.start()
+
+
+def _unlink(name):
+    """
+    Unlink a shared memory block, if it still exists.
+
+    :param str name: The block's name
+    """
+
+    with _SHARED_LOCK:
+        _SHARED.pop(name, None)
+
+    try:
+        block = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        # already read (and unlinked) by the receiver
+        return
+
+    block.close()
+
+    try:
+        block.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _sweep():
+    """ Unlink the shared memory blocks that have outlived OOB_TTL. """
+
+    global _SWEEPER  # pylint: disable=W0603
+
+    now = monotonic()
+    expired = []
+
+    with _SHARED_LOCK:
+        # blocks are tracked in order of their deadlines
+        while _SHARED:
+            name, deadline = next(iter(_SHARED.items()))
+
+            if deadline > now:
+                break
+
+            expired.append(name)
+            del _SHARED[name]
+
+        _SWEEPER = None
+
+        if _SHARED:
+            _SWEEPER = Timer(next(iter(_SHARED.values())) - now, _sweep)
+            _SWEEPER.daemon = True
+            _SWEEPER.start()
+
+    for name in expired:
+        _unlink(name)
+
+
+def _stub(obj):
+    """
+    Pick out what a receiver needs to answer a message if its out-of-band
+    payload is lost.
+
+    :param mixed obj: The message
+    :rtype: :class:`tuple`
+    :returns: A call's UUID and reply channel (and, for a packed batch, the
+        UUIDs of its calls); the UUID and fanout of each of a list of
+        replies, or of a single one; or None for anything else
+    """
+
+    # avoid cyclic import
+    batch_method = __import__('rodario.batch',
+                              fromlist=('BATCH_METHOD',)).BATCH_METHOD
+
+    if not isinstance(obj, tuple):
+        return None
+
+    if len(obj) == 2 and obj[0] is None:
+        return (None, tuple((reply[0], reply[2]) for reply in obj[1]))
+
+    if len(obj) != 5:
+        return None
+
+    if not isinstance(obj[2], str):
+        return (obj[0], obj[2])
+
+    if obj[2] == batch_method:
+        return (None, obj[1], tuple(call[0] for call in obj[3]))
+
+    return (obj[0], obj[1])
+
+
+def lost_call(ex, fanout=1):
+    """
+    Build the reply to a call whose payload was lost.
+
+    :param rodario.exceptions.PayloadLostException ex: The decoding error
+    :param int fanout: Number of local actors that shared the delivery
+    :rtype: :class:`tuple`
+    :returns: The caller's reply channel and the reply (or list of
+        replies), or None if nobody is waiting for one
+    """
+
+    stub = ex.stub
+
+    if stub is None or stub[1] is None:
+        return None
+
+    if stub[0] is not None:
+        return stub[1], (stub[0], ex, fanout, True, False)
+
+    replies = [(uuid, ex, fanout, True, False) for uuid in stub[2]
+               if uuid is not None]
+
+    return (stub[1], (None, replies)) if replies else None
+
+
+def lost_replies(ex):
+    """
+    Build failed replies in place of replies whose payload was lost.
+
+    :param rodario.exceptions.PayloadLostException ex: The decoding error
+    :rtype: :class:`list`
+    """
+
+    stub = ex.stub
+
+    if stub is None:
+        return []
+
+    if stub[0] is None:
+        return [(uuid, ex, fanout, True, False) for uuid, fanout in stub[1]]
+
+    return [(stub[0], ex, stub[1], True, False)]
+
+
+def discard(data):
+    """
+    Free the shared memory block of a message that reached nobody.
+
+    :param bytes data: The message
+    """
+
+    parsed = _parse(data)
+
+    if parsed is None or not parsed[1] & FLAG_SHM:
+        return
+
+    _unlink(bytes(_split(*parsed)[0]).decode('utf-8').rsplit(':', 1)[0])
+
+
+def _prepare(obj, codec, local):
+    """
+    Serialize and compress an object, sharing it in memory if appropriate.
+
+    :param mixed obj: The object to serialize
+    :param rodario.codecs.Codec codec: The codec to use
+    :param bool local: Whether the receiver is on this host
+    :rtype: :class:`tuple`
+    :returns: The codec, the header flags and the payload
+    """
+
+    codec = get_codec(codec)
+    flags, payload = _compress(codec.dumps(obj))
+
+    if OOB_THRESHOLD is not None and len(payload) > OOB_THRESHOLD:
+        if local and shared_memory is not None:
+            return codec, flags | FLAG_SHM, _share(payload)
+
+    return codec, flags, payload
+
+
+def _is_oversized(flags, payload):
+    """
+    Test whether a payload should go out-of-band through redis.
+
+    :param int flags: The header flags
+    :param bytes payload: The payload
+    :rtype: :class:`bool`
+    """
+
+    return (not flags & FLAG_SHM and OOB_THRESHOLD is not None
+            and len(payload) > OOB_THRESHOLD)
+
+
+def _attach(obj, codec, flags, handle):
+    """
+    Follow the handle of an out-of-band payload with a routing stub.
+
+    :param mixed obj: The message
+    :param rodario.codecs.Codec codec: The codec to use
+    :param int flags: The header flags
+    :param bytes handle: The handle
+    :rtype: :class:`tuple`
+    :returns: The header flags and the payload
+    """
+
+    stub = _stub(obj)
+
+    if stub is None:
+        return flags, handle
+
+    # handles never contain a NUL byte
+    return flags | FLAG_STUB, handle + b'\0' + codec.dumps(stub)
+
+
+def _split(codec, flags, payload):
+    """
+    Separate an out-of-band handle from its routing stub.
+
+    :param rodario.codecs.Codec codec: The codec to use
+    :param int flags: The header flags
+    :param bytes payload: The payload
+    :rtype: :class:`tuple`
+    :returns: The handle (or the payload itself) and the stub (or None)
+    """
+
+    if not flags & FLAG_STUB:
+        return payload, None
+
+    handle, stub = bytes(payload).split(b'\0', 1)
+
+    return handle, codec.loads(stub)
+
+
+def encode(obj, codec=None, redis=None, local=False):
+    """
+    Serialize an object into a message.
+
+    Payloads larger than :data:`COMPRESS_THRESHOLD` bytes are compressed
+    and flagged in the header. Payloads still larger than
+    :data:`OOB_THRESHOLD` bytes are sent out-of-band: through shared memory
+    when ``local`` is set (the one receiver is on this host), otherwise
+    through a redis key that expires after :data:`OOB_TTL` milliseconds.
+    Only the handle goes in the message.
+
+    :param mixed obj: The object to serialize
+    :param rodario.codecs.Codec codec: The codec to use
+    :param redis.StrictRedis redis: Connection for out-of-band payloads
+    :param bool local: Whether the (single) receiver is on this host
+    :rtype: :class:`bytes`
+    """
+
+    codec, flags, payload = _prepare(obj, codec, local)
+
+    if redis is not None and _is_oversized(flags, payload):
+        key = 'payload:%s' % uuid4()
+        redis.set(key, payload, px=OOB_TTL)
+        flags, payload = flags | FLAG_KEY, key.encode('utf-8')
+
+    if flags & (FLAG_KEY | FLAG_SHM):
+        flags, payload = _attach(obj, codec, flags, payload)
+
+    return HEADER.pack(codec.codec_id, flags) + payload
+
+
+async def encode_async(obj, codec=None, redis=None, local=False):
+    """
+    Serialize an object into a message with an asyncio redis connection.
+
+    See :func:`encode`.
+
+    :param mixed obj: The object to serialize
+    :param rodario.codecs.Codec codec: The codec to use
+    :param redis.asyncio.StrictRedis redis: Connection for out-of-band
+        payloads
+    :param bool local: Whether the (single) receiver is on this host
+    :rtype: :class:`bytes`
+    """
+
+    codec, flags, payload = _prepare(obj, codec, local)
+
+    if redis is not None and _is_oversized(flags, payload):
+        key = 'payload:%s' % uuid4()
+        await redis.set(key, payload, px=OOB_TTL)
+        flags, payload = flags | FLAG_KEY, key.encode('utf-8')
+
+    if flags & (FLAG_KEY | FLAG_SHM):
+        flags, payload = _attach(obj, codec, flags, payload)
+
+    return HEADER.pack(codec.codec_id, flags) + payload
+
+
+def _parse(data):
+    """
+    Split a message into its codec, header flags and payload.
+
+    :param bytes data: The message
+    :rtype: :class:`tuple`
+    :returns: The codec, flags and payload, or None for a raw pickle from an
+        older version
+    """
+
+    if data[0] not in _CODECS:
+        return None
+
+    # slice through a memoryview so large payloads aren't copied
+    return _CODECS[data[0]], data[1], memoryview(data)[HEADER.size:]
+
+
+def _load(codec, flags, payload, stub=None):
+    """
+    Decompress and deserialize a payload, reading it from shared memory if
+    it was shared.
+
+    :param rodario.codecs.Codec codec: The codec to use
+    :param int flags: The header flags
+    :param bytes payload: The payload (or shared memory handle)
+    :param tuple stub: The message's routing stub, if any
+    :rtype: mixed
+    """
+
+    if not flags & FLAG_SHM:
+        return codec.loads(_decompress(flags, payload))
+
+    name, size = bytes(payload).decode('utf-8').rsplit(':', 1)
+
+    with _SHARED_LOCK:
+        # read in the process that shared it; no need to sweep it
+        _SHARED.pop(name, None)
+
+    try:
+        block = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        # swept, or shared from memory this process can't reach
+        raise _lost('Shared payload %s is gone' % name, stub, codec)
+
+    try:
+        # read straight from the shared block; nothing is copied until the
+        # codec builds the result
+        view = block.buf[:int(size)]
+
+        try:
+            return codec.loads(_decompress(flags, view))
+        finally:
+            view.release()
+    finally:
+        block.close()
+
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            # swept while it was being read
+            pass
+
+
+def _lost(message, stub, codec):
+    """
+    Build the exception for an out-of-band payload that is gone.
+
+    :param str message: The error message
+    :param tuple stub: The message's routing stub, if any
+    :param rodario.codecs.Codec codec: The codec that encoded the message
+    :rtype: :class:`rodario.exceptions.PayloadLostException`
+    """
+
+    ex = PayloadLostException(message)
+    ex.stub = stub
+    ex.codec = codec
+
+    return ex
+
+
+def _missing(key, stub, codec):
+    """
+    Build the exception for an out-of-band payload that has expired.
+
+    :param bytes key: The redis key
+    :param tuple stub: The message's routing stub, if any
+    :param rodario.codecs.Codec codec: The codec that encoded the message
+    :rtype: :class:`rodario.exceptions.PayloadLostException`
+    """
+
+    return _lost('Out-of-band payload %s has expired'
+                 % bytes(key).decode('utf-8'), stub, codec)
+
+
+def decode(data, redis=None):
+    """
+    Deserialize a message.
+
+    Messages without a header (raw pickles from older versions) are still
+    accepted.
+
+    :param bytes data: The message
+    :param redis.StrictRedis redis: Connection for out-of-band payloads
+    :rtype: :class:`tuple`
+    :returns: The deserialized object and the codec that encoded it
+    """
+
+    parsed = _parse(data)
+
+    if parsed is None:
+        return pickle.loads(data), get_codec(PickleCodec.name)
+
+    codec, flags, payload = parsed
+    payload, stub = _split(codec, flags, payload)
+
+    if flags & FLAG_KEY:
+        key, payload = payload, redis.get(bytes(payload))
+
+        if payload is None:
+            raise _missing(key, stub, codec)
+
+    return _load(codec, flags, payload, stub), codec
+
+
+async def decode_async(data, redis=None):
+    """
+    Deserialize a message with an asyncio redis connection.
+
+    See :func:`decode`.
+
+    :param bytes data: The message
+    :param redis.asyncio.StrictRedis redis: Connection for out-of-band
+        payloads
+    :rtype: :class:`tuple`
+    :returns: The deserialized object and the codec that encoded it
+    """
+
+    parsed = _parse(data)
+
+    if parsed is None:
+        return pickle.loads(data), get_codec(PickleCodec.name)
+
+    codec, flags, payload = parsed
+    payload, stub = _split(codec, flags, payload)
+
+    if flags & FLAG_KEY:
+        key, payload = payload, await redis.get(bytes(payload))
+
+        if payload is None:
+            raise _missing(key, stub, codec)
+
+    return _load(codec, flags, payload, stub), codec
+
+
+def reply_channel_id():
+    """
+    Generate an ID for a reply channel.
+
+    The ID starts with :data:`SHM_DOMAIN`, so actors can tell when a reply
+    is bound for a process that shares their memory.
+
+    :rtype: :class:`str`
+    """
+
+    return '%s:%s' % (SHM_DOMAIN, uuid4())
+
+
+def is_local(proxyid):
+    """
+    Test whether a reply channel belongs to a process that shares this
+    process's memory.
+
+    :param str proxyid: The reply channel ID
+    :rtype: :class:`bool`
+    """
+
+    return proxyid.rpartition(':')[0] == SHM_DOMAIN
+
+
+register_codec(PickleCodec())
+register_codec(MsgpackCodec())
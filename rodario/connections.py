@@ -0,0 +1,117 @@
+""" Shared redis connection pools for rodario framework """
+
+# stdlib
+import asyncio
+from threading import Lock
+from weakref import WeakKeyDictionary
+
+# 3rd party
+import redis
+from redis import asyncio as aioredis
+
+#: URL of the redis server (``unix:///path/to/redis.sock`` for a unix socket)
+REDIS_URL = 'redis://localhost:6379/0'
+#: Most connections each pool opens (None for no limit)
+REDIS_MAX_CONNECTIONS = None
+#: Seconds to wait for a free connection once a pool is full (None to wait
+#: forever)
+REDIS_POOL_TIMEOUT = 20.0
+#: Seconds a connection may sit idle before it is checked with a PING (0 to
+#: never check)
+REDIS_HEALTH_CHECK_INTERVAL = 30
+
+#: Connection pools, by URL
+_POOLS = {}
+#: Asyncio clients (each with its own pool), by event loop and URL
+_ASYNC_CLIENTS = WeakKeyDictionary()
+#: Lock guarding the pools
+_LOCK = Lock()
+
+
+def _create_pool(module, url):
+    """
+    Create a connection pool with the configured limits.
+
+    :param module: The redis client module (:mod:`redis` or
+        :mod:`redis.asyncio`)
+    :param str url: The redis URL
+    :rtype: :class:`redis.ConnectionPool`
+    """
+
+    if REDIS_MAX_CONNECTIONS is None:
+        # redis-py caps pools at 100 connections unless told otherwise; every
+        # private pump holds one for as long as it runs
+        return module.ConnectionPool.from_url(
+            url, max_connections=2 ** 31,
+            health_check_interval=REDIS_HEALTH_CHECK_INTERVAL)
+
+    # a full pool makes callers wait for a connection instead of failing
+    return module.BlockingConnectionPool.from_url(
+        url, max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL)
+
+
+def get_pool(url=None):
+    """
+    Retrieve this process's connection pool for a redis URL.
+
+    Pools are created on first use, with the limits configured at the time;
+    a pool used by a process that forked is reset in the child.
+
+    :param str url: The redis URL (defaults to :data:`REDIS_URL`)
+    :rtype: :class:`redis.ConnectionPool`
+    """
+
+    url = REDIS_URL if url is None else url
+
+    with _LOCK:
+        pool = _POOLS.get(url)
+
+        if pool is None:
+            pool = _POOLS[url] = _create_pool(redis, url)
+
+    return pool
+
+
+def get_redis_connection(url=None):
+    """
+    Create a redis client that draws on the shared pool for a URL.
+
+    :param str url: The redis URL (defaults to :data:`REDIS_URL`)
+    :rtype: :class:`redis.StrictRedis`
+    """
+
+    return redis.StrictRedis(connection_pool=get_pool(url))
+
+
+def get_async_redis_connection(url=None):
+    """
+    Retrieve the asyncio redis client for a URL on the running event loop.
+
+    Asyncio connections belong to the event loop that opened them, so each
+    loop shares one client (and pool) per URL; rodario's asyncio objects
+    look theirs up when they use it rather than when they are created. A
+    client requested while no loop is running gets a pool of its own.
+
+    :param str url: The redis URL (defaults to :data:`REDIS_URL`)
+    :rtype: :class:`redis.asyncio.StrictRedis`
+    """
+
+    url = REDIS_URL if url is None else url
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return aioredis.StrictRedis(connection_pool=_create_pool(aioredis,
+                                                                 url))
+
+    with _LOCK:
+        clients = _ASYNC_CLIENTS.setdefault(loop, {})
+        client = clients.get(url)
+
+        if client is None:
+            client = clients[url] = aioredis.StrictRedis(
+                connection_pool=_create_pool(aioredis, url))
+
+    return client
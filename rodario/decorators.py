@@ -1,14 +1,57 @@
 """ Function decorators for rodario framework """
 
+# stdlib
+from threading import local
+from types import MethodType
+
 # local
-from rodario.util import acquire_lock
+from rodario.locks import RedisLock
 
 # pylint: disable=R0903,W0613
 
 
+class _Skip(object):
+
+    """ Marker for a call that was declined rather than answered """
+
+    def __repr__(self):
+        """ Represent the marker. """
+
+        return 'SKIP'
+
+#: Returned by a method (or before-hook) that declines a call, such as a
+#: :func:`singular` method that lost the race for its lock; cluster proxies
+#: don't count it as a result
+SKIP = _Skip()
+
+#: Callbacks deferred by the hooks of each running call, per thread
+_DEFERRED = local()
+
+
+def defer(callback):
+    """
+    Call a function once the decorated method call in progress is over.
+
+    Meant for hooks: a before-hook that acquires something can release it
+    here whether the method returns, raises, or is short-circuited by a
+    later hook. Callbacks run in reverse order of deferral.
+
+    :param callable callback: Called with no arguments
+    """
+
+    _DEFERRED.stack[-1].append(callback)
+
+
 class DecoratedMethod(object):
 
-    """ Generic decorated method """
+    """
+    Generic decorated method
+
+    The hooks and the function are compiled into a single callable, which
+    is bound to each instance on first access and cached in the instance's
+    ``__dict__``; later lookups find the bound method there directly. Every
+    instance (and thread) therefore calls with the right ``self``.
+    """
 
     #: Set of decorator tags
     decorations = set()
@@ -28,51 +71,115 @@ class DecoratedMethod(object):
         """
 
         self._func = func
-        self._instance = None
+        #: Attribute name the method is bound to (set by the owning class)
+        self._name = None
         self.decorations = set(
             decorations) if decorations is not None else set()
         self.before = list(before) if before is not None else list()
         self.after = list(after) if after is not None else list()
+        #: The hooks and function compiled into one callable
+        self._compiled = self._compile()
+
+    def __set_name__(self, owner, name):
+        """
+        Remember the attribute name, so bound methods can be cached under it.
+
+        :param type owner: The owning class
+        :param str name: The attribute name
+        """
+
+        self._name = name
 
     def __get__(self, obj, cls=None):
         """
-        Return the callable and store a reference to the class instance.
+        Return the callable bound to the class instance.
 
         :param object obj: The instance object
         :param type cls: The type of the object
-        :rtype: :class:`rodario.decorators.DecoratedMethod`
+        :rtype: :class:`types.MethodType`
         """
 
-        self._instance = obj
+        if obj is None:
+            return self
+
+        bound = MethodType(self._compiled, obj)
 
-        return self
+        if self._name is not None:
+            try:
+                # shadows this (non-data) descriptor from now on
+                obj.__dict__[self._name] = bound
+            except AttributeError:
+                # no instance __dict__ (__slots__); bind on every access
+                pass
+
+        return bound
 
     def __call__(self, *args, **kwargs):
         """
-        Call the wrapped function and map `self` to the stored instance.
+        Call the wrapped function; the instance is the first argument.
 
         :rtype: mixed
         """
 
-        result = None
+        return self._compiled(*args, **kwargs)
 
-        # call each of its before-hook bindings first
-        for callee in self.before:
-            result = callee(self._instance, *args, **kwargs)
+    def _compile(self):
+        """
+        Compile the hooks and the function into a single callable.
 
-            if result is not None:
-                return result
+        :rtype: function
+        """
+
+        func = self._func
+        before = tuple(self.before)
+        after = tuple(self.after)
 
-        result = self._func(self._instance, *args, **kwargs)
+        if not before and not after:
+            compiled = func
+        else:
+            def compiled(instance, *args, **kwargs):
+                """ Run the hooks and the wrapped function. """
 
-        # now call each of the after-hook bindings
-        for callee in self.after:
-            mutated = callee(self._instance, result, *args, **kwargs)
+                try:
+                    stack = _DEFERRED.stack
+                except AttributeError:
+                    stack = _DEFERRED.stack = []
 
-            if mutated is not None:
-                return mutated
+                deferred = []
+                stack.append(deferred)
 
-        return result
+                try:
+                    # call each of its before-hook bindings first
+                    for callee in before:
+                        result = callee(instance, *args, **kwargs)
+
+                        if result is not None:
+                            return result
+
+                    result = func(instance, *args, **kwargs)
+
+                    # now call each of the after-hook bindings
+                    for callee in after:
+                        mutated = callee(instance, result, *args, **kwargs)
+
+                        if mutated is not None:
+                            return mutated
+
+                    return result
+                finally:
+                    stack.pop()
+
+                    for callback in reversed(deferred):
+                        callback()
+
+            compiled.__name__ = getattr(func, '__name__', 'compiled')
+            compiled.__doc__ = getattr(func, '__doc__', None)
+
+        # let bound methods (which forward attribute lookups to their
+        # function) report the decorations too
+        compiled.decorations = self.decorations
+
+        return compiled
 
     @staticmethod
     def decorate(func, decorations=None, before=None, after=None):
@@ -94,43 +201,77 @@ class DecoratedMethod(object):
                 func.before += list(before)
             if after is not None:
                 func.after += list(after)
+
+            # hooks must be in place before the method is first bound
+            func._compiled = func._compile()  # pylint: disable=W0212
         else:
             func = DecoratedMethod(func, decorations, before, after)
 
         return func
 
 
-def singular(func):
+def singular(func=None, context=None, expiry=None, renew=True):
     """
-    First-come, first-served cluster channel call. Needs some work; should
-    accept parameters for context and expiry.
+    First-come, first-served cluster channel call. Whichever member takes
+    the method's lock runs it; the others decline the call with
+    :data:`SKIP`. May be used bare (``@singular``) or with parameters
+    (``@singular(context='jobs', expiry=0.5)``).
 
     :param function func: The function to wrap
+    :param str context: The context to apply to the lock name
+    :param float expiry: The duration of the lock (in seconds)
+    :param bool renew: Whether to keep extending the lock while the method
+        runs
     :rtype: :class:`rodario.decorators.DecoratedMethod`
     """
 
-    context = None
+    if func is None:
+        return lambda func: singular(func, context, expiry, renew)
+
+    name = func.__name__
 
     def before_singular(self, *args, **kwargs):
         """
         Call the method if we can get a lock.
 
         :rtype: mixed
-        :returns: None if a lock is acquired; otherwise, False.
+        :returns: None if a lock is acquired; otherwise, :data:`SKIP`.
         """
 
         # pylint: disable=W0212
-        if not acquire_lock(func.__name__, conn=self._redis):
-            return False
+        lock = RedisLock(name, expiry, context, self._redis, renew)
 
-    def after_singular(self, result, *args, **kwargs):
-        """
-        Clean up the lock.
-        """
+        if not lock.acquire():
+            return SKIP
+
+        # release it (if it's still ours) however the call ends
+        defer(lock.release)
+
+    return DecoratedMethod.decorate(func, ('singular',), (before_singular,))
 
-        lock_context = 'global.lock' if not context else context
-        lock_name = '%s:%s' % (lock_context, func.__name__)
-        self._redis.delete(lock_name)  # pylint: disable=W0212
 
-    return DecoratedMethod.decorate(func, ('singular',), (before_singular,),
-                                    (after_singular,))
+def concurrent(func):
+    """
+    Allow calls to this method to run alongside the Actor's other calls when
+    the Actor has a worker pool. Methods without this decoration run one at a
+    time, in the order they were received.
+
+    :param function func: The function to wrap
+    :rtype: :class:`rodario.decorators.DecoratedMethod`
+    """
+
+    return DecoratedMethod.decorate(func, ('concurrent',))
+
+
+def oneway(func):
+    """
+    Mark this method as one-way: proxies that know the Actor's interface
+    call it without waiting for a reply, so they return None instead of a
+    Future and the Actor publishes nothing back. Exceptions it raises are
+    logged by the Actor.
+
+    :param function func: The function to wrap
+    :rtype: :class:`rodario.decorators.DecoratedMethod`
+    """
+
+    return DecoratedMethod.decorate(func, ('oneway',))
@@ -0,0 +1,324 @@
+""" Shared pubsub dispatchers for rodario framework """
+
+# stdlib
+import logging
+from os import getpid
+from threading import Lock
+from zlib import crc32
+
+# local
+from rodario import get_redis_connection
+from rodario.codecs import decode, lost_replies, reply_channel_id
+from rodario.exceptions import PayloadLostException
+from rodario.pump import MessagePump
+
+#: Default number of pubsub connections the dispatcher spreads channels over
+DISPATCHER_SHARDS = 1
+
+LOGGER = logging.getLogger(__name__)
+
+
+# pylint: disable=C1001
+class _DispatcherSingleton(object):
+
+    """
+    Process-wide pubsub dispatcher
+
+    Every channel subscribed through the dispatcher shares a small, fixed set
+    of pubsub connections (one :class:`rodario.pump.MessagePump` per shard).
+    Each message is routed to all of the local handlers subscribed to its
+    channel, so any number of actors can share a connection and a thread.
+    """
+
+    def __init__(self, shards=None, timeout=None):
+        """
+        Initialize the dispatcher.
+
+        :param int shards: Number of pubsub connections to use
+        :param float timeout: Seconds each pump blocks per read
+        """
+
+        redis = get_redis_connection()
+        shards = DISPATCHER_SHARDS if shards is None else shards
+        #: Message pumps, one per shard
+        self._pumps = tuple(MessagePump(redis, timeout)
+                            for _ in range(max(1, shards)))
+        #: Local handlers for each subscribed channel
+        self._handlers = {}
+        #: Lock for subscription changes
+        self._lock = Lock()
+
+    def _get_pump(self, channel):
+        """
+        Return the pump responsible for the given channel.
+
+        :param str channel: The channel name
+        :rtype: :class:`rodario.pump.MessagePump`
+        """
+
+        index = crc32(channel.encode('utf-8')) % len(self._pumps)
+
+        return self._pumps[index]
+
+    def _route(self, message):
+        """
+        Hand a message to every local handler subscribed to its channel.
+
+        The number of handlers that received the message is recorded in the
+        message's ``fanout`` key, since redis only counts the connection.
+
+        :param dict message: The pubsub message
+        """
+
+        channel = message['channel']
+
+        if isinstance(channel, bytes):
+            channel = channel.decode('utf-8')
+
+        handlers = self._handlers.get(channel, ())
+        message['fanout'] = len(handlers)
+
+        for handler in handlers:
+            try:
+                handler(message)
+            except Exception:  # pylint: disable=W0703
+                # one misbehaving handler must not kill a shared pump
+                LOGGER.exception('Unhandled error in handler for %s',
+                                 channel)
+
+    @property
+    def channels(self):
+        """
+        Retrieve the set of channels currently subscribed.
+
+        :rtype: :class:`set`
+        """
+
+        return set(self._handlers)
+
+    def is_serving(self, channel):
+        """
+        Return True if the channel is subscribed and its pump is running.
+
+        :param str channel: The channel name
+        :rtype: :class:`bool`
+        """
+
+        return channel in self._handlers and self._get_pump(channel).is_alive
+
+    def subscribe(self, **handlers):
+        """
+        Subscribe handlers to channels, starting pumps as needed.
+
+        New channels are subscribed with a single command per pump, however
+        many are given.
+
+        :param dict handlers: Mapping of channel names to handler functions
+        """
+
+        with self._lock:
+            added = {}
+
+            for channel, handler in handlers.items():
+                current = self._handlers.get(channel, ())
+
+                if handler in current:
+                    continue
+
+                # copy on write so _route can iterate without the lock
+                self._handlers[channel] = current + (handler,)
+
+                if not current:
+                    added.setdefault(self._get_pump(channel), {})[channel] = \
+                        self._route
+
+            for pump, channels in added.items():
+                pump.subscribe(**channels)
+                pump.start()
+
+    def unsubscribe(self, *channels, **handlers):
+        """
+        Unsubscribe handlers from channels.
+
+        Channels given positionally lose all of their local handlers; those
+        given as keywords lose only the handler they map to (none, if it is
+        None). A channel is unsubscribed from redis once it has no local
+        handlers left.
+
+        :param tuple channels: Channel names to remove entirely
+        :param dict handlers: Mapping of channel names to handlers to remove
+        """
+
+        with self._lock:
+            removals = [(channel, None) for channel in channels]
+            removals.extend((channel, handler)
+                            for channel, handler in handlers.items()
+                            if handler is not None)
+
+            for channel, handler in removals:
+                current = self._handlers.get(channel, ())
+                remaining = tuple(callee for callee in current
+                                  if handler is not None
+                                  and callee != handler)
+
+                if remaining:
+                    self._handlers[channel] = remaining
+                elif current:
+                    del self._handlers[channel]
+                    self._get_pump(channel).unsubscribe(channel)
+
+    def stop(self):
+        """ Stop all of the dispatcher's pumps. """
+
+        for pump in self._pumps:
+            pump.stop()
+
+
+# pylint: disable=R0903
+class Dispatcher(object):
+
+    """ Shared pubsub dispatcher class (singleton wrapper) """
+
+    _instance = None
+
+    def __new__(cls, shards=None, timeout=None):
+        """
+        Retrieve the singleton instance for Dispatcher.
+
+        The parameters only take effect on the first call in a process.
+
+        :param int shards: Number of pubsub connections to use
+        :param float timeout: Seconds each pump blocks per read
+        :rtype: :class:`rodario.dispatcher._DispatcherSingleton`
+        """
+
+        if not cls._instance:
+            cls._instance = _DispatcherSingleton(shards=shards,
+                                                 timeout=timeout)
+
+        return cls._instance
+
+
+# pylint: disable=C1001
+class _RepliesSingleton(object):
+
+    """
+    Process-wide reply channel for proxied method calls
+
+    Every proxy in the process shares a single ``proxy:<proxyid>`` channel
+    and a single pump thread; replies are routed to their callers by call
+    UUID. The pump is kept apart from the actor Dispatcher so an actor that
+    waits on a proxied call never blocks the thread delivering its reply.
+    """
+
+    def __init__(self, timeout=None):
+        """
+        Initialize the reply channel and start listening.
+
+        :param float timeout: Seconds the pump blocks per read
+        """
+
+        #: Redis connection (for out-of-band payloads)
+        self._redis = get_redis_connection()
+        #: ID of this process's reply channel (prefixed with the host name)
+        self.proxyid = reply_channel_id()
+        #: ID of the process that owns the channel
+        self.pid = getpid()
+        #: Callbacks awaiting replies, by call UUID
+        self._callbacks = {}
+        #: Message pump for the reply channel
+        self._pump = MessagePump(self._redis, timeout)
+        self._pump.subscribe(**{'proxy:%s' % self.proxyid: self._route})
+        self._pump.start()
+
+    def _route(self, message):
+        """
+        Hand a reply to the callback waiting on its call UUID.
+
+        :param dict message: The pubsub message
+        """
+
+        try:
+            data = decode(message['data'], self._redis)[0]
+        except PayloadLostException as ex:
+            # e.g. an out-of-band payload that expired before it was read;
+            # fail the calls rather than leave their callers waiting
+            LOGGER.exception('Unable to decode reply')
+
+            for reply in lost_replies(ex):
+                self._deliver(reply)
+
+            return
+        except Exception:  # pylint: disable=W0703
+            LOGGER.exception('Unable to decode reply')
+            return
+
+        if data[0] is None:
+            # the replies to a packed batch of calls
+            for reply in data[1]:
+                self._deliver(reply)
+        else:
+            self._deliver(data)
+
+    def _deliver(self, data):
+        """
+        Hand a decoded reply to the callback waiting on its call UUID.
+
+        :param tuple data: The decoded reply
+        """
+
+        callback = self._callbacks.get(data[0])
+
+        if callback is None:
+            # nobody is waiting (anymore); drop it
+            return
+
+        try:
+            callback(data)
+        except Exception:  # pylint: disable=W0703
+            LOGGER.exception('Unhandled error in reply callback for %s',
+                             data[0])
+
+    def expect(self, uuid, callback):
+        """
+        Register a callback for replies to the given call.
+
+        :param str uuid: The call UUID
+        :param callable callback: Called with each decoded reply tuple
+        """
+
+        self._callbacks[uuid] = callback
+
+    def forget(self, uuid):
+        """
+        Stop routing replies for the given call.
+
+        :param str uuid: The call UUID
+        """
+
+        self._callbacks.pop(uuid, None)
+
+
+# pylint: disable=R0903
+class Replies(object):
+
+    """ Shared reply channel class (singleton wrapper) """
+
+    _instance = None
+
+    def __new__(cls, timeout=None):
+        """
+        Retrieve the singleton instance for Replies.
+
+        A forked child gets its own channel, since the parent's pump thread
+        does not survive the fork.
+
+        :param float timeout: Seconds the pump blocks per read (first call
+            only)
+        :rtype: :class:`rodario.dispatcher._RepliesSingleton`
+        """
+
+        if not cls._instance or cls._instance.pid != getpid():
+            cls._instance = _RepliesSingleton(timeout=timeout)
+
+        return cls._instance
@@ -1,5 +1,8 @@
 """ Exceptions for rodario framework """
 
+# stdlib
+from queue import Empty
+
 
 class InvalidActorException(Exception):
 
@@ -33,3 +36,49 @@ class EmptyClusterException(Exception):
     """ Raised when a message is passed to an empty cluster channel """
 
     pass
+
+
+class FutureTimeoutException(Empty):
+
+    """ Raised when a Future's value does not arrive in time """
+
+    pass
+
+
+class CodecException(Exception):
+
+    """ Raised when a codec is unknown or unavailable """
+
+    pass
+
+
+class PayloadLostException(CodecException):
+
+    """
+    Raised when an out-of-band payload is gone before it is read
+
+    Its ``stub`` attribute holds what the message carried inline to route
+    an answer (see :func:`rodario.codecs.lost_call`), or None, and its
+    ``codec`` attribute the codec that encoded the message.
+    """
+
+    pass
+
+
+class UnknownMethodException(AttributeError):
+
+    """ Raised when a call names a method the actor does not expose """
+
+    pass
+
+
+class RemoteException(Exception):
+
+    """
+    Raised in place of a remote exception that could not be sent as-is
+
+    Its arguments are the name of the original exception type and its
+    message.
+    """
+
+    pass
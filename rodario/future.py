@@ -1,18 +1,35 @@
 """ Future response type for rodario framework """
 
+# stdlib
+from collections import deque
+from threading import Condition
+from time import monotonic
+
+# local
+from rodario.exceptions import FutureTimeoutException
+
 
 class Future(object):
 
-    """ Custom response type for proxied method calls """
+    """
+    Custom response type for proxied method calls
 
-    def __init__(self, queue):
-        """
-        Initialize the Future by saving a reference to the Queue
+    Values are handed out in the order they arrive. Once the future is done,
+    its final value is kept, so every later :meth:`get` returns (or raises)
+    the same outcome.
+    """
 
-        :param multiprocessing.Queue queue: The response queue to wrap
-        """
+    def __init__(self):
+        """ Initialize the Future. """
 
-        self._queue = queue
+        #: Condition guarding the pending values
+        self._condition = Condition()
+        #: Pending ``(value, failed)`` pairs
+        self._values = deque()
+        #: Whether the final value has arrived
+        self._done = False
+        #: Functions to call once the future is done
+        self._callbacks = []
 
     @property
     def ready(self):
@@ -22,13 +39,339 @@ class Future(object):
         :rtype: :class:`bool`
         """
 
-        return not self._queue.empty()
+        return len(self._values) > 0
+
+    @property
+    def done(self):
+        """
+        Return True if the final response value has arrived.
+
+        :rtype: :class:`bool`
+        """
+
+        return self._done
+
+    def _push(self, value, failed, final):
+        """
+        Append a value and wake up any waiters.
+
+        :param mixed value: The value (or exception) to append
+        :param bool failed: Whether ``value`` is an exception to raise
+        :param bool final: Whether this completes the future
+        """
+
+        with self._condition:
+            if self._done:
+                return
+
+            self._values.append((value, failed))
+            self._done = final
+            self._condition.notify_all()
+            callbacks = self._callbacks if final else ()
+
+        for callback in callbacks:
+            callback(self)
+
+    def put(self, value):
+        """
+        Append an intermediate value without completing the future.
+
+        :param mixed value: The value to append
+        """
+
+        self._push(value, False, False)
+
+    def put_exception(self, exception):
+        """
+        Append an intermediate exception without completing the future.
+
+        :param Exception exception: The exception for :meth:`get` to raise
+        """
+
+        self._push(exception, True, False)
+
+    def set_result(self, value):
+        """
+        Complete the future with a value.
+
+        :param mixed value: The final value
+        """
+
+        self._push(value, False, True)
+
+    def set_exception(self, exception):
+        """
+        Complete the future with an exception, raised by :meth:`get`.
 
-    def get(self, *args, **kwargs):
+        :param Exception exception: The exception to raise
+        """
+
+        self._push(exception, True, True)
+
+    def add_done_callback(self, callback):
+        """
+        Call a function with this future once it is done.
+
+        The function is called right away if the future is already done.
+
+        :param callable callback: The function to call
+        """
+
+        with self._condition:
+            if not self._done:
+                self._callbacks.append(callback)
+
+                return
+
+        callback(self)
+
+    def get(self, block=True, timeout=None):
         """
         Resolve and return the proxied method call's value.
 
+        :param bool block: Whether to wait for a value
+        :param float timeout: Seconds to wait before giving up
         :rtype: mixed
+        :raises rodario.exceptions.FutureTimeoutException: If no value
+            arrives in time
+        """
+
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._values,
+                                            timeout if block else 0):
+                raise FutureTimeoutException()
+
+            if self._done and len(self._values) == 1:
+                value, failed = self._values[0]
+            else:
+                value, failed = self._values.popleft()
+
+        if failed:
+            raise value
+
+        return value
+
+
+class ClusterFuture(Future):
+
+    """
+    Response type for calls broadcast to a cluster
+
+    As a plain :class:`Future`, the first :meth:`get` returns the number of
+    members the call reached, once every one of them has answered, and each
+    later one returns the next result; the future is done once the call is
+    complete, so the last one is kept.
+    The gathering methods (:meth:`as_completed`, :meth:`gather` and
+    :meth:`reduce`) read the results independently of :meth:`get`, in the
+    order they arrive, and can stop early at a quorum or a deadline. Members
+    that decline a call (e.g. by losing a :func:`rodario.decorators.singular`
+    lock) send no result.
+    """
+
+    def __init__(self):
+        """ Initialize the ClusterFuture. """
+
+        super(ClusterFuture, self).__init__()
+        #: Every ``(value, failed)`` pair received, in arrival order
+        self._results = []
+        #: Whether every member has answered
+        self._complete = False
+
+    @property
+    def complete(self):
         """
+        Return True if every member the call reached has answered.
+
+        :rtype: :class:`bool`
+        """
+
+        return self._complete
+
+    @property
+    def ready(self):
+        """
+        Return True if :meth:`get` has a value to return right away.
+
+        :rtype: :class:`bool`
+        """
+
+        return (self._complete or self._done) and len(self._values) > 0
+
+    @property
+    def results(self):
+        """
+        Retrieve the successful results received so far.
+
+        :rtype: :class:`list`
+        """
+
+        with self._condition:
+            return [value for value, failed in self._results if not failed]
+
+    def add_result(self, value):
+        """
+        Record a member's result.
+
+        :param mixed value: The result
+        """
+
+        with self._condition:
+            self._results.append((value, False))
+
+        self.put(value)
+
+    def add_exception(self, exception):
+        """
+        Record a member's exception.
+
+        :param Exception exception: The exception
+        """
+
+        with self._condition:
+            self._results.append((exception, True))
+
+        self.put_exception(exception)
+
+    def get(self, block=True, timeout=None):
+        """
+        Resolve and return the next value, once every member has answered.
+
+        :param bool block: Whether to wait for a value
+        :param float timeout: Seconds to wait before giving up
+        :rtype: mixed
+        :raises rodario.exceptions.FutureTimeoutException: If the members
+            don't all answer in time
+        """
+
+        deadline = None if timeout is None else monotonic() + timeout
+
+        with self._condition:
+            if not self._condition.wait_for(
+                    lambda: self._complete or self._done,
+                    timeout if block else 0):
+                raise FutureTimeoutException()
+
+        # the rest of the timeout, not all of it again
+        remaining = (None if deadline is None
+                     else max(0, deadline - monotonic()))
+
+        return super(ClusterFuture, self).get(block, remaining)
+
+    def finish(self, recipients=None):
+        """
+        Mark the call complete; no more results will arrive.
+
+        This also completes the future, running its done callbacks, unless
+        it was already completed (e.g. by :meth:`set_exception`).
+
+        :param int recipients: Number of members the call reached, for the
+            first :meth:`get` (defaults to the number of results)
+        """
+
+        with self._condition:
+            callbacks = () if self._done else self._callbacks
+
+            if not (self._complete or self._done):
+                # the count goes ahead of the results it describes
+                self._values.appendleft(
+                    (len(self._results) if recipients is None
+                     else recipients, False))
+
+            self._complete = True
+            self._done = True
+            self._condition.notify_all()
+
+        for callback in callbacks:
+            callback(self)
+
+    def as_completed(self, timeout=None, return_exceptions=False):
+        """
+        Iterate over results as they arrive.
+
+        Iteration ends once every member has answered or ``timeout`` seconds
+        have passed, whichever comes first; check :attr:`complete` to tell
+        the two apart.
+
+        :param float timeout: Seconds to wait for all of the results
+        :param bool return_exceptions: Whether to yield members' exceptions
+            instead of raising them
+        :rtype: generator
+        """
+
+        deadline = None if timeout is None else monotonic() + timeout
+        index = 0
+
+        while True:
+            with self._condition:
+                while index >= len(self._results) and not self._complete:
+                    remaining = (None if deadline is None
+                                 else deadline - monotonic())
+
+                    if remaining is not None and remaining <= 0:
+                        return
+
+                    self._condition.wait(remaining)
+
+                if index >= len(self._results):
+                    return
+
+                value, failed = self._results[index]
+
+            index += 1
+
+            if failed and not return_exceptions:
+                raise value
+
+            yield value
+
+    def gather(self, quorum=None, timeout=None, return_exceptions=False):
+        """
+        Collect results until enough have arrived.
+
+        :param int quorum: Number of results to stop at (defaults to all)
+        :param float timeout: Seconds to wait before returning the results
+            received so far
+        :param bool return_exceptions: Whether to collect members'
+            exceptions (they count toward the quorum) instead of raising
+            them
+        :rtype: :class:`list`
+        """
+
+        results = []
+
+        for value in self.as_completed(timeout, return_exceptions):
+            results.append(value)
+
+            if quorum is not None and len(results) >= quorum:
+                break
+
+        return results
+
+    # pylint: disable=R0913
+    def reduce(self, func, initial=None, quorum=None, timeout=None,
+               return_exceptions=False):
+        """
+        Fold results into a single value as they arrive.
+
+        :param callable func: Called with the running value and the next
+            result; returns the new running value
+        :param mixed initial: The starting value
+        :param int quorum: Number of results to stop at (defaults to all)
+        :param float timeout: Seconds to wait before returning the value
+            folded so far
+        :param bool return_exceptions: Whether to fold members' exceptions
+            in as results instead of raising them
+        :rtype: mixed
+        """
+
+        value = initial
+        count = 0
+
+        for result in self.as_completed(timeout, return_exceptions):
+            value = func(value, result)
+            count += 1
+
+            if quorum is not None and count >= quorum:
+                break
 
-        return self._queue.get(*args, **kwargs)
+        return value
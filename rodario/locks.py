@@ -0,0 +1,301 @@
+""" Distributed locks for rodario framework """
+
+# stdlib
+from collections import Counter, defaultdict
+from threading import Condition, Lock, Thread
+from time import monotonic, time
+from uuid import uuid4
+
+# local
+from rodario import get_redis_connection
+
+#: Default lock duration (in seconds)
+LOCK_EXPIRY = 3
+#: Default lock context (prefix for lock names)
+LOCK_CONTEXT = 'global.lock'
+#: Counters by lock name: ``acquired``, ``contended``, ``released``,
+#: ``renewed`` and ``lost`` (released or renewed after being taken over)
+LOCK_STATS = defaultdict(Counter)
+
+#: Lock guarding LOCK_STATS
+_STATS_LOCK = Lock()
+
+# Take the lock if it's free. Locks left without a TTL by older versions
+# (whose value is the time they expire) are taken over once stale.
+_ACQUIRE = """
+if redis.call('set', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+if redis.call('pttl', KEYS[1]) == -1 then
+    local expires = tonumber(redis.call('get', KEYS[1]))
+    if expires == nil or expires < tonumber(ARGV[3]) then
+        redis.call('set', KEYS[1], ARGV[1], 'PX', ARGV[2])
+        return 1
+    end
+end
+return 0
+"""
+
+# Delete the lock, but only if we still hold it.
+_RELEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Extend the lock, but only if we still hold it.
+_RENEW = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+#: Registered scripts, by source
+_SCRIPTS = {}
+
+
+def _count(name, event):
+    """
+    Increment a lock counter.
+
+    :param str name: The full lock name
+    :param str event: The counter to increment
+    """
+
+    with _STATS_LOCK:
+        LOCK_STATS[name][event] += 1
+
+
+def _run(redis, source, keys, args):
+    """
+    Run a lua script (by SHA after the first call).
+
+    :param redis.StrictRedis redis: The redis connection to use
+    :param str source: The script
+    :param list keys: The keys to pass
+    :param list args: The arguments to pass
+    :rtype: mixed
+    """
+
+    script = _SCRIPTS.get(source)
+
+    if script is None:
+        script = _SCRIPTS[source] = redis.register_script(source)
+
+    return script(keys=keys, args=args, client=redis)
+
+
+# pylint: disable=C1001
+class _Renewer(object):
+
+    """
+    Process-wide thread that keeps auto-renewing locks alive
+
+    Each lock is extended once a third of its expiry has passed, for as long
+    as it is held. One thread serves every lock, so holding a lock doesn't
+    cost a thread of its own.
+    """
+
+    def __init__(self):
+        """ Initialize the renewer. """
+
+        #: Condition guarding the renewal schedule
+        self._condition = Condition()
+        #: When each lock is next due for renewal
+        self._due = {}
+        #: Renewal thread
+        self._thread = None
+
+    def add(self, lock):
+        """
+        Start renewing a lock.
+
+        :param rodario.locks.RedisLock lock: The lock
+        """
+
+        with self._condition:
+            self._due[lock] = monotonic() + lock.expiry / 3.0
+
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+
+            self._condition.notify()
+
+    def remove(self, lock):
+        """
+        Stop renewing a lock.
+
+        :param rodario.locks.RedisLock lock: The lock
+        """
+
+        with self._condition:
+            self._due.pop(lock, None)
+
+    def _run(self):
+        """ Renew locks as they come due. """
+
+        while True:
+            with self._condition:
+                now = monotonic()
+                due = [lock for lock, when in self._due.items() if when <= now]
+
+                if not due:
+                    wait = min(self._due.values(), default=now + 60) - now
+                    self._condition.wait(wait)
+                    continue
+
+                for lock in due:
+                    self._due[lock] = now + lock.expiry / 3.0
+
+            for lock in due:
+                try:
+                    renewed = lock.renew()
+                except Exception:  # pylint: disable=W0703
+                    # try again next time; the lock may still be ours
+                    continue
+
+                if not renewed:
+                    self.remove(lock)
+
+
+#: The process-wide lock renewer
+_RENEWER = _Renewer()
+
+
+class RedisLock(object):
+
+    """
+    Lock shared through redis
+
+    A lock is a key set (only if absent) to a random token, with a TTL, in a
+    single round trip. Releasing and renewing check the token first, inside
+    a lua script, so a lock that expired and was taken by someone else is
+    never deleted or extended by its old holder.
+    """
+
+    def __init__(self, name, expiry=None, context=None, conn=None,
+                 renew=False):
+        """
+        Initialize the lock.
+
+        :param str name: Name of the lock
+        :param float expiry: The duration of the lock (in seconds, to the
+            millisecond; defaults to :data:`LOCK_EXPIRY`)
+        :param str context: The context to apply to the lock name (defaults
+            to :data:`LOCK_CONTEXT`)
+        :param redis.StrictRedis conn: The redis connection to use
+        :param bool renew: Whether to keep extending the lock while it is
+            held
+        """
+
+        context = LOCK_CONTEXT if context is None else context
+        #: Full name of the lock's key
+        self.name = '%s:%s' % (context, name)
+        #: Duration of the lock (in seconds)
+        self.expiry = LOCK_EXPIRY if expiry is None else expiry
+        #: Whether to keep extending the lock while it is held
+        self.auto_renew = renew
+        #: Redis connection
+        self._redis = get_redis_connection() if conn is None else conn
+        #: Token identifying this holder (while the lock is held)
+        self._token = None
+
+    def __enter__(self):
+        """
+        Acquire the lock for a ``with`` block.
+
+        :rtype: :class:`bool`
+        :returns: Whether the lock was acquired
+        """
+
+        return self.acquire()
+
+    def __exit__(self, *args):
+        """ Release the lock at the end of a ``with`` block. """
+
+        self.release()
+
+    @property
+    def held(self):
+        """
+        Return True if this object acquired the lock and hasn't released it.
+
+        :rtype: :class:`bool`
+        """
+
+        return self._token is not None
+
+    def acquire(self):
+        """
+        Try to acquire the lock (without waiting).
+
+        :rtype: :class:`bool`
+        :returns: Whether the lock was acquired
+        """
+
+        token = uuid4().hex
+
+        if not _run(self._redis, _ACQUIRE, [self.name],
+                    [token, max(1, int(self.expiry * 1000)), time()]):
+            _count(self.name, 'contended')
+
+            return False
+
+        self._token = token
+        _count(self.name, 'acquired')
+
+        if self.auto_renew:
+            _RENEWER.add(self)
+
+        return True
+
+    def renew(self):
+        """
+        Extend the lock by its expiry, if it is still held.
+
+        :rtype: :class:`bool`
+        :returns: Whether the lock was still held
+        """
+
+        token = self._token
+
+        if token is None:
+            return False
+
+        if _run(self._redis, _RENEW, [self.name],
+                [token, max(1, int(self.expiry * 1000))]):
+            _count(self.name, 'renewed')
+
+            return True
+
+        _count(self.name, 'lost')
+
+        return False
+
+    def release(self):
+        """
+        Release the lock, if it is still held.
+
+        :rtype: :class:`bool`
+        :returns: Whether the lock was still held
+        """
+
+        token, self._token = self._token, None
+
+        if token is None:
+            return False
+
+        _RENEWER.remove(self)
+
+        if _run(self._redis, _RELEASE, [self.name], [token]):
+            _count(self.name, 'released')
+
+            return True
+
+        _count(self.name, 'lost')
+
+        return False
@@ -0,0 +1,150 @@
+""" Message pump for rodario framework """
+
+# stdlib
+from threading import Thread, Event, Lock, current_thread
+
+# local
+from rodario import get_redis_connection
+
+#: Seconds to block on the socket before re-checking the stop flag
+PUMP_TIMEOUT = 1.0
+
+
+class MessagePump(object):
+
+    """
+    Blocking, event-driven pubsub message loop
+
+    The pump's thread blocks on the pubsub socket until a message arrives
+    (or ``timeout`` elapses), so handlers fire as soon as data is available
+    and idle pumps do not wake up to poll. A stopped pump hands its
+    connection back to the pool, and subscribes to its channels again when
+    it is restarted.
+    """
+
+    def __init__(self, redis=None, timeout=None):
+        """
+        Initialize the pump.
+
+        :param redis.StrictRedis redis: The redis connection to use
+        :param float timeout: Seconds to block per read before checking
+            whether the pump has been stopped
+        """
+
+        #: Redis connection
+        self._redis = get_redis_connection() if redis is None else redis
+        # pylint: disable=E1123
+        #: Redis PubSub client
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        #: Handlers for each subscribed channel
+        self._handlers = {}
+        #: Lock guarding the connection while it is woken up or closed
+        self._lock = Lock()
+        #: Threading Event to tell the message loop to die
+        self._stop = Event()
+        #: Separate Thread for handling messages
+        self._thread = None
+        #: Seconds to block per read
+        self.timeout = PUMP_TIMEOUT if timeout is None else timeout
+
+    @property
+    def is_alive(self):
+        """
+        Return True if the pump's thread is running.
+
+        :rtype: :class:`bool`
+        """
+
+        return self._thread is not None and self._thread.is_alive()
+
+    def subscribe(self, **handlers):
+        """
+        Subscribe to channels.
+
+        :param dict handlers: Mapping of channel names to handler functions
+        """
+
+        current = dict(self._handlers)
+        current.update(handlers)
+        self._handlers = current
+        self._pubsub.subscribe(**handlers)
+
+    def unsubscribe(self, *channels, **handlers):
+        """
+        Unsubscribe from channels.
+
+        :param tuple channels: The channel names to unsubscribe from
+        :param dict handlers: Mapping of channel names to the handlers that
+            were subscribed to them
+        """
+
+        channels = channels + tuple(handlers)
+        current = dict(self._handlers)
+
+        for channel in channels:
+            current.pop(channel, None)
+
+        self._handlers = current
+        self._pubsub.unsubscribe(*channels)
+
+    def _run(self):
+        """ Block on the socket and fire handlers until stopped. """
+
+        pubsub = self._pubsub
+
+        while not self._stop.is_set():
+            if not pubsub.subscribed:
+                # nothing to read yet; don't spin on an empty connection
+                self._stop.wait(self.timeout)
+                continue
+
+            pubsub.get_message(timeout=self.timeout)
+
+        self._close()
+
+    def _close(self):
+        """ Hand the connection back to the pool until restarted. """
+
+        with self._lock:
+            self._pubsub.close()
+
+    def start(self):
+        """ Fire up the message handler thread. """
+
+        if self.is_alive:
+            return
+
+        self._stop.clear()
+
+        if self._handlers:
+            # restore the subscriptions dropped when the pump stopped
+            self._pubsub.subscribe(**self._handlers)
+
+        self._thread = Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """ Stop the message handler thread and wait for it to exit. """
+
+        self._stop.set()
+        thread = self._thread
+
+        if thread is None:
+            # never started, but subscribing may have connected
+            self._close()
+
+            return
+
+        if thread is current_thread():
+            return
+
+        with self._lock:
+            if self._pubsub.subscribed:
+                # wake up the blocked read so the thread sees the stop flag
+                try:
+                    self._pubsub.execute_command('PING')
+                except Exception:  # pylint: disable=W0703
+                    pass
+
+        thread.join(self.timeout)
@@ -1,14 +1,164 @@
 """ Actor registry for rodario framework """
 
+# stdlib
+import logging
+from collections import OrderedDict
+from threading import Lock, Thread
+from time import monotonic, sleep, time
+
+# 3rd party
+from redis.exceptions import RedisError
+
 # local
 from rodario import get_redis_connection
+from rodario.dispatcher import Dispatcher
 from rodario.exceptions import RegistrationException
 
+#: Number of actor interfaces each process keeps cached
+INTERFACE_CACHE_SIZE = 128
+#: Seconds between heartbeats for the actors registered by a process
+HEARTBEAT_INTERVAL = 5.0
+#: Seconds without a heartbeat after which an actor is considered dead
+HEARTBEAT_TTL = 30.0
+#: Seconds between sweeps that remove dead actors from the registry
+REAP_INTERVAL = 60.0
+#: Dead actors removed per round trip while sweeping
+REAP_BATCH = 1000
+#: Entries read per round trip when iterating over the registry
+SCAN_COUNT = 1000
+#: Seconds a cached :meth:`_RegistrySingleton.exists` answer is trusted
+EXISTS_CACHE_TTL = 5.0
+#: Number of :meth:`_RegistrySingleton.exists` answers each process caches
+EXISTS_CACHE_SIZE = 10000
+#: Seconds an actor's stream mailbox is kept once the actor is unregistered
+#: or swept, so it finds its backlog if it comes back with the same UUID
+#: (None to keep it forever)
+MAILBOX_TTL = 86400
+
+LOGGER = logging.getLogger(__name__)
+
+# Shared by the scripts below: remove every trace of an actor, and announce
+# the change. KEYS are the actor set, the heartbeat sorted set and the
+# interface key hash; ARGV[1] is the key prefix, from which the keys that
+# depend on the actor (its metadata, channels and index entries) are derived.
+# Given a TTL, the actor's stream mailbox (with any calls still waiting in
+# it) expires after that many seconds, unless the actor is registered again.
+_FORGET = """
+local prefix = ARGV[1]
+local function forget(uuid, ttl)
+    if redis.call('zrem', KEYS[2], uuid) == 1 then
+        redis.call('publish', prefix .. 'registry', uuid)
+    end
+    local info = prefix .. 'actor:' .. uuid
+    local channels = info .. ':channels'
+    local indexed = redis.call('hmget', info, 'class', 'host')
+    if indexed[1] then
+        redis.call('srem', prefix .. 'class:' .. indexed[1], uuid)
+    end
+    if indexed[2] then
+        redis.call('srem', prefix .. 'host:' .. indexed[2], uuid)
+    end
+    for _, channel in ipairs(redis.call('smembers', channels)) do
+        redis.call('srem', prefix .. 'members:' .. channel, uuid)
+    end
+    redis.call('del', info, channels)
+    redis.call('srem', KEYS[1], uuid)
+    redis.call('hdel', KEYS[3], uuid)
+    if ttl and tonumber(ttl) > 0 then
+        redis.call('expire', 'mailbox:' .. uuid, ttl)
+    end
+end
+"""
+
+# Register an actor, unless its UUID belongs to a live one; whatever a dead
+# one left behind is cleared first. Entries without a heartbeat (e.g. left by
+# older versions) are taken over. KEYS[4] is the interface hash; metadata
+# fields and values follow the fixed arguments.
+_REGISTER = _FORGET + """
+local uuid = ARGV[2]
+local seen = redis.call('zscore', KEYS[2], uuid)
+if seen and tonumber(seen) >= tonumber(ARGV[4]) then
+    return 0
+end
+forget(uuid)
+redis.call('persist', 'mailbox:' .. uuid)
+redis.call('sadd', KEYS[1], uuid)
+redis.call('zadd', KEYS[2], ARGV[3], uuid)
+if ARGV[5] ~= '' then
+    redis.call('hsetnx', KEYS[4], ARGV[5], ARGV[6])
+    redis.call('hset', KEYS[3], uuid, ARGV[5])
+end
+local info = prefix .. 'actor:' .. uuid
+for i = 7, #ARGV, 2 do
+    redis.call('hset', info, ARGV[i], ARGV[i + 1])
+    if ARGV[i] == 'class' or ARGV[i] == 'host' then
+        redis.call('sadd', prefix .. ARGV[i] .. ':' .. ARGV[i + 1], uuid)
+    end
+end
+redis.call('publish', prefix .. 'registry', uuid)
+return 1
+"""
+
+# Unregister an actor; ARGV[3] is its mailbox's TTL.
+_UNREGISTER = _FORGET + """
+forget(ARGV[2], ARGV[3])
+"""
+
+# Remove a batch of actors whose last heartbeat is older than the cutoff;
+# ARGV[4] is their mailboxes' TTL.
+_REAP = _FORGET + """
+local dead = redis.call('zrangebyscore', KEYS[2], '-inf', '(' .. ARGV[2],
+                        'LIMIT', 0, ARGV[3])
+for _, uuid in ipairs(dead) do
+    forget(uuid, ARGV[4])
+end
+return dead
+"""
+
+# Refresh the heartbeats (KEYS[1]) of live actors; return those that were
+# swept.
+_HEARTBEAT = """
+local swept = {}
+for i = 2, #ARGV do
+    if redis.call('zadd', KEYS[1], 'XX', 'CH', ARGV[1], ARGV[i]) == 0 then
+        table.insert(swept, ARGV[i])
+    end
+end
+return swept
+"""
+
+
+def _decode(value):
+    """
+    Decode a value read from redis.
+
+    :param value: The value
+    :rtype: :class:`str`
+    """
+
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
 
 # pylint: disable=C1001
 class _RegistrySingleton(object):
 
-    """ Singleton for actor registry """
+    """
+    Singleton for actor registry
+
+    Besides the set of actors, the registry keeps a sorted set of their UUIDs
+    scored by when each was last seen. A process-wide thread refreshes the
+    scores of the actors registered by its process every
+    :data:`HEARTBEAT_INTERVAL` seconds, so actors whose process died without
+    unregistering them (e.g. after SIGKILL) stop counting as live after
+    :data:`HEARTBEAT_TTL` seconds, and are swept from the registry every
+    :data:`REAP_INTERVAL` seconds. Scores are wall-clock times, so hosts'
+    clocks must agree to well within the TTL.
+
+    The registry's scripts derive the keys of each actor's metadata, channels
+    and index entries from the key prefix, so it needs a single redis node
+    (or, on a cluster, a prefix with a hash tag, e.g. ``{rodario}``, that
+    keeps every registry key in one slot).
+    """
 
     def __init__(self, prefix=None):
         """
@@ -19,45 +169,635 @@ class _RegistrySingleton(object):
 
         self._redis = get_redis_connection()
         self._list = '{prefix}actors'.format(prefix=prefix)
+        #: Prefix for redis key names
+        self._prefix = prefix
+        #: Prefix for redis key names, as it appears in them
+        self._key_prefix = '{prefix}'.format(prefix=prefix)
+        #: Hash of each actor's interface key, by UUID
+        self._classes = '{prefix}classes'.format(prefix=prefix)
+        #: Hash of each interface's method names, by interface key
+        self._interfaces = '{prefix}interfaces'.format(prefix=prefix)
+        #: Recently used interfaces, by interface key
+        self._cache = OrderedDict()
+        #: Lock guarding the interface cache
+        self._cache_lock = Lock()
+        #: Sorted set of actors, scored by when they were last seen
+        self._heartbeats = '{prefix}heartbeats'.format(prefix=prefix)
+        #: Registrations of the actors registered by this process, by UUID
+        self._tracked = {}
+        #: Functions telling whether tracked actors are serving, by UUID
+        self._serving = {}
+        #: Lock guarding the tracked actors
+        self._tracked_lock = Lock()
+        #: Heartbeat thread
+        self._thread = None
+        #: Channel announcing registrations and removals
+        self._changes = '{prefix}registry'.format(prefix=prefix)
+        #: Cached exists() answers and when they expire, by UUID (or None
+        #: while caching is disabled)
+        self._exists_cache = None
+        #: Seconds cached exists() answers are trusted
+        self._exists_ttl = EXISTS_CACHE_TTL
+        #: Number of exists() answers to cache
+        self._exists_size = EXISTS_CACHE_SIZE
+        #: Lock guarding the exists() cache
+        self._exists_lock = Lock()
+        #: Keys every registry script that removes actors touches
+        self._script_keys = [self._list, self._heartbeats, self._classes]
+        self._register_script = self._redis.register_script(_REGISTER)
+        self._unregister_script = self._redis.register_script(_UNREGISTER)
+        self._reap_script = self._redis.register_script(_REAP)
+        self._heartbeat_script = self._redis.register_script(_HEARTBEAT)
+
+    def _members_key(self, channel):
+        """
+        Return the name of the set of a cluster channel's members.
+
+        :param str channel: The cluster channel
+        :rtype: :class:`str`
+        """
+
+        return '{prefix}members:{channel}'.format(prefix=self._prefix,
+                                                  channel=channel)
+
+    def _info_key(self, uuid):
+        """
+        Return the name of the hash of an actor's metadata.
+
+        :param str uuid: The UUID of the actor
+        :rtype: :class:`str`
+        """
+
+        return '{prefix}actor:{uuid}'.format(prefix=self._prefix, uuid=uuid)
 
     @property
     def actors(self):
         """
-        Retrieve a list of registered actors.
+        Retrieve a list of registered (live) actors.
+
+        This loads every UUID at once; see :meth:`scan` and :meth:`count` for
+        large registries.
 
         :rtype: :class:`set`
         """
 
-        return self._redis.smembers(self._list)
+        return set(_decode(uuid) for uuid in self._redis.zrangebyscore(
+            self._heartbeats, time() - HEARTBEAT_TTL, '+inf'))
 
-    def register(self, uuid):
+    def scan(self, count=None):
+        """
+        Iterate over the registered (live) actors, a batch at a time.
+
+        :param int count: Roughly how many entries to read per round trip
+            (defaults to :data:`SCAN_COUNT`)
+        :rtype: iterator
+        """
+
+        cutoff = time() - HEARTBEAT_TTL
+
+        for uuid, seen in self._redis.zscan_iter(
+                self._heartbeats, count=SCAN_COUNT if count is None
+                else count):
+            if seen >= cutoff:
+                yield _decode(uuid)
+
+    def count(self):
+        """
+        Count the registered (live) actors, without loading them.
+
+        :rtype: :class:`int`
+        """
+
+        return self._redis.zcount(self._heartbeats, time() - HEARTBEAT_TTL,
+                                  '+inf')
+
+    # pylint: disable=R0913
+    def register(self, uuid, interface_key=None, interface=None,
+                 oneway=None, metadata=None, serving=None):
         """
         Register a new actor.
 
+        The actor's interface (the names of the methods proxies expose) is
+        published alongside it, so proxies can be built without asking the
+        actor. Interfaces are stored once per ``interface_key``, which
+        changes whenever the interface does.
+
+        The actor is kept alive by this process's heartbeats until it is
+        unregistered, but only while ``serving`` (if given) returns True, so
+        an actor that stopped reading its calls is left to expire. A UUID
+        whose actor is dead may be registered again.
+
         :param str uuid: The UUID of the actor to register
+        :param str interface_key: Key identifying the actor's interface
+        :param set interface: The names of the actor's public methods
+        :param set oneway: The names of the actor's one-way methods
+        :param dict metadata: Fields for the actor's metadata (see
+            :meth:`metadata`); ``class`` and ``host`` are indexed
+        :param serving: Function returning whether the actor is serving
         """
 
-        if self._redis.sadd(self._list, uuid) == 0:
+        registration = self._registration(uuid, interface_key, interface,
+                                          oneway, metadata)
+
+        if not self._send_registration(registration):
             raise RegistrationException('Failed adding member to set')
 
+        self._track([registration], {uuid: serving})
+
+    def register_many(self, registrations):
+        """
+        Register several new actors in a single round trip.
+
+        Each actor is registered as by :meth:`register`, except that UUIDs
+        whose actors are alive are returned instead of raising an error; the
+        others are registered regardless.
+
+        :param list registrations: The arguments to :meth:`register` for
+            each actor, as tuples
+        :rtype: :class:`list`
+        :returns: The UUIDs that could not be registered
+        """
+
+        registrations = [tuple(args) for args in registrations]
+        serving = {args[0]: args[5] for args in registrations
+                   if len(args) > 5}
+        registrations = [self._registration(*args[:5])
+                         for args in registrations]
+        pipe = self._redis.pipeline(transaction=False)
+
+        for registration in registrations:
+            self._send_registration(registration, pipe)
+
+        registered = []
+        taken = []
+
+        for registration, result in zip(registrations, pipe.execute()):
+            if result:
+                registered.append(registration)
+            else:
+                taken.append(registration[0])
+
+        self._track(registered, serving)
+
+        return taken
+
+    @staticmethod
+    def _registration(uuid, interface_key=None, interface=None, oneway=None,
+                      metadata=None):
+        """
+        Build the arguments of the registration script for an actor.
+
+        :param str uuid: The UUID of the actor
+        :param str interface_key: Key identifying the actor's interface
+        :param set interface: The names of the actor's public methods
+        :param set oneway: The names of the actor's one-way methods
+        :param dict metadata: Fields for the actor's metadata
+        :rtype: :class:`list`
+        """
+
+        methods = ''
+
+        if interface_key is not None:
+            oneway = oneway or ()
+            # one-way methods are marked with a leading '!'
+            methods = ' '.join(sorted('!' + name if name in oneway else name
+                                      for name in interface))
+
+        fields = []
+
+        for field, value in (metadata or {}).items():
+            fields.extend((field, value))
+
+        return [uuid, interface_key or '', methods] + fields
+
+    def _track(self, registrations, serving):
+        """
+        Start sending heartbeats for newly registered actors.
+
+        :param list registrations: The actors' registration script arguments
+        :param dict serving: Functions returning whether the actors are
+            serving, by UUID
+        """
+
+        if not registrations:
+            return
+
+        for registration in registrations:
+            self._uncache(registration[0])
+
+        with self._tracked_lock:
+            for registration in registrations:
+                uuid = registration[0]
+                self._tracked[uuid] = (registration, set())
+
+                if serving.get(uuid) is not None:
+                    self._serving[uuid] = serving[uuid]
+                else:
+                    self._serving.pop(uuid, None)
+
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+
+    def _send_registration(self, registration, client=None):
+        """
+        Run the registration script.
+
+        :param list registration: The UUID, interface key, interface and
+            metadata fields
+        :param client: The redis connection (or pipeline) to use
+        :rtype: :class:`bool`
+        :returns: Whether the actor was registered (or, on a pipeline, the
+            pipeline)
+        """
+
+        now = time()
+        result = self._register_script(
+            keys=self._script_keys + [self._interfaces],
+            args=[self._key_prefix, registration[0], now,
+                  now - HEARTBEAT_TTL] + registration[1:], client=client)
+
+        return result if client is not None else bool(result)
+
     def unregister(self, uuid):
         """
-        Unregister an existing actor.
+        Unregister an existing actor, along with its metadata and cluster
+        memberships. Its stream mailbox expires after :data:`MAILBOX_TTL`
+        seconds, unless it is registered again before then.
 
         :param str uuid: The UUID of the actor to unregister
         """
 
-        self._redis.srem(self._list, uuid)
+        with self._tracked_lock:
+            self._tracked.pop(uuid, None)
+            self._serving.pop(uuid, None)
+
+        self._unregister_script(keys=self._script_keys,
+                                args=[self._key_prefix, uuid,
+                                      MAILBOX_TTL or 0])
+        self._uncache(uuid)
+
+    def heartbeat(self):
+        """
+        Mark the actors registered by this process as alive, skipping those
+        that are not serving.
+        """
+
+        with self._tracked_lock:
+            tracked = list(self._tracked)
+            serving = dict(self._serving)
+
+        # asked outside the lock, since the actors may take their own locks
+        tracked = [uuid for uuid in tracked
+                   if uuid not in serving or serving[uuid]()]
+
+        if not tracked:
+            return
+
+        swept = self._heartbeat_script(keys=[self._heartbeats],
+                                       args=[time()] + tracked)
+
+        for uuid in swept:
+            uuid = _decode(uuid)
+
+            # swept meanwhile (e.g. while this process was suspended); put
+            # it back, unless it has been unregistered since (unregister()
+            # waits for the lock, so it can't slip in before this finishes)
+            with self._tracked_lock:
+                if uuid not in self._tracked:
+                    continue
+
+                registration, channels = self._tracked[uuid]
+
+                if self._send_registration(registration):
+                    pipe = self._redis.pipeline(transaction=False)
+
+                    for channel in channels:
+                        pipe.sadd(self._members_key(channel), uuid)
+                        pipe.sadd('%s:channels' % self._info_key(uuid),
+                                  channel)
+
+                    pipe.execute()
+
+    def reap(self):
+        """
+        Remove dead actors from the registry; their stream mailboxes expire
+        after :data:`MAILBOX_TTL` seconds.
+
+        :rtype: :class:`list`
+        :returns: The UUIDs of the actors removed
+        """
+
+        reaped = []
+        cutoff = time() - HEARTBEAT_TTL
+
+        while True:
+            dead = self._reap_script(
+                keys=self._script_keys,
+                args=[self._key_prefix, cutoff, REAP_BATCH,
+                      MAILBOX_TTL or 0])
+            reaped.extend(_decode(uuid) for uuid in dead)
+
+            if len(dead) < REAP_BATCH:
+                return reaped
+
+    def _run(self):
+        """ Send heartbeats and sweep dead actors until none are left. """
+
+        reaped = monotonic()
+
+        while True:
+            # registering set the first heartbeat
+            sleep(HEARTBEAT_INTERVAL)
+
+            with self._tracked_lock:
+                if not self._tracked:
+                    # restarted by the next registration
+                    self._thread = None
+
+                    return
+
+            try:
+                self.heartbeat()
+
+                if monotonic() - reaped >= REAP_INTERVAL:
+                    reaped = monotonic()
+                    self.reap()
+            except RedisError:
+                LOGGER.exception('Unable to send registry heartbeat')
+
+    def metadata(self, uuid):
+        """
+        Retrieve an actor's metadata.
+
+        Actors record their ``class``, ``host``, ``pid`` and ``started``
+        (time) when they register; ``channels`` holds the cluster channels
+        they have joined, and ``seen`` the time of their last heartbeat.
+
+        :param str uuid: The UUID of the actor
+        :rtype: :class:`dict`
+        :returns: The metadata, or None if the actor isn't registered
+        """
+
+        info = self._info_key(uuid)
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.zscore(self._heartbeats, uuid)
+        pipe.hgetall(info)
+        pipe.smembers('%s:channels' % info)
+        seen, fields, channels = pipe.execute()
+
+        if seen is None:
+            return None
+
+        metadata = dict((_decode(field), _decode(value))
+                        for field, value in fields.items())
+
+        for field, cast in (('pid', int), ('started', float)):
+            if field in metadata:
+                metadata[field] = cast(metadata[field])
+
+        metadata['channels'] = set(_decode(channel) for channel in channels)
+        metadata['seen'] = seen
+
+        return metadata
+
+    def _live(self, key):
+        """
+        Iterate over the live actors in a set, a batch at a time.
+
+        :param str key: The name of the set
+        :rtype: iterator
+        """
+
+        cursor = 0
+        cutoff = time() - HEARTBEAT_TTL
+
+        while True:
+            cursor, uuids = self._redis.sscan(key, cursor, count=SCAN_COUNT)
+
+            if uuids:
+                pipe = self._redis.pipeline(transaction=False)
+
+                for uuid in uuids:
+                    pipe.zscore(self._heartbeats, uuid)
+
+                for uuid, seen in zip(uuids, pipe.execute()):
+                    if seen is not None and seen >= cutoff:
+                        yield _decode(uuid)
+
+            if not cursor:
+                return
+
+    def by_class(self, cls):
+        """
+        Iterate over the live actors of a class (through its index).
+
+        :param cls: The class, or its qualified name (``module.Class``)
+        :rtype: iterator
+        """
+
+        if isinstance(cls, type):
+            cls = '%s.%s' % (cls.__module__, cls.__qualname__)
+
+        return self._live('{prefix}class:{name}'.format(prefix=self._prefix,
+                                                        name=cls))
+
+    def by_host(self, host):
+        """
+        Iterate over the live actors on a host (through its index).
+
+        :param str host: The host name
+        :rtype: iterator
+        """
+
+        return self._live('{prefix}host:{host}'.format(prefix=self._prefix,
+                                                       host=host))
+
+    def interface(self, uuid):
+        """
+        Retrieve the names of an actor's public methods.
+
+        Interfaces are cached (up to :data:`INTERFACE_CACHE_SIZE` of them)
+        by interface key, so after the first actor of a class, this costs a
+        single round trip.
+
+        :param str uuid: The UUID of the actor
+        :rtype: :class:`tuple`
+        :returns: The names of the public methods and of the one-way methods
+            (as frozensets), or None if the actor didn't publish its
+            interface
+        """
+
+        key = self._redis.hget(self._classes, uuid)
+
+        if key is None:
+            return None
+
+        with self._cache_lock:
+            interface = self._cache.get(key)
+
+            if interface is not None:
+                self._cache.move_to_end(key)
+
+                return interface
+
+        methods = self._redis.hget(self._interfaces, key)
+
+        if methods is None:
+            return None
+
+        methods = _decode(methods).split()
+        interface = (frozenset(name.lstrip('!') for name in methods),
+                     frozenset(name[1:] for name in methods
+                               if name[0] == '!'))
+
+        with self._cache_lock:
+            self._cache[key] = interface
+
+            while len(self._cache) > INTERFACE_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+        return interface
 
     def exists(self, uuid):
         """
-        Test whether an actor exists in the registry.
+        Test whether a live actor exists in the registry.
+
+        With caching enabled (see :meth:`enable_cache`), recent answers are
+        served from memory.
 
         :param str uuid: UUID of the actor to check for
         :rtype: :class:`bool`
         """
 
-        return self._redis.sismember(self._list, uuid) == 1
+        cache = self._exists_cache
+
+        if cache is not None:
+            with self._exists_lock:
+                cached = cache.get(uuid)
+
+                if cached is not None and cached[1] > monotonic():
+                    cache.move_to_end(uuid)
+
+                    return cached[0]
+
+        expires = monotonic() + self._exists_ttl
+        seen = self._redis.zscore(self._heartbeats, uuid)
+        exists = seen is not None and seen >= time() - HEARTBEAT_TTL
+
+        if cache is not None:
+            with self._exists_lock:
+                cache[uuid] = (exists, expires)
+                cache.move_to_end(uuid)
+
+                while len(cache) > self._exists_size:
+                    cache.popitem(last=False)
+
+        return exists
+
+    def enable_cache(self, ttl=None, size=None):
+        """
+        Cache the answers of :meth:`exists` in this process.
+
+        Cached answers are dropped as soon as the registry announces a change
+        to their actor (a registration, an unregistration or a sweep), and
+        trusted for at most ``ttl`` seconds otherwise; an actor whose process
+        dies may still be reported alive until then.
+
+        :param float ttl: Seconds an answer is trusted (defaults to
+            :data:`EXISTS_CACHE_TTL`)
+        :param int size: Number of answers to keep (defaults to
+            :data:`EXISTS_CACHE_SIZE`)
+        """
+
+        self._exists_ttl = EXISTS_CACHE_TTL if ttl is None else ttl
+        self._exists_size = EXISTS_CACHE_SIZE if size is None else size
+
+        with self._exists_lock:
+            if self._exists_cache is not None:
+                return
+
+            self._exists_cache = OrderedDict()
+
+        Dispatcher().subscribe(**{self._changes: self._invalidate})
+
+    def disable_cache(self):
+        """ Stop caching the answers of :meth:`exists`. """
+
+        with self._exists_lock:
+            if self._exists_cache is None:
+                return
+
+            self._exists_cache = None
+
+        Dispatcher().unsubscribe(**{self._changes: self._invalidate})
+
+    def _invalidate(self, message):
+        """
+        Drop the cached answer for an actor that changed.
+
+        :param dict message: The pubsub message naming the actor
+        """
+
+        self._uncache(_decode(message['data']))
+
+    def _uncache(self, uuid):
+        """
+        Drop the cached answer for an actor.
+
+        :param str uuid: The UUID of the actor
+        """
+
+        with self._exists_lock:
+            if self._exists_cache is not None:
+                self._exists_cache.pop(uuid, None)
+
+    def join(self, channel, uuid):
+        """
+        Record an actor as a member of a cluster channel.
+
+        :param str channel: The cluster channel
+        :param str uuid: The UUID of the actor
+        """
+
+        with self._tracked_lock:
+            if uuid in self._tracked:
+                self._tracked[uuid][1].add(channel)
+
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.sadd(self._members_key(channel), uuid)
+        pipe.sadd('%s:channels' % self._info_key(uuid), channel)
+        pipe.execute()
+
+    def part(self, channel, uuid):
+        """
+        Remove an actor from a cluster channel's members.
+
+        :param str channel: The cluster channel
+        :param str uuid: The UUID of the actor
+        """
+
+        with self._tracked_lock:
+            if uuid in self._tracked:
+                self._tracked[uuid][1].discard(channel)
+
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.srem(self._members_key(channel), uuid)
+        pipe.srem('%s:channels' % self._info_key(uuid), channel)
+        pipe.execute()
+
+    def members(self, channel):
+        """
+        Retrieve the UUIDs of a cluster channel's members.
+
+        Members whose actors are dead are left out.
+
+        :param str channel: The cluster channel
+        :rtype: :class:`set`
+        """
+
+        return set(self._live(self._members_key(channel)))
 
     # pylint: disable=R0201
     def get_proxy(self, uuid):
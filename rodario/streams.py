@@ -0,0 +1,428 @@
+""" Durable stream mailboxes for rodario framework """
+
+# stdlib
+import logging
+from functools import partial
+from threading import Condition, Thread, Event, current_thread
+from time import monotonic
+
+# 3rd party
+from redis import StrictRedis
+from redis.exceptions import RedisError, ResponseError
+
+# local
+from rodario import get_redis_connection
+from rodario.pump import PUMP_TIMEOUT
+
+#: Approximate number of entries a mailbox stream keeps (None for no limit)
+STREAM_MAXLEN = 10000
+#: Number of entries read (and acknowledged) per round trip
+STREAM_BATCH = 100
+#: Consumer group that reads actor mailboxes
+STREAM_GROUP = 'rodario'
+#: Seconds a work-queue entry may stay pending with one member (e.g. one that
+#: died while handling it) before the other members take it over
+QUEUE_CLAIM_IDLE = 60.0
+
+LOGGER = logging.getLogger(__name__)
+
+
+def send(redis, stream, payload, maxlen=None):
+    """
+    Append a message to a stream mailbox.
+
+    :param redis.StrictRedis redis: The redis connection to use
+    :param str stream: The stream name
+    :param bytes payload: The encoded message
+    :param int maxlen: Approximate length to trim the stream to (defaults to
+        :data:`STREAM_MAXLEN`)
+    :rtype: :class:`bytes`
+    :returns: The ID of the new entry
+    """
+
+    maxlen = STREAM_MAXLEN if maxlen is None else maxlen
+
+    return redis.xadd(stream, {'data': payload}, maxlen=maxlen,
+                      approximate=True)
+
+
+def _order(entry_id):
+    """
+    Return a sortable form of a stream entry ID.
+
+    :param bytes entry_id: The entry's ID
+    :rtype: :class:`tuple`
+    """
+
+    if isinstance(entry_id, bytes):
+        entry_id = entry_id.decode('utf-8')
+
+    return tuple(int(part) for part in entry_id.split('-'))
+
+
+class StreamPump(object):
+
+    """
+    Blocking message loop for stream mailboxes
+
+    Works like :class:`rodario.pump.MessagePump`, but reads redis streams
+    through a consumer group, so messages wait in the stream until they are
+    read and stay pending until they are acknowledged. Entries are read and
+    acknowledged in batches of :data:`STREAM_BATCH`; a batch is acknowledged
+    once its handlers have returned. A handler that finishes an entry later
+    (e.g. by queueing it) can take over its acknowledgement by popping the
+    ``ack`` function from the message and calling it when it is done. When
+    the pump starts, entries this consumer read but never acknowledged (e.g.
+    before a crash) are delivered again before any new ones, so delivery is
+    at-least-once. Consumers that never come back under the same name (e.g.
+    work-queue members) can have their entries taken over by the others
+    instead, once they have been pending for ``claim_idle`` seconds.
+    """
+
+    # pylint: disable=R0913
+    def __init__(self, consumer, redis=None, timeout=None, group=None,
+                 batch=None, wait=False, claim_idle=None):
+        """
+        Initialize the pump.
+
+        :param str consumer: Name of this consumer within the group; reuse
+            it after a restart to receive the entries left pending
+        :param redis.StrictRedis redis: The redis connection to use
+        :param float timeout: Seconds to block per read before checking
+            whether the pump has been stopped
+        :param str group: Name of the consumer group (defaults to
+            :data:`STREAM_GROUP`)
+        :param int batch: Entries to read per round trip (defaults to
+            :data:`STREAM_BATCH`); use 1 for streams shared by competing
+            consumers, so no consumer holds on to entries it isn't ready for
+        :param bool wait: Whether to wait until every entry a handler took
+            over has been acknowledged before reading more (also for
+            competing consumers, so busy ones leave entries to idle ones)
+        :param float claim_idle: Seconds after which entries pending with
+            other consumers are taken over by this one (None never takes
+            them over)
+        """
+
+        #: Redis connection
+        self._redis = get_redis_connection() if redis is None else redis
+        #: Dedicated connection for blocking reads (so they can be unblocked)
+        self._reader = StrictRedis(
+            connection_pool=self._redis.connection_pool,
+            single_connection_client=True)
+        #: Client ID of the reading connection
+        self._reader_id = None
+        #: Consumer name
+        self.consumer = consumer
+        #: Consumer group name
+        self.group = STREAM_GROUP if group is None else group
+        #: Handlers for each stream
+        self._handlers = {}
+        #: Whether unacknowledged entries need to be read again
+        self._recover = True
+        #: ID of the last entry delivered from each stream since the pump
+        #: started (entries up to it are pending only while their handlers
+        #: finish them, so they aren't read again)
+        self._cursors = {}
+        #: Threading Event to tell the message loop to die
+        self._stop = Event()
+        #: Separate Thread for handling messages
+        self._thread = None
+        #: Seconds to block per read
+        self.timeout = PUMP_TIMEOUT if timeout is None else timeout
+        #: Entries to read per round trip
+        self.batch = STREAM_BATCH if batch is None else batch
+        #: Whether to wait for taken-over entries before reading more
+        self.wait = wait
+        #: Seconds after which other consumers' pending entries are claimed
+        self.claim_idle = claim_idle
+        #: When to next claim other consumers' pending entries
+        self._next_claim = 0
+        #: IDs of the entries handed to handlers and not yet acknowledged
+        self._held = set()
+        #: Condition guarding the held entries
+        self._released = Condition()
+
+    @property
+    def is_alive(self):
+        """
+        Return True if the pump's thread is running.
+
+        :rtype: :class:`bool`
+        """
+
+        return self._thread is not None and self._thread.is_alive()
+
+    def _wake(self):
+        """ Interrupt a blocked read so the loop notices changes. """
+
+        if self._reader_id is None:
+            return
+
+        try:
+            self._redis.client_unblock(self._reader_id)
+        except RedisError:
+            pass
+
+    def subscribe(self, **handlers):
+        """
+        Start reading streams, creating them and their groups as needed.
+
+        New groups start at the beginning of their stream, so messages sent
+        before the first subscription are not lost.
+
+        :param dict handlers: Mapping of stream names to handler functions
+        """
+
+        for stream in handlers:
+            try:
+                self._redis.xgroup_create(stream, self.group, id='0',
+                                          mkstream=True)
+            except ResponseError as ex:
+                if 'BUSYGROUP' not in str(ex):
+                    raise
+
+        # copy on write so the loop can iterate without a lock
+        current = dict(self._handlers)
+        current.update(handlers)
+        self._handlers = current
+        self._recover = True
+        self._wake()
+
+    def unsubscribe(self, *streams, **handlers):
+        """
+        Stop reading streams.
+
+        Unread and unacknowledged entries stay in the stream.
+
+        :param tuple streams: The stream names to stop reading
+        :param dict handlers: Mapping of stream names to the handlers that
+            were subscribed to them
+        """
+
+        current = dict(self._handlers)
+
+        for stream in streams + tuple(handlers):
+            current.pop(stream, None)
+
+        self._handlers = current
+        self._wake()
+
+    def _read(self, streams, pending):
+        """
+        Read a batch of entries.
+
+        :param dict streams: Handlers by stream name
+        :param bool pending: Whether to read this consumer's unacknowledged
+            entries instead of new ones
+        :rtype: :class:`list`
+        """
+
+        if pending:
+            start = dict((stream, self._cursors.get(stream, '0'))
+                         for stream in streams)
+            block = None
+        else:
+            start = dict.fromkeys(streams, '>')
+            block = self.timeout
+
+            if self.claim_idle is not None:
+                # wake up in time for the next claim
+                block = min(block, self._next_claim - monotonic())
+
+            block = max(1, int(block * 1000))
+
+        return self._reader.xreadgroup(
+            self.group, self.consumer, start, count=self.batch,
+            block=block) or []
+
+    def _claim(self, streams):
+        """
+        Take over a batch of entries left pending too long by other
+        consumers.
+
+        :param dict streams: Handlers by stream name
+        :rtype: :class:`list`
+        :returns: The entries claimed, by stream
+        """
+
+        self._next_claim = monotonic() + self.claim_idle / 2
+        idle = int(self.claim_idle * 1000)
+
+        for stream in streams:
+            entries = [entry for entry in self._redis.xautoclaim(
+                stream, self.group, self.consumer, idle, count=self.batch)[1]
+                       # still being handled here
+                       if entry[0] not in self._held]
+
+            if entries:
+                return [(stream, entries)]
+
+        return []
+
+    def _release(self, entry_id):
+        """
+        Forget a held entry, and wake the loop if it was waiting for it.
+
+        :param bytes entry_id: The entry's ID
+        """
+
+        with self._released:
+            self._held.discard(entry_id)
+            self._released.notify_all()
+
+    def _ack(self, stream, entry_id):
+        """
+        Acknowledge an entry whose handler took over its acknowledgement.
+
+        :param str stream: The stream name
+        :param bytes entry_id: The entry's ID
+        """
+
+        try:
+            self._redis.xack(stream, self.group, entry_id)
+        except RedisError:
+            # it stays pending, and is delivered again on restart
+            LOGGER.exception('Unable to acknowledge %s in %s', entry_id,
+                             stream)
+        finally:
+            self._release(entry_id)
+
+    def _handle(self, streams, batch):
+        """
+        Hand a batch of entries to their handlers and acknowledge them.
+
+        :param dict streams: Handlers by stream name
+        :param list batch: The entries read, by stream
+        :rtype: :class:`int`
+        :returns: The number of entries handled
+        """
+
+        handled = 0
+
+        for stream, entries in batch:
+            if isinstance(stream, bytes):
+                stream = stream.decode('utf-8')
+
+            handler = streams.get(stream)
+            ids = []
+
+            for entry_id, fields in entries:
+                ids.append(entry_id)
+
+                if handler is None or not fields:
+                    # unsubscribed meanwhile, or trimmed while pending
+                    continue
+
+                message = {'type': 'message', 'channel': stream,
+                           'id': entry_id, 'data': fields[b'data'],
+                           'ack': partial(self._ack, stream, entry_id)}
+                # before the handler runs, which may acknowledge it at once
+                self._held.add(entry_id)
+
+                try:
+                    handler(message)
+                except Exception:  # pylint: disable=W0703
+                    # acknowledge it anyway; a poison message must not be
+                    # delivered forever
+                    LOGGER.exception('Unhandled error in handler for %s',
+                                     stream)
+                    self._release(entry_id)
+                    continue
+
+                if 'ack' in message:
+                    self._release(entry_id)
+                else:
+                    # the handler acknowledges it once it is done
+                    ids.pop()
+
+            handled += len(entries)
+
+            if entries and (stream not in self._cursors or _order(
+                    entries[-1][0]) > _order(self._cursors[stream])):
+                # claimed entries may be older than those already read
+                self._cursors[stream] = entries[-1][0]
+
+            if ids:
+                self._redis.xack(stream, self.group, *ids)
+
+        return handled
+
+    def _run(self):
+        """ Block on the streams and fire handlers until stopped. """
+
+        while not self._stop.is_set():
+            streams = self._handlers
+            pending = self._recover
+
+            if not streams:
+                # nothing to read yet; don't spin
+                self._stop.wait(self.timeout)
+                continue
+
+            if self.wait:
+                with self._released:
+                    if self._held:
+                        # one of the entries read is still being handled
+                        self._released.wait(self.timeout)
+                        continue
+
+            try:
+                if self._reader_id is None:
+                    self._reader_id = self._reader.client_id()
+
+                if (self.claim_idle is not None and not pending
+                        and monotonic() >= self._next_claim):
+                    claimed = self._claim(streams)
+
+                    if claimed:
+                        self._handle(streams, claimed)
+                        continue
+
+                handled = self._handle(streams, self._read(streams, pending))
+            except RedisError:
+                if self._stop.is_set():
+                    break
+
+                # the connection may have been replaced; look up its ID again
+                LOGGER.exception('Unable to read streams')
+                self._reader_id = None
+                self._stop.wait(self.timeout)
+                continue
+
+            if pending and not handled:
+                # caught up on re-deliveries; move on to new entries
+                self._recover = False
+
+        # hand the reading connection back to the pool until restarted
+        self._reader_id = None
+        self._reader.close()
+
+    def start(self):
+        """ Fire up the message handler thread. """
+
+        if self.is_alive:
+            return
+
+        self._stop.clear()
+        self._recover = True
+        self._cursors = {}
+        self._held = set()
+        self._thread = Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """ Stop the message handler thread and wait for it to exit. """
+
+        self._stop.set()
+        thread = self._thread
+
+        if thread is None or thread is current_thread():
+            return
+
+        self._wake()
+
+        with self._released:
+            self._released.notify_all()
+
+        thread.join(self.timeout)
@@ -12,7 +12,7 @@ if __name__ == '__main__':
     with open(join(abspath, 'requirements.txt')) as reqfile:
         reqs = reqfile.readlines()
 
-    for extra in ('test', 'hiredis',):
+    for extra in ('test', 'hiredis', 'msgpack', 'lz4',):
         filename = 'requirements_{extra}.txt'.format(extra=extra)
 
         with open(join(abspath, filename)) as reqfile:
@@ -31,8 +31,16 @@ if __name__ == '__main__':
             'Intended Audience :: Developers',
             'Topic :: Software Development :: Libraries :: Application Frameworks',
             'License :: OSI Approved :: MIT License',
-            'Programming Language :: Python :: 2.7',
+            'Programming Language :: Python :: 3',
+            'Programming Language :: Python :: 3 :: Only',
+            'Programming Language :: Python :: 3.8',
+            'Programming Language :: Python :: 3.9',
+            'Programming Language :: Python :: 3.10',
+            'Programming Language :: Python :: 3.11',
+            'Programming Language :: Python :: 3.12',
+            'Framework :: AsyncIO',
         ],
+        python_requires='>=3.8',
         keywords='actor framework',
         packages=find_packages(),
         install_requires=reqs,
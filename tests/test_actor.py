@@ -3,14 +3,18 @@
 # stdlib
 import unittest
 import pickle
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, current_thread
+from time import sleep, time
 
 # 3rd party
 import redis
 
 # local
 from rodario.registry import Registry
-from rodario.actors import Actor
-from rodario.exceptions import UUIDInUseException
+from rodario.actors import Actor, ActorProxy
+from rodario.decorators import concurrent
+from rodario.exceptions import UUIDInUseException, UnknownMethodException
 
 
 class ActorTestActor(Actor):
@@ -29,6 +33,127 @@ class ActorTestActor(Actor):
         return 2
 
 
+class TableTestActor(ActorTestActor):
+    # pylint: disable=R0201
+
+    """ Stubbed Actor subclass for testing the method table """
+
+    #: Not a method
+    value = 1
+
+    def test(self):
+        """ Overridden method call. """
+
+        return 3
+
+    @property
+    def prop(self):
+        """ Not a method either. """
+
+        return 4
+
+    @staticmethod
+    def static(value):
+        """ Static method call. """
+
+        return value
+
+    def _private(self):
+        """ Private method. """
+
+        return 5
+
+
+class MailboxTestActor(Actor):
+
+    """ Stubbed Actor class for testing the mailbox """
+
+    def __init__(self, uuid=None):
+        """ Initialize the record of queued calls. """
+
+        super(MailboxTestActor, self).__init__(uuid)
+        self.threads = []
+        self.queued = Event()
+
+    def busy(self):
+        """ Serialized call that another call queues up behind. """
+
+        # pylint: disable=W0212
+        # as if a call arrived over pubsub while this one runs
+        self._dispatch('busy', self._record)
+
+        return current_thread()
+
+    def _record(self):
+        """ The queued call. """
+
+        self.threads.append(current_thread())
+        self.queued.set()
+
+
+class MethodTableTests(unittest.TestCase):
+    # pylint: disable=C0103,W0212
+
+    """ Per-class method table unit tests """
+
+    def testInterface(self):
+        """ Expose public methods only, including inherited ones. """
+
+        self.assertEqual(frozenset(['another_method', 'test', 'static']),
+                         TableTestActor._interface)
+
+    def testPerClass(self):
+        """ Build a separate table for each class. """
+
+        self.assertIs(ActorTestActor.test,
+                      ActorTestActor._method_table['test'])
+        self.assertIs(TableTestActor.test,
+                      TableTestActor._method_table['test'])
+        self.assertNotIn('static', ActorTestActor._method_table)
+
+    def testInternalMethods(self):
+        """ Keep _get_methods callable, but out of the interface. """
+
+        self.assertIn('_get_methods', TableTestActor._method_table)
+        self.assertNotIn('_private', TableTestActor._method_table)
+        self.assertNotIn('proxy', TableTestActor._method_table)
+
+    def testStaticMethod(self):
+        """ Call static methods through the table. """
+
+        self.assertEqual(6, TableTestActor._method_table['static'](None, 6))
+
+
+class PoolTestActor(Actor):
+    # pylint: disable=R0201
+
+    """ Stubbed Actor class with a worker pool for testing """
+
+    workers = 4
+
+    def __init__(self, uuid=None):
+        """ Initialize the call log. """
+
+        super(PoolTestActor, self).__init__(uuid)
+        self.calls = []
+
+    @concurrent
+    def slow(self):
+        """ Slow call that may run alongside others. """
+
+        sleep(0.3)
+
+        return 'slow'
+
+    def record(self, value):
+        """ Serialized call. """
+
+        sleep(0.01)
+        self.calls.append(value)
+
+        return value
+
+
 class ActorTests(unittest.TestCase):
     # pylint: disable=R0904,C0103,W0212
 
@@ -89,6 +214,29 @@ class ActorTests(unittest.TestCase):
         self.assertEqual(set(['another_method', 'test']),
                          self.actor._get_methods())
 
+    def testLocalCallRunsAlone(self):
+        """ Leave calls queued behind a local call to another thread. """
+
+        # pylint: disable=W0212
+        actor = MailboxTestActor()
+
+        try:
+            self.assertIs(current_thread(),
+                          actor._call('busy', (), {}).get(timeout=1))
+            self.assertTrue(actor.queued.wait(1))
+            self.assertIsNot(current_thread(), actor.threads[0])
+        finally:
+            actor.stop()
+            Registry().unregister(actor.uuid)
+
+    def testUnknownMethod(self):
+        """ Reject calls to methods the Actor doesn't expose. """
+
+        self.assertRaises(UnknownMethodException, self.actor._call,
+                          'missing', (), {}, False)
+        self.assertRaises(UnknownMethodException, self.actor._call,
+                          '_private', (), {}, False)
+
     def testHandler(self):
         """ Verify that the Actor is responding to proxied method calls. """
 
@@ -117,5 +265,173 @@ class ActorTests(unittest.TestCase):
         self.assertEqual(0, count)
 
 
+class WorkerPoolTests(unittest.TestCase):
+    # pylint: disable=R0904,C0103
+
+    """ Actor worker pool unit tests """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Create an Actor with a worker pool. """
+
+        cls.actor = PoolTestActor('noexist_pool_actor')
+        cls.actor.start()
+        cls.proxy = cls.actor.proxy()
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Kill the actor. """
+
+        cls.actor.stop()
+        Registry().unregister('noexist_pool_actor')
+
+    def testConcurrentCalls(self):
+        """ Run concurrent calls alongside each other. """
+
+        start = time()
+        futures = [self.proxy.slow() for _ in range(4)]
+        self.assertEqual(['slow'] * 4, [future.get(timeout=1)
+                                        for future in futures])
+        self.assertLess(time() - start, 1)
+
+    def testSlowCallDoesNotBlock(self):
+        """ Answer a cheap call while a slow one is still running. """
+
+        slow = self.proxy.slow()
+        self.assertEqual(1, self.proxy.record(1).get(timeout=1))
+        self.assertFalse(slow.ready)
+        slow.get(timeout=1)
+
+    def testShutdown(self):
+        """ Shut down the Actor's own pool when it stops. """
+
+        # pylint: disable=W0212
+        actor = PoolTestActor('noexist_pool_shutdown')
+        actor.start()
+        proxy = actor.proxy()
+        pool = actor._executor
+
+        try:
+            self.assertEqual(1, proxy.record(1).get(timeout=1))
+            actor.stop()
+            self.assertRaises(RuntimeError, pool.submit, int)
+            actor.start()
+            self.assertEqual(2, proxy.record(2).get(timeout=1))
+        finally:
+            actor.stop()
+            Registry().unregister('noexist_pool_shutdown')
+
+    def testStoppedPool(self):
+        """ Keep the mailbox draining when the pool shuts down mid-call. """
+
+        # pylint: disable=W0212
+        actor = PoolTestActor('noexist_pool_stopped')
+        pool = actor._executor
+        pool.shutdown()
+
+        try:
+            future = actor.proxy(local=True).record(1)
+            self.assertEqual(1, future.get(timeout=1))
+            self.assertFalse(actor._serial_running)
+            self.assertEqual('slow',
+                             actor.proxy(local=True).slow().get(timeout=1))
+        finally:
+            actor.stop()
+            Registry().unregister('noexist_pool_stopped')
+
+    def testSharedExecutor(self):
+        """ Leave a pool that was passed in running. """
+
+        pool = ThreadPoolExecutor(max_workers=1)
+        actor = Actor('noexist_pool_executor', executor=pool)
+        actor.start()
+        actor.stop()
+        Registry().unregister('noexist_pool_executor')
+        self.assertEqual(0, pool.submit(int).result(timeout=1))
+        pool.shutdown()
+
+    def testSerializedOrder(self):
+        """ Run serialized calls one at a time, in order. """
+
+        del self.actor.calls[:]
+        futures = [self.proxy.record(i) for i in range(20)]
+
+        for future in futures:
+            future.get(timeout=1)
+
+        self.assertEqual(list(range(20)), self.actor.calls)
+
+
+class SpawnTests(unittest.TestCase):
+    # pylint: disable=R0904,C0103,W0212
+
+    """ Bulk actor spawn unit tests """
+
+    def setUp(self):
+        """ Spawn a few actors. """
+
+        self.registry = Registry()
+        self.actors = ActorTestActor.spawn(5)
+
+    def tearDown(self):
+        """ Kill the actors. """
+
+        for actor in self.actors:
+            actor.stop()
+            self.registry.unregister(actor.uuid)  # pylint: disable=E1101
+
+    def testRegistered(self):
+        """ Register every actor, with its interface. """
+
+        for actor in self.actors:
+            self.assertTrue(self.registry.exists(actor.uuid))
+            self.assertEqual(
+                (set(['another_method', 'test']), set()),
+                self.registry.interface(actor.uuid))
+
+    def testShared(self):
+        """ Share a connection and the Dispatcher. """
+
+        self.assertEqual(1, len(set(id(actor._redis)
+                                    for actor in self.actors)))
+        self.assertTrue(all(actor.shared for actor in self.actors))
+
+    def testStarted(self):
+        """ Answer proxied calls. """
+
+        for actor in self.actors:
+            self.assertTrue(actor.is_alive)
+            self.assertEqual(1, ActorProxy(uuid=actor.uuid).test().get(
+                timeout=1))
+
+    def testTakenUUID(self):
+        """ Keep none of the actors when a UUID is taken. """
+
+        uuids = ['noexist_spawn', self.actors[0].uuid]
+
+        self.assertRaises(UUIDInUseException, ActorTestActor.spawn,
+                          uuids=uuids)
+        self.assertFalse(self.registry.exists('noexist_spawn'))
+        self.assertTrue(self.registry.exists(self.actors[0].uuid))
+
+    def testRepeatedUUID(self):
+        """ Reject UUIDs given more than once before creating anything. """
+
+        uuids = ['noexist_spawn', 'noexist_spawn']
+
+        self.assertRaises(UUIDInUseException, ActorTestActor.spawn,
+                          uuids=uuids)
+        self.assertFalse(self.registry.exists('noexist_spawn'))
+
+    def testRestart(self):
+        """ Answer calls again after a stop and a start. """
+
+        actor = self.actors[0]
+        actor.stop()
+        actor.start()
+        self.assertEqual(1, ActorProxy(uuid=actor.uuid).test().get(
+            timeout=1))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,113 @@
+""" AsyncActor unit tests for rodario framework """
+
+# stdlib
+import asyncio
+import unittest
+
+# local
+from rodario.actors import Actor, AsyncActor, AsyncActorProxy, ActorProxy
+from rodario.exceptions import InvalidActorException
+from rodario.registry import Registry
+
+
+# pylint: disable=R0201
+class AsyncTestActor(AsyncActor):
+
+    """ Stubbed AsyncActor class for testing """
+
+    def test(self):
+        """ Simple method call. """
+
+        return 1
+
+    async def sleepy(self, value):
+        """ Coroutine method call. """
+
+        await asyncio.sleep(0.01)
+
+        return value
+
+    async def fail(self):
+        """ Raise an exception from a coroutine. """
+
+        raise ValueError('test')
+
+
+class ThreadedTestActor(Actor):
+
+    """ Stubbed threaded Actor class for testing """
+
+    def test(self):
+        """ Simple method call. """
+
+        return 2
+
+
+# pylint: disable=C0103,R0904
+class AsyncActorTests(unittest.IsolatedAsyncioTestCase):
+
+    """ AsyncActor and AsyncActorProxy unit tests """
+
+    async def asyncSetUp(self):
+        """ Create and start an AsyncActor. """
+
+        self.registry = Registry()
+        self.actor = AsyncTestActor()
+        await self.actor.start()
+
+    async def asyncTearDown(self):
+        """ Kill the AsyncActor. """
+
+        self.actor.stop()
+        self.registry.unregister(self.actor.uuid)
+
+    async def testProxiedMethod(self):
+        """ Await plain and coroutine methods through a proxy. """
+
+        proxy = self.actor.proxy()
+        self.assertIsInstance(proxy, AsyncActorProxy)
+        self.assertEqual(1, await proxy.test())
+        self.assertEqual(3, await proxy.sleepy(3))
+
+    async def testManyInFlight(self):
+        """ Drive many concurrent calls from one event loop. """
+
+        proxy = AsyncActorProxy(uuid=self.actor.uuid)
+        results = await asyncio.gather(*(proxy.sleepy(i) for i in range(100)))
+        self.assertEqual(list(range(100)), results)
+
+    async def testException(self):
+        """ Raise the actor's exception from the awaited call. """
+
+        with self.assertRaises(ValueError):
+            await self.actor.proxy().fail()
+
+    async def testThreadedProxy(self):
+        """ Answer calls from a threaded ActorProxy. """
+
+        future = ActorProxy(self.actor).test()
+        result = await asyncio.get_running_loop().run_in_executor(
+            None, future.get, True, 1)
+        self.assertEqual(1, result)
+
+    async def testThreadedActor(self):
+        """ Await calls to a threaded Actor. """
+
+        actor = ThreadedTestActor()
+        actor.start()
+
+        try:
+            self.assertEqual(2, await AsyncActorProxy(actor).test())
+        finally:
+            actor.stop()
+            self.registry.unregister(actor.uuid)
+
+    async def testInvalidActor(self):
+        """ Raise InvalidActorException for an actor that isn't listening. """
+
+        with self.assertRaises(InvalidActorException):
+            await AsyncActorProxy(uuid='noexist_async').test()
+
+
+if __name__ == '__main__':
+    unittest.main()
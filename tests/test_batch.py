@@ -0,0 +1,193 @@
+""" Batched call unit tests for rodario framework """
+
+# stdlib
+import asyncio
+import unittest
+from threading import Thread
+from uuid import uuid4
+
+# local
+from rodario.actors import Actor, ActorProxy, AsyncActor, ClusterProxy
+from rodario.decorators import oneway
+from rodario.exceptions import (EmptyClusterException, InvalidActorException,
+                                UnknownMethodException)
+from rodario.registry import Registry
+
+
+# pylint: disable=R0201
+class BatchTestActor(Actor):
+
+    """ Stubbed Actor class for testing """
+
+    def __init__(self, uuid=None):
+        """ Initialize the call log. """
+
+        super(BatchTestActor, self).__init__(uuid)
+        self.calls = []
+
+    def record(self, value):
+        """ Record a value and return it. """
+
+        self.calls.append(value)
+
+        return value
+
+    @oneway
+    def notify(self, value):
+        """ Record a value, without replying. """
+
+        self.calls.append(value)
+
+    def fail(self):
+        """ Raise an exception. """
+
+        raise ValueError('test')
+
+
+class AsyncBatchTestActor(AsyncActor):
+
+    """ Stubbed AsyncActor class for testing """
+
+    async def double(self, value):
+        """ Coroutine method call. """
+
+        await asyncio.sleep(0)
+
+        return value * 2
+
+
+# pylint: disable=C0103,R0904,W0212
+class BatchTests(unittest.TestCase):
+
+    """ Batched ActorProxy and ClusterProxy unit tests """
+
+    def setUp(self):
+        """ Create and start an Actor. """
+
+        self.channel = str(uuid4())
+        self.actor = BatchTestActor()
+        self.actor.start()
+        self.actor.join(self.channel)
+        self.proxy = ActorProxy(uuid=self.actor.uuid)
+
+    def tearDown(self):
+        """ Kill the Actor. """
+
+        self.actor.part(self.channel)
+        self.actor.stop()
+        Registry().unregister(self.actor.uuid)
+
+    def testBuffered(self):
+        """ Send nothing until the batch ends. """
+
+        with self.proxy.batch() as batch:
+            futures = [self.proxy.record(i) for i in range(10)]
+            self.assertEqual(10, len(batch))
+            self.assertFalse(futures[0].ready)
+
+        self.assertEqual(list(range(10)),
+                         [future.get(timeout=1) for future in futures])
+        self.assertEqual(list(range(10)), self.actor.calls)
+
+    def testPacked(self):
+        """ Answer a packed batch with one reply per call. """
+
+        with self.proxy.batch(packed=True):
+            self.assertIsNone(self.proxy.notify(-1))
+            futures = [self.proxy.record(i) for i in range(10)]
+            failure = self.proxy.fail()
+            missing = self.proxy._proxy('missing')
+
+        self.assertEqual(list(range(10)),
+                         [future.get(timeout=1) for future in futures])
+        self.assertRaises(ValueError, failure.get, timeout=1)
+        self.assertRaises(UnknownMethodException, missing.get, timeout=1)
+        self.assertEqual(list(range(-1, 10)), self.actor.calls)
+
+    def testInvalidActor(self):
+        """ Fail the Futures of calls that reach no actor. """
+
+        proxy = ActorProxy(uuid='noexist_batch', lazy=True)
+
+        with proxy.batch(packed=True):
+            futures = [proxy.record(i) for i in range(2)]
+
+        for future in futures:
+            self.assertRaises(InvalidActorException, future.get, timeout=1)
+
+        self.assertEqual({}, proxy._futures)
+
+    def testOtherThreads(self):
+        """ Only buffer calls made on the batch's thread. """
+
+        futures = []
+
+        with self.proxy.batch():
+            thread = Thread(target=lambda: futures.append(
+                self.proxy.record(1)))
+            thread.start()
+            thread.join()
+            self.assertEqual(1, futures[0].get(timeout=1))
+
+    def testCluster(self):
+        """ Batch broadcast calls to a cluster. """
+
+        cluster = ClusterProxy(self.channel)
+
+        with cluster.batch(packed=True):
+            futures = [cluster.record(i) for i in range(5)]
+
+        for i, future in enumerate(futures):
+            self.assertEqual([i], future.gather(timeout=1))
+
+    def testEmptyCluster(self):
+        """ Fail the ClusterFutures of calls that reach no members. """
+
+        cluster = ClusterProxy(str(uuid4()))
+
+        with cluster.batch():
+            future = cluster.record(1)
+
+        self.assertRaises(EmptyClusterException, future.get, timeout=1)
+
+    def testWorkQueue(self):
+        """ Batch calls to a cluster's work queue. """
+
+        self.actor.join(self.channel, queue=True)
+        cluster = ClusterProxy(self.channel, queue=True)
+
+        with cluster.batch(packed=True):
+            futures = [cluster.record(i) for i in range(5)]
+
+        self.assertEqual(list(range(5)),
+                         [future.get(timeout=2) for future in futures])
+
+
+# pylint: disable=C0103
+class AsyncBatchTests(unittest.IsolatedAsyncioTestCase):
+
+    """ Packed batches sent to an AsyncActor """
+
+    async def testPacked(self):
+        """ Answer a packed batch from an asyncio actor. """
+
+        actor = AsyncBatchTestActor()
+        await actor.start()
+
+        try:
+            proxy = ActorProxy(uuid=actor.uuid)
+
+            with proxy.batch(packed=True):
+                futures = [proxy.double(i) for i in range(5)]
+
+            loop = asyncio.get_running_loop()
+            results = [await loop.run_in_executor(None, future.get, True, 1)
+                       for future in futures]
+            self.assertEqual([0, 2, 4, 6, 8], results)
+        finally:
+            actor.stop()
+            Registry().unregister(actor.uuid)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,13 +2,16 @@
 
 # stdlib
 import unittest
+from threading import Event
 from time import sleep
+from uuid import uuid4
 
 # 3rd party
 import redis
 
 # local
 from rodario.actors import Actor, ClusterProxy
+from rodario.decorators import SKIP
 from rodario.exceptions import EmptyClusterException
 from rodario.future import Future
 
@@ -24,6 +27,47 @@ class TestActor(Actor):
 
         return 1
 
+    def falsy(self):
+        """ Return False. """
+
+        return False
+
+    def decline(self):
+        """ Decline the call. """
+
+        return SKIP
+
+    def whoami(self):
+        """ Return this Actor's UUID (slowly). """
+
+        sleep(0.05)
+
+        return self.uuid
+
+
+class PoolTestActor(Actor):
+
+    """ Stubbed Actor class with a worker pool for testing """
+
+    workers = 1
+
+    def __init__(self, delay):
+        """
+        Set how long each call takes.
+
+        :param float delay: Seconds per call
+        """
+
+        super(PoolTestActor, self).__init__()
+        self.delay = delay
+
+    def whoami(self):
+        """ Return this Actor's UUID (after the delay). """
+
+        sleep(self.delay)
+
+        return self.uuid
+
 
 # pylint: disable=C0103,R0904
 class ClusterProxyTests(unittest.TestCase):
@@ -44,8 +88,6 @@ class ClusterProxyTests(unittest.TestCase):
         """ Kill the Actor. """
 
         cls.actor.stop()
-        del cls.cluster._stop
-        sleep(1)
 
     def testEmptyCluster(self):
         """ Throw an EmptyClusterException. """
@@ -62,9 +104,159 @@ class ClusterProxyTests(unittest.TestCase):
         self.assertEqual(1, result.get(timeout=1))
         self.actor.part('cluster_test')
 
+    def testGather(self):
+        """ Gather every member's result, including False. """
+
+        self.actor.join('cluster_test')
+        costar = TestActor()
+        costar.join('cluster_test')
+        costar.start()
+
+        try:
+            self.assertEqual([False, False],
+                             self.cluster.falsy().gather(timeout=1))
+            result = self.cluster.decline()
+            self.assertEqual([], result.gather(timeout=1))
+            self.assertTrue(result.complete)
+        finally:
+            costar.part('cluster_test')
+            costar.stop()
+            self.actor.part('cluster_test')
+
+    def testReentrantCallback(self):
+        """ Let a done callback call the same proxy again. """
+
+        # a channel of its own, so no other test's actors answer
+        channel = 'reentrant_test:%s' % uuid4()
+        cluster = ClusterProxy(channel)
+        self.actor.join(channel)
+        called = Event()
+        again = []
+
+        def callback(future):
+            """ Call the cluster again from the reply thread. """
+
+            again.append(cluster.test())
+            called.set()
+
+        try:
+            cluster.test().add_done_callback(callback)
+            self.assertTrue(called.wait(1))
+            self.assertEqual(1, again[0].get(timeout=1))
+
+            # a batched call that reached nobody fails outside the lock too
+            self.actor.part(channel)
+
+            while self.redis.pubsub_numsub('cluster:%s' % channel)[0][1]:
+                sleep(0.01)
+
+            errors = []
+
+            def empty(future):
+                """ Call the (now empty) cluster again. """
+
+                try:
+                    cluster._proxy('test')  # pylint: disable=W0212
+                except EmptyClusterException as ex:
+                    errors.append(ex)
+
+            with cluster.batch():
+                cluster.test().add_done_callback(empty)
+
+            self.assertEqual(1, len(errors))
+        finally:
+            self.actor.part(channel)
+
+    def testSharedReplyChannel(self):
+        """ Share the process-wide reply channel with other proxies. """
+
+        self.assertEqual(self.cluster.proxyid,
+                         ClusterProxy('cluster_test2').proxyid)
+
     def testMessageHandler(self):
         """ Send a message. """
 
         self.actor.join('cluster_test')
         self.redis.publish('cluster_test', 'test')
         self.actor.part('cluster_test')
+
+
+# pylint: disable=C0103,R0904
+class WorkQueueTests(unittest.TestCase):
+
+    """ Work-queue ClusterProxy unit tests """
+
+    def setUp(self):
+        """ Create a cluster of Actors sharing a work queue. """
+
+        self.channel = 'queue_test:%s' % uuid4()
+        self.actors = [TestActor() for _ in range(3)]
+
+        for actor in self.actors:
+            actor.join(self.channel, queue=True)
+            actor.start()
+
+        self.cluster = ClusterProxy(self.channel, queue=True)
+        self.redis = redis.StrictRedis()
+
+    def tearDown(self):
+        """ Kill the Actors and remove the queue. """
+
+        for actor in self.actors:
+            actor.stop()
+
+        self.redis.delete('queue:%s' % self.channel)
+
+    def testSingleResult(self):
+        """ Resolve the Future with one member's result. """
+
+        result = self.cluster.test()
+        self.assertIsInstance(result, Future)
+        self.assertEqual(1, result.get(timeout=1))
+        self.assertTrue(result.ready)
+
+    def testLoadBalanced(self):
+        """ Spread calls over the members, each call to just one. """
+
+        futures = [self.cluster.whoami() for _ in range(12)]
+        results = [future.get(timeout=5) for future in futures]
+        self.assertEqual(12, len(results))
+        self.assertGreater(len(set(results)), 1)
+
+    def testBusyMember(self):
+        """ Leave calls to free members while one is still busy. """
+
+        channel = 'queue_test:%s' % uuid4()
+        slow, fast = PoolTestActor(0.5), PoolTestActor(0.01)
+
+        for actor in (slow, fast):
+            actor.join(channel, queue=True)
+            actor.start()
+
+        try:
+            cluster = ClusterProxy(channel, queue=True)
+            futures = [cluster.whoami() for _ in range(10)]
+            results = [future.get(timeout=5) for future in futures]
+            self.assertLessEqual(results.count(slow.uuid), 2)
+        finally:
+            for actor in (slow, fast):
+                actor.stop()
+
+            self.redis.delete('queue:%s' % channel)
+
+    def testException(self):
+        """ Raise the member's exception from the Future. """
+
+        # pylint: disable=W0212
+        self.assertRaises(AttributeError,
+                          self.cluster._proxy('missing').get, timeout=1)
+
+    def testPart(self):
+        """ Stop taking calls from the queue after parting. """
+
+        for actor in self.actors[1:]:
+            actor.part(self.channel)
+
+        futures = [self.cluster.whoami() for _ in range(3)]
+        self.assertEqual({self.actors[0].uuid},
+                         set(future.get(timeout=5) for future in futures))
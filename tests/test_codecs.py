@@ -0,0 +1,334 @@
+""" Codec unit tests for rodario framework """
+
+# stdlib
+import os
+import pickle
+import unittest
+from time import sleep
+from uuid import uuid4
+
+# local
+from rodario import codecs, get_redis_connection
+from rodario.actors import Actor, ActorProxy
+from rodario.dispatcher import Replies
+from rodario.exceptions import (CodecException, PayloadLostException,
+                                RemoteException)
+from rodario.future import Future
+from rodario.registry import Registry
+
+
+# pylint: disable=R0201
+class CodecTestActor(Actor):
+
+    """ Stubbed Actor class for testing """
+
+    def echo(self, value):
+        """ Return the value. """
+
+        return value
+
+    def fail(self):
+        """ Raise an exception. """
+
+        raise ValueError('test')
+
+    def unencodable(self):
+        """ Return something msgpack can't serialize. """
+
+        return object()
+
+
+# pylint: disable=C0103,R0904
+class CodecTests(unittest.TestCase):
+
+    """ Codec unit tests """
+
+    def testPickleRoundTrip(self):
+        """ Encode and decode with the default pickle codec. """
+
+        data = codecs.encode(('a', 1, {'b': 2},))
+        self.assertEqual(codecs.PickleCodec.codec_id, data[0])
+        value, codec = codecs.decode(data)
+        self.assertEqual(('a', 1, {'b': 2},), value)
+        self.assertIs(codecs.get_codec('pickle'), codec)
+
+    def testLegacyPickle(self):
+        """ Decode raw pickles without a header. """
+
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            value, codec = codecs.decode(pickle.dumps(('a', 1,), protocol))
+            self.assertEqual(('a', 1,), value)
+            self.assertEqual('pickle', codec.name)
+
+    def testUnknownCodec(self):
+        """ Raise CodecException for unknown codecs. """
+
+        self.assertRaises(CodecException, codecs.get_codec, 'noexist')
+
+    @unittest.skipIf(codecs.msgpack is None, 'msgpack is not installed')
+    def testMsgpackRoundTrip(self):
+        """ Encode and decode with msgpack, including exceptions. """
+
+        data = codecs.encode(('a', 1, ValueError('test'),), 'msgpack')
+        self.assertEqual(codecs.MsgpackCodec.codec_id, data[0])
+        value, codec = codecs.decode(data)
+        self.assertEqual('msgpack', codec.name)
+        self.assertEqual(['a', 1], value[:2])
+        self.assertIsInstance(value[2], RemoteException)
+        self.assertEqual(('ValueError', 'test',), value[2].args)
+
+
+# pylint: disable=C0103,R0904
+class CompressionTests(unittest.TestCase):
+
+    """ Payload compression unit tests """
+
+    def tearDown(self):
+        """ Restore the default compression. """
+
+        codecs.COMPRESSION = 'zlib'
+
+    def testSmallPayload(self):
+        """ Leave payloads under the threshold alone. """
+
+        self.assertEqual(0, codecs.encode('a' * 100)[1])
+
+    def testLargePayload(self):
+        """ Compress payloads over the threshold and flag them. """
+
+        value = 'a' * (codecs.COMPRESS_THRESHOLD + 1)
+        data = codecs.encode(value)
+        self.assertEqual(codecs.FLAG_ZLIB, data[1])
+        self.assertLess(len(data), len(value))
+        self.assertEqual(value, codecs.decode(data)[0])
+
+    def testIncompressiblePayload(self):
+        """ Send incompressible payloads uncompressed. """
+
+        value = os.urandom(codecs.COMPRESS_THRESHOLD * 2)
+        data = codecs.encode(value)
+        self.assertEqual(0, data[1])
+        self.assertEqual(value, codecs.decode(data)[0])
+
+    @unittest.skipIf(codecs.lz4 is None, 'lz4 is not installed')
+    def testLz4(self):
+        """ Compress with lz4. """
+
+        codecs.COMPRESSION = 'lz4'
+        value = 'a' * (codecs.COMPRESS_THRESHOLD + 1)
+        data = codecs.encode(value)
+        self.assertEqual(codecs.FLAG_LZ4, data[1])
+        self.assertEqual(value, codecs.decode(data)[0])
+
+
+class OutOfBandTests(unittest.TestCase):
+
+    """ Out-of-band payload unit tests """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Create an Actor and lower the out-of-band threshold. """
+
+        cls.redis = get_redis_connection()
+        cls.value = os.urandom(4096)
+        codecs.OOB_THRESHOLD = 1024
+        cls.actor = CodecTestActor(uuid='noexist_oob')
+        cls.actor.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Kill the Actor and restore the threshold. """
+
+        codecs.OOB_THRESHOLD = 1024 * 1024
+        cls.actor.stop()
+        Registry().unregister('noexist_oob')
+
+    def testRedisKey(self):
+        """ Send large payloads through an expiring redis key. """
+
+        data = codecs.encode(self.value, redis=self.redis)
+        self.assertTrue(data[1] & codecs.FLAG_KEY)
+        self.assertLess(len(data), 100)
+        key = data[codecs.HEADER.size:]
+        self.assertGreater(self.redis.pttl(key), 0)
+        self.assertEqual(self.value, codecs.decode(data, self.redis)[0])
+
+    def testExpiredKey(self):
+        """ Raise CodecException when the payload has expired. """
+
+        data = codecs.encode(self.value, redis=self.redis)
+        self.redis.delete(data[codecs.HEADER.size:])
+        self.assertRaises(CodecException, codecs.decode, data, self.redis)
+
+    @unittest.skipIf(codecs.shared_memory is None,
+                     'shared memory is not available')
+    def testSharedMemory(self):
+        """ Send large payloads to this host through shared memory. """
+
+        data = codecs.encode(self.value, redis=self.redis, local=True)
+        self.assertTrue(data[1] & codecs.FLAG_SHM)
+        self.assertFalse(data[1] & codecs.FLAG_KEY)
+        self.assertEqual(self.value, codecs.decode(data)[0])
+        # the receiver unlinks the block
+        self.assertRaises(PayloadLostException, codecs.decode, data)
+
+    @unittest.skipIf(codecs.shared_memory is None,
+                     'shared memory is not available')
+    def testDiscard(self):
+        """ Free the shared memory of a message that reached nobody. """
+
+        data = codecs.encode(self.value, local=True)
+        codecs.discard(data)
+        self.assertRaises(PayloadLostException, codecs.decode, data)
+
+    @unittest.skipIf(codecs.shared_memory is None,
+                     'shared memory is not available')
+    def testSweep(self):
+        """ Unlink shared memory nobody read once OOB_TTL has passed. """
+
+        codecs.OOB_TTL = 10
+
+        try:
+            data = codecs.encode(self.value, local=True)
+        finally:
+            codecs.OOB_TTL = 60000
+
+        sleep(0.05)
+        codecs._sweep()  # pylint: disable=W0212
+        self.assertRaises(PayloadLostException, codecs.decode, data)
+
+    @unittest.skipIf(codecs.SHM_DOMAIN == codecs.HOST,
+                     'shared memory IDs are not available')
+    def testSameHostName(self):
+        """ Share memory only with processes that can reach it. """
+
+        self.assertTrue(codecs.is_local(codecs.reply_channel_id()))
+        # e.g. another container with the same host name
+        self.assertFalse(codecs.is_local('%s:%s' % (codecs.HOST, uuid4())))
+
+    def testLostCall(self):
+        """ Answer a call whose payload is gone with the error. """
+
+        replies = Replies()
+        future = Future()
+        uuid = str(uuid4())
+        replies.expect(uuid, lambda reply: future.set_exception(reply[1]))
+        data = codecs.encode((uuid, replies.proxyid, 'echo', (self.value,),
+                              {},), redis=self.redis)
+        self.assertTrue(data[1] & codecs.FLAG_STUB)
+        self.redis.delete(data[codecs.HEADER.size:].split(b'\0')[0])
+        self.redis.publish('actor:noexist_oob', data)
+
+        try:
+            self.assertRaises(PayloadLostException, future.get, timeout=1)
+        finally:
+            replies.forget(uuid)
+
+    def testLostReply(self):
+        """ Fail the call whose reply payload is gone. """
+
+        replies = Replies()
+        received = []
+        uuid = str(uuid4())
+        replies.expect(uuid, received.append)
+        data = codecs.encode((uuid, self.value, 1, False, False,),
+                             redis=self.redis)
+        self.redis.delete(data[codecs.HEADER.size:].split(b'\0')[0])
+
+        try:
+            replies._route({'data': data})  # pylint: disable=W0212
+        finally:
+            replies.forget(uuid)
+
+        self.assertEqual(1, len(received))
+        self.assertIsInstance(received[0][1], PayloadLostException)
+        self.assertTrue(received[0][3])
+
+    def testSmallPayload(self):
+        """ Send small payloads inline. """
+
+        data = codecs.encode(b'a', redis=self.redis, local=True)
+        self.assertEqual(0, data[1])
+
+    def testLocalProxy(self):
+        """ Round-trip a large call and reply through a local proxy. """
+
+        # pylint: disable=E1101
+        self.assertEqual(self.value,
+                         self.actor.proxy().echo(self.value).get(timeout=1))
+
+    def testRemoteProxy(self):
+        """ Round-trip a large call and reply through a proxy by UUID. """
+
+        proxy = ActorProxy(uuid='noexist_oob')
+        # pylint: disable=E1101
+        self.assertEqual(self.value, proxy.echo(self.value).get(timeout=1))
+
+
+@unittest.skipIf(codecs.msgpack is None, 'msgpack is not installed')
+class MsgpackActorTests(unittest.TestCase):
+
+    """ Calls to an Actor over msgpack """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Create an Actor and an msgpack ActorProxy for it. """
+
+        cls.actor = CodecTestActor(uuid='noexist_codec')
+        cls.actor.start()
+        cls.proxy = ActorProxy(uuid='noexist_codec', codec='msgpack')
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Kill the Actor. """
+
+        cls.actor.stop()
+        Registry().unregister('noexist_codec')
+
+    def testMethodCall(self):
+        """ Reply in the codec the call was made with. """
+
+        # pylint: disable=E1101
+        self.assertEqual({'a': [1, 2]},
+                         self.proxy.echo({'a': (1, 2,)}).get(timeout=1))
+
+    def testException(self):
+        """ Raise remote exceptions as RemoteException. """
+
+        # pylint: disable=E1101
+        with self.assertRaises(RemoteException) as context:
+            self.proxy.fail().get(timeout=1)
+
+        self.assertEqual('ValueError', context.exception.args[0])
+
+    def testLargeResult(self):
+        """ Round-trip a compressed argument and result. """
+
+        value = 'a' * (codecs.COMPRESS_THRESHOLD * 4)
+        # pylint: disable=E1101
+        self.assertEqual(value, self.proxy.echo(value).get(timeout=1))
+
+    def testUnencodableResult(self):
+        """ Raise RemoteException when the result can't be encoded. """
+
+        # pylint: disable=E1101
+        self.assertRaises(RemoteException,
+                          self.proxy.unencodable().get, timeout=1)
+
+    def testActorCodec(self):
+        """ Make an Actor's proxies use its codec. """
+
+        actor = CodecTestActor(uuid='noexist_codec_actor', codec='msgpack')
+        actor.start()
+
+        try:
+            # pylint: disable=E1101
+            self.assertEqual([1, 2],
+                             actor.proxy().echo((1, 2)).get(timeout=1))
+        finally:
+            actor.stop()
+            Registry().unregister('noexist_codec_actor')
+
+
+if __name__ == '__main__':
+    unittest.main()
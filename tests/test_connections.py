@@ -0,0 +1,91 @@
+""" Connection pool unit tests for rodario framework """
+
+# stdlib
+import unittest
+
+# 3rd party
+from redis import BlockingConnectionPool, UnixDomainSocketConnection
+
+# local
+from rodario import connections, get_redis_connection
+from rodario.actors import AsyncActorProxy
+from rodario.connections import get_async_redis_connection, get_pool
+
+
+# pylint: disable=C0103,R0904,W0212
+class ConnectionTests(unittest.TestCase):
+
+    """ Shared connection pool unit tests """
+
+    def tearDown(self):
+        """ Forget the pools created by the tests. """
+
+        for url in ('redis://localhost:6379/1', 'unix:///tmp/noexist.sock'):
+            connections._POOLS.pop(url, None)
+
+    def testSharedPool(self):
+        """ Share one pool per URL. """
+
+        first = get_redis_connection()
+        second = get_redis_connection()
+        self.assertIs(first.connection_pool, second.connection_pool)
+        self.assertIs(get_pool(), first.connection_pool)
+        self.assertIsNot(get_pool(), get_pool('redis://localhost:6379/1'))
+        self.assertTrue(first.ping())
+
+    def testHealthCheck(self):
+        """ Check idle connections. """
+
+        self.assertEqual(connections.REDIS_HEALTH_CHECK_INTERVAL,
+                         get_pool().connection_kwargs['health_check_interval'])
+
+    def testMaxConnections(self):
+        """ Block on a full pool instead of failing. """
+
+        default = connections.REDIS_MAX_CONNECTIONS
+        connections.REDIS_MAX_CONNECTIONS = 2
+
+        try:
+            pool = get_pool('redis://localhost:6379/1')
+        finally:
+            connections.REDIS_MAX_CONNECTIONS = default
+
+        self.assertIsInstance(pool, BlockingConnectionPool)
+        self.assertEqual(2, pool.max_connections)
+
+    def testUnixSocket(self):
+        """ Connect through a unix socket. """
+
+        pool = get_pool('unix:///tmp/noexist.sock')
+        self.assertIs(UnixDomainSocketConnection, pool.connection_class)
+        self.assertEqual('/tmp/noexist.sock', pool.connection_kwargs['path'])
+
+
+# pylint: disable=C0103
+class AsyncConnectionTests(unittest.IsolatedAsyncioTestCase):
+
+    """ Shared asyncio connection pool unit tests """
+
+    async def testSharedPool(self):
+        """ Share one client per event loop. """
+
+        first = get_async_redis_connection()
+        self.assertIs(first, get_async_redis_connection())
+        self.assertTrue(await first.ping())
+
+    async def testLazyClients(self):
+        """ Use the running loop's client in objects made without a loop. """
+
+        # pylint: disable=W0212
+        proxy = AsyncActorProxy(uuid='noexist_connections')
+        self.assertIs(get_async_redis_connection(), proxy._redis)
+
+    def testNoLoop(self):
+        """ Give a client requested outside any event loop its own pool. """
+
+        first = get_async_redis_connection()
+        second = get_async_redis_connection()
+        self.assertIsNot(first.connection_pool, second.connection_pool)
+
+if __name__ == '__main__':
+    unittest.main()
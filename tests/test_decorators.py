@@ -1,7 +1,9 @@
 """ Decorators unit tests for rodario framework """
 
 # stdlib
+import inspect
 import unittest
+from threading import Thread
 from time import time, sleep
 
 # local
@@ -80,6 +82,26 @@ class TestActor(Actor):
 
         return 3
 
+    @singular(context='decorators_test', expiry=0.5)
+    def test_parameters(self):
+        """ Singular method with parameters. """
+
+        return self._redis.pttl('decorators_test:test_parameters')
+
+    @singular
+    def test_raises(self):
+        """ Singular method that raises. """
+
+        raise ValueError('test')
+
+    @DecoratedMethod
+    def test_self(self):
+        """ Return the instance. """
+
+        sleep(0)
+
+        return self
+
     @before_hook
     def test_before(self):
         """ Test the before-hook binding. """
@@ -155,6 +177,53 @@ class DecoratorsTests(unittest.TestCase):
         self.actor.part('decorators_test')
         self.costar.part('decorators_test')
 
+    def testSingularParameters(self):
+        """ Honour the lock context and expiry. """
+
+        ttl = self.actor.test_parameters()
+        self.assertGreater(ttl, 0)
+        self.assertLessEqual(ttl, 500)
+        self.assertFalse(self._redis.exists('decorators_test:test_parameters'))
+
+    def testSingularReleasesOnError(self):
+        """ Release the lock when the method raises. """
+
+        self.assertRaises(ValueError, self.actor.test_raises)
+        self.assertFalse(self._redis.exists('global.lock:test_raises'))
+
+    def testBoundPerInstance(self):
+        """ Bind each instance's decorated methods to that instance. """
+
+        method = self.actor.test_both
+        self.assertIs(method, self.actor.__dict__['test_both'])
+        self.assertIs(self.actor, method.__self__)
+        self.assertIsNot(method, self.costar.test_both)
+        self.assertIn('before_hook', inspect.getattr_static(
+            self.actor, 'test_both').decorations)
+
+    def testThreadSafety(self):
+        """ Never run a method against another instance. """
+
+        wrong = []
+
+        def call(actor):
+            """ Call the decorated method repeatedly. """
+
+            for _ in range(2000):
+                if actor.test_self() is not actor:
+                    wrong.append(actor)
+
+        threads = [Thread(target=call, args=(actor,))
+                   for actor in (self.actor, self.costar) * 2]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([], wrong)
+
     def testBeforeHook(self):
         """ Test the before-hook function binding. """
 
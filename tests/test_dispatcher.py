@@ -0,0 +1,127 @@
+""" Dispatcher unit tests for rodario framework """
+
+# stdlib
+import unittest
+from threading import Event
+
+# 3rd party
+import redis
+
+# local
+from rodario.actors import Actor, ClusterProxy
+from rodario.dispatcher import Dispatcher
+from rodario.registry import Registry
+
+
+# pylint: disable=R0201
+class SharedActor(Actor):
+
+    """ Stubbed Actor class on the shared dispatcher """
+
+    shared = True
+
+    def test(self):
+        """ Simple method call. """
+
+        return self.uuid
+
+
+# pylint: disable=C0103,R0904
+class DispatcherTests(unittest.TestCase):
+
+    """ Dispatcher unit tests """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Create two shared Actors. """
+
+        cls.registry = Registry()
+        cls.actor = SharedActor(uuid='noexist_dispatcher')
+        cls.costar = SharedActor(uuid='noexist_dispatcher2')
+        cls.actor.start()
+        cls.costar.start()
+        cls.redis = redis.StrictRedis()
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Kill the Actors. """
+
+        for actor in (cls.actor, cls.costar):
+            actor.stop()
+            cls.registry.unregister(actor.uuid)
+
+    def testSingleton(self):
+        """ Share one dispatcher between actors. """
+
+        # pylint: disable=W0212
+        self.assertIs(self.actor._pump, self.costar._pump)
+        self.assertIs(Dispatcher(), self.actor._pump)
+
+    def testProxiedMethod(self):
+        """ Route calls to the right actor over the shared connection. """
+
+        self.assertEqual('noexist_dispatcher',
+                         self.actor.proxy().test().get(timeout=1))
+        self.assertEqual('noexist_dispatcher2',
+                         self.costar.proxy().test().get(timeout=1))
+
+    def testClusterFanout(self):
+        """ Deliver a cluster call to every local member. """
+
+        self.actor.join('dispatcher_test')
+        self.costar.join('dispatcher_test')
+        future = ClusterProxy('dispatcher_test').test()
+        # both actors share one subscriber connection, but both answer
+        self.assertEqual(2, future.get(timeout=1))
+        results = set((future.get(timeout=1), future.get(timeout=1)))
+        self.assertSetEqual(set(('noexist_dispatcher', 'noexist_dispatcher2')),
+                            results)
+        self.actor.part('dispatcher_test')
+        self.costar.part('dispatcher_test')
+        self.assertNotIn('cluster:dispatcher_test', Dispatcher().channels)
+
+    def testPartNotJoined(self):
+        """ Keep other actors' handlers when parting an unjoined channel. """
+
+        self.actor.join('dispatcher_part')
+        self.costar.part('dispatcher_part')
+        self.assertIn('cluster:dispatcher_part', Dispatcher().channels)
+        self.actor.part('dispatcher_part')
+        self.actor.part('dispatcher_part')
+        self.assertNotIn('cluster:dispatcher_part', Dispatcher().channels)
+
+    def testHandlerError(self):
+        """ Keep routing after a handler raises. """
+
+        received = Event()
+
+        def broken(message):  # pylint: disable=W0613
+            """ Raise an error. """
+
+            raise ValueError()
+
+        dispatcher = Dispatcher()
+        dispatcher.subscribe(dispatcher_error=broken)
+        dispatcher.subscribe(dispatcher_error=lambda message: received.set())
+        self.redis.publish('dispatcher_error', 'test')
+        self.assertTrue(received.wait(1))
+        dispatcher.unsubscribe('dispatcher_error')
+        self.assertNotIn('dispatcher_error', dispatcher.channels)
+
+    def testStop(self):
+        """ Leave the dispatcher's channels when stopped and rejoin. """
+
+        actor = SharedActor()
+        actor.start()
+        channel = 'actor:%s' % actor.uuid
+        self.assertIn(channel, Dispatcher().channels)
+        actor.stop()
+        self.assertNotIn(channel, Dispatcher().channels)
+        actor.start()
+        self.assertIn(channel, Dispatcher().channels)
+        actor.stop()
+        self.registry.unregister(actor.uuid)
+
+
+if __name__ == '__main__':
+    unittest.main()
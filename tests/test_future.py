@@ -0,0 +1,184 @@
+""" Future unit tests for rodario framework """
+
+# stdlib
+import unittest
+from threading import Timer
+from time import time
+
+# local
+from rodario.future import ClusterFuture, Future
+from rodario.exceptions import FutureTimeoutException
+
+
+# pylint: disable=C0103,R0904
+class FutureTests(unittest.TestCase):
+
+    """ Future unit tests """
+
+    def testResult(self):
+        """ Return the result, and keep returning it. """
+
+        future = Future()
+        self.assertFalse(future.ready)
+        future.set_result(1)
+        self.assertTrue(future.ready)
+        self.assertTrue(future.done)
+        self.assertEqual(1, future.get())
+        self.assertEqual(1, future.get(timeout=0))
+
+    def testWaitForResult(self):
+        """ Block until a result arrives from another thread. """
+
+        future = Future()
+        Timer(0.1, future.set_result, (1,)).start()
+        self.assertEqual(1, future.get(timeout=1))
+
+    def testTimeout(self):
+        """ Raise FutureTimeoutException when no value arrives. """
+
+        future = Future()
+        self.assertRaises(FutureTimeoutException, future.get, timeout=0.01)
+        self.assertRaises(FutureTimeoutException, future.get, False)
+
+    def testException(self):
+        """ Raise the exception the future was completed with. """
+
+        future = Future()
+        future.set_exception(ValueError('test'))
+        self.assertTrue(future.ready)
+        self.assertRaises(ValueError, future.get)
+        self.assertRaises(ValueError, future.get)
+
+    def testIntermediateValues(self):
+        """ Hand out intermediate values in order before the final one. """
+
+        future = Future()
+        future.put(1)
+        future.put_exception(ValueError('test'))
+        future.set_result(3)
+        self.assertEqual(1, future.get())
+        self.assertRaises(ValueError, future.get)
+        self.assertEqual(3, future.get())
+        self.assertEqual(3, future.get())
+
+    def testDoneCallback(self):
+        """ Fire done callbacks on completion, or immediately once done. """
+
+        calls = []
+        future = Future()
+        future.add_done_callback(calls.append)
+        future.put(1)
+        self.assertEqual([], calls)
+        future.set_result(2)
+        self.assertEqual([future], calls)
+        future.add_done_callback(calls.append)
+        self.assertEqual([future, future], calls)
+
+    def testFirstOutcomeWins(self):
+        """ Ignore values that arrive after the future is done. """
+
+        future = Future()
+        future.set_result(1)
+        future.set_result(2)
+        future.set_exception(ValueError('test'))
+        self.assertEqual(1, future.get())
+
+
+# pylint: disable=C0103,R0904
+class ClusterFutureTests(unittest.TestCase):
+
+    """ ClusterFuture unit tests """
+
+    def setUp(self):
+        """ Create a future for a cluster call. """
+
+        self.future = ClusterFuture()
+
+    def testGet(self):
+        """ Return the count and then each result, once complete. """
+
+        self.future.add_result(False)
+        self.future.add_result(2)
+        self.assertFalse(self.future.ready)
+        self.assertRaises(FutureTimeoutException, self.future.get, timeout=0)
+        self.future.finish(3)
+        self.assertEqual(3, self.future.get(timeout=0))
+        self.assertEqual(False, self.future.get(timeout=0))
+        self.assertEqual(2, self.future.get(timeout=0))
+
+    def testDoneCallback(self):
+        """ Complete the future, and fire its callbacks once, on finish. """
+
+        calls = []
+        self.future.add_done_callback(calls.append)
+        self.future.add_result(1)
+        self.assertFalse(self.future.done)
+        self.future.finish()
+        self.assertTrue(self.future.done)
+        self.assertEqual([self.future], calls)
+        self.future.finish()
+        self.assertEqual([self.future], calls)
+
+    def testFinishAfterException(self):
+        """ Don't fire callbacks again when finishing a failed future. """
+
+        calls = []
+        self.future.add_done_callback(calls.append)
+        self.future.set_exception(ValueError('test'))
+        self.future.finish()
+        self.assertEqual([self.future], calls)
+        self.assertTrue(self.future.complete)
+        self.assertRaises(ValueError, self.future.get, timeout=0)
+
+    def testAsCompleted(self):
+        """ Iterate over results in arrival order until complete. """
+
+        self.future.add_result(1)
+        Timer(0.05, self.future.add_result, (False,)).start()
+        Timer(0.1, self.future.add_result, (3,)).start()
+        Timer(0.2, self.future.finish).start()
+        self.assertEqual([1, False, 3], list(self.future.as_completed(1)))
+        self.assertTrue(self.future.complete)
+
+    def testDeadline(self):
+        """ Return the partial results once the deadline passes. """
+
+        self.future.add_result(1)
+        start = time()
+        self.assertEqual([1], self.future.gather(timeout=0.1))
+        self.assertLess(time() - start, 1)
+        self.assertFalse(self.future.complete)
+
+    def testQuorum(self):
+        """ Stop gathering once enough results have arrived. """
+
+        self.future.add_result(1)
+        Timer(0.05, self.future.add_result, (2,)).start()
+        self.assertEqual([1, 2], self.future.gather(quorum=2, timeout=5))
+
+    def testReduce(self):
+        """ Fold results as they arrive. """
+
+        for value in (1, 2, 3):
+            self.future.add_result(value)
+
+        self.future.finish()
+        self.assertEqual(6, self.future.reduce(lambda a, b: a + b, 0))
+        self.assertEqual(3, self.future.reduce(lambda a, b: a + b, 0,
+                                               quorum=2))
+
+    def testExceptions(self):
+        """ Raise members' exceptions, or return them on request. """
+
+        error = ValueError('test')
+        self.future.add_result(1)
+        self.future.add_exception(error)
+        self.future.finish()
+        self.assertRaises(ValueError, self.future.gather)
+        self.assertEqual([1, error],
+                         self.future.gather(return_exceptions=True))
+        self.assertEqual([1], self.future.results)
+
+
+if __name__ == '__main__':
+    unittest.main()
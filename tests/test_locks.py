@@ -0,0 +1,107 @@
+""" Lock unit tests for rodario framework """
+
+# stdlib
+import unittest
+from time import sleep, time
+from uuid import uuid4
+
+# 3rd party
+import redis
+
+# local
+from rodario.locks import LOCK_STATS, RedisLock
+from rodario.util import acquire_lock
+
+
+# pylint: disable=C0103,R0904
+class LockTests(unittest.TestCase):
+
+    """ RedisLock unit tests """
+
+    def setUp(self):
+        """ Pick a fresh lock name. """
+
+        self.redis = redis.StrictRedis()
+        self.name = 'lock_test:%s' % uuid4()
+        self.key = 'global.lock:%s' % self.name
+
+    def tearDown(self):
+        """ Remove the lock. """
+
+        self.redis.delete(self.key)
+
+    def testAcquire(self):
+        """ Acquire a free lock (with a TTL) and refuse a held one. """
+
+        lock = RedisLock(self.name)
+        self.assertTrue(lock.acquire())
+        self.assertTrue(lock.held)
+        self.assertGreater(self.redis.pttl(self.key), 0)
+        self.assertFalse(RedisLock(self.name).acquire())
+        self.assertTrue(lock.release())
+        self.assertFalse(self.redis.exists(self.key))
+
+    def testContext(self):
+        """ Prefix the lock name with its context. """
+
+        lock = RedisLock(self.name, context='lock_test')
+
+        with lock as acquired:
+            self.assertTrue(acquired)
+            self.assertTrue(self.redis.exists('lock_test:%s' % self.name))
+
+        self.assertFalse(lock.held)
+
+    def testMillisecondExpiry(self):
+        """ Expire locks to the millisecond. """
+
+        self.assertTrue(RedisLock(self.name, expiry=0.05).acquire())
+        self.assertLessEqual(self.redis.pttl(self.key), 50)
+        sleep(0.1)
+        self.assertTrue(RedisLock(self.name).acquire())
+
+    def testReleaseTakenOver(self):
+        """ Leave a lock alone once someone else has taken it over. """
+
+        lock = RedisLock(self.name, expiry=0.05)
+        self.assertTrue(lock.acquire())
+        sleep(0.1)
+        other = RedisLock(self.name)
+        self.assertTrue(other.acquire())
+        self.assertFalse(lock.release())
+        self.assertTrue(self.redis.exists(self.key))
+        self.assertFalse(lock.renew())
+
+    def testAutoRenew(self):
+        """ Keep a lock alive past its expiry while it is held. """
+
+        lock = RedisLock(self.name, expiry=0.1, renew=True)
+        self.assertTrue(lock.acquire())
+        sleep(0.3)
+        self.assertFalse(RedisLock(self.name).acquire())
+        self.assertTrue(lock.release())
+        self.assertGreater(LOCK_STATS[self.key]['renewed'], 0)
+
+    def testLegacyLock(self):
+        """ Take over stale locks left without a TTL by older versions. """
+
+        self.redis.set(self.key, time() + 60)
+        self.assertFalse(acquire_lock(self.name, conn=self.redis))
+        self.redis.set(self.key, time() - 10)
+        self.assertTrue(acquire_lock(self.name, conn=self.redis))
+        self.assertGreater(self.redis.pttl(self.key), 0)
+
+    def testStats(self):
+        """ Count acquisitions, contention and releases. """
+
+        lock = RedisLock(self.name)
+        lock.acquire()
+        RedisLock(self.name).acquire()
+        lock.release()
+        self.assertEqual(1, LOCK_STATS[self.key]['acquired'])
+        self.assertEqual(1, LOCK_STATS[self.key]['contended'])
+        self.assertEqual(1, LOCK_STATS[self.key]['released'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,13 +2,16 @@
 
 # stdlib
 import unittest
+from threading import Thread
 from time import sleep
 
 # local
 from rodario.registry import Registry
 from rodario.actors import Actor, ActorProxy
+from rodario.decorators import oneway
 from rodario.future import Future
-from rodario.exceptions import InvalidActorException, InvalidProxyException
+from rodario.exceptions import (InvalidActorException, InvalidProxyException,
+                                UnknownMethodException)
 
 
 # pylint: disable=R0201
@@ -21,6 +24,11 @@ class TestActor(Actor):
 
         return 1
 
+    def fail(self):
+        """ Raise an exception. """
+
+        raise ValueError('test')
+
     def delay(self):
         """ Delayed method call for testing ready property of Future. """
 
@@ -28,6 +36,28 @@ class TestActor(Actor):
 
         return 1
 
+    def append(self, items):
+        """ Append to a list and return it. """
+
+        items.append(1)
+
+        return items
+
+    @oneway
+    def notify(self, value):
+        """ Record a value, without replying. """
+
+        self.notified = value  # pylint: disable=W0201
+
+    def count(self):
+        """ Increment a counter slowly (racy unless calls are serialized). """
+
+        value = getattr(self, 'counter', 0)
+        sleep(0.001)
+        self.counter = value + 1  # pylint: disable=W0201
+
+        return self.counter
+
 
 # pylint: disable=C0103,R0904
 class ProxyTests(unittest.TestCase):
@@ -94,6 +124,55 @@ class ProxyTests(unittest.TestCase):
         response = self.proxy.test().get(timeout=1)
         self.assertEqual(1, response)
 
+    def testProxyException(self):
+        """ Raise the Actor's exception from the Future. """
+
+        # pylint: disable=E1101
+        self.assertRaises(ValueError, self.proxy.fail().get, timeout=1)
+
+    def testUnknownMethod(self):
+        """ Reject a call to a method the Actor doesn't expose. """
+
+        # pylint: disable=W0212
+        future = self.proxy._proxy('missing')
+        self.assertRaises(UnknownMethodException, future.get, timeout=1)
+
+    def testInterfaceFromRegistry(self):
+        """ Build a proxy by UUID without asking the Actor. """
+
+        actor = TestActor()
+
+        try:
+            # the actor isn't running, so it couldn't answer
+            proxy = ActorProxy(uuid=actor.uuid)
+            self.assertTrue(hasattr(proxy, 'test'))
+            self.assertFalse(hasattr(proxy, 'missing'))
+        finally:
+            Registry().unregister(actor.uuid)
+
+    def testLazy(self):
+        """ Proxy any public attribute without discovery. """
+
+        proxy = ActorProxy(uuid='noexist_proxy', lazy=True)
+        self.assertEqual(1, proxy.test().get(timeout=1))
+        self.assertRaises(AttributeError, getattr, proxy, '_missing')
+
+    def testOneWayMethod(self):
+        """ Call a one-way method without waiting for a reply. """
+
+        proxy = ActorProxy(uuid='noexist_proxy')
+        self.assertIsNone(proxy.notify(1))
+        # calls run in order, so notify has run once this one answers
+        proxy.test().get(timeout=1)
+        self.assertEqual(1, self.actor.notified)
+        self.assertEqual({}, proxy._futures)  # pylint: disable=W0212
+
+    def testOneWayCall(self):
+        """ Make any call one-way. """
+
+        self.assertIsNone(self.proxy.append.oneway([]))
+        self.assertEqual(1, self.proxy.test().get(timeout=1))
+
     def testInvalidProxy(self):
         """ Raise InvalidActorException when proxying to an invalid actor. """
 
@@ -103,13 +182,91 @@ class ProxyTests(unittest.TestCase):
         # pylint: disable=W0212
         self.assertRaises(InvalidActorException, falseproxy._proxy, None)
 
-    def testMissingPubSub(self):
-        """ Fail silently when _pubsub is deleted (simulates shutdown). """
+    def testSharedReplyChannel(self):
+        """ Share one reply channel between all proxies in the process. """
+
+        proxy = ActorProxy(uuid='noexist_proxy')
+        self.assertEqual(self.proxy.proxyid, proxy.proxyid)
+        self.assertEqual(1, proxy.test().get(timeout=1))
+        self.assertEqual(1, self.proxy.test().get(timeout=1))
+
+
+# pylint: disable=C0103,R0904
+class LocalProxyTests(unittest.TestCase):
+
+    """ In-process ActorProxy unit tests """
+
+    def setUp(self):
+        """ Create an Actor (never started; local calls don't need redis). """
+
+        self.actor = TestActor()
+        self.proxy = self.actor.proxy(local=True)
+
+    def tearDown(self):
+        """ Kill the Actor. """
+
+        self.actor.stop()
+        Registry().unregister(self.actor.uuid)
+
+    def testCallAndResponse(self):
+        """ Resolve a Future without going through redis. """
+
+        response = self.proxy.test()  # pylint: disable=E1101
+        self.assertTrue(isinstance(response, Future))
+        self.assertEqual(1, response.get(timeout=1))
+
+    def testException(self):
+        """ Raise the Actor's exception from the Future. """
+
+        # pylint: disable=E1101
+        self.assertRaises(ValueError, self.proxy.fail().get, timeout=1)
+
+    def testOneWay(self):
+        """ Call a one-way method without a Future. """
+
+        self.assertIsNone(self.proxy.notify(2))
+        self.assertEqual(2, self.actor.notified)
+
+    def testSerialized(self):
+        """ Never run local calls alongside each other. """
+
+        # pylint: disable=E1101
+        threads = [Thread(target=lambda: [self.proxy.count().get(timeout=5)
+                                          for _ in range(10)])
+                   for _ in range(4)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(40, self.actor.counter)  # pylint: disable=E1101
+
+    def testNoCopy(self):
+        """ Share arguments with the Actor by default. """
+
+        items = []
+        # pylint: disable=E1101
+        self.assertIs(items, self.proxy.append(items).get(timeout=1))
+        self.assertEqual([1], items)
+
+    def testCopy(self):
+        """ Copy arguments and results on request. """
+
+        items = []
+        proxy = self.actor.proxy(local=True, copy=True)
+        result = proxy.append(items).get(timeout=1)  # pylint: disable=E1101
+        self.assertEqual([], items)
+        self.assertEqual([1], result)
+
+    def testStoppedActor(self):
+        """ Raise InvalidActorException when the Actor is stopped. """
+
+        self.actor.stop()
+        # pylint: disable=E1101
+        self.assertRaises(InvalidActorException, self.proxy.test)
 
-        newactor = Actor()
-        newactor.start()
-        proxy = newactor.proxy()
-        del proxy._pubsub
 
 if __name__ == '__main__':
     unittest.main()
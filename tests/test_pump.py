@@ -0,0 +1,94 @@
+""" MessagePump unit tests for rodario framework """
+
+# stdlib
+import unittest
+from threading import Event
+from time import time
+
+# 3rd party
+import redis
+
+# local
+from rodario.connections import get_pool
+from rodario.pump import MessagePump
+
+
+# pylint: disable=C0103,R0904
+class MessagePumpTests(unittest.TestCase):
+
+    """ MessagePump unit tests """
+
+    def setUp(self):
+        """ Create a pump and a redis connection. """
+
+        self.pump = MessagePump(timeout=5)
+        self.redis = redis.StrictRedis()
+
+    def tearDown(self):
+        """ Stop the pump. """
+
+        self.pump.stop()
+
+    def testHandlerFires(self):
+        """ Deliver a message to a subscribed handler. """
+
+        received = Event()
+        self.pump.subscribe(pump_test=lambda message: received.set())
+        self.pump.start()
+        self.redis.publish('pump_test', 'test')
+        self.assertTrue(received.wait(1))
+
+    def testStopIsPrompt(self):
+        """ Stop a blocked pump without waiting out its read timeout. """
+
+        self.pump.subscribe(pump_test=lambda message: None)
+        self.pump.start()
+        self.assertTrue(self.pump.is_alive)
+        start = time()
+        self.pump.stop()
+        self.assertFalse(self.pump.is_alive)
+        self.assertLess(time() - start, 5)
+
+    def testStartWithoutSubscriptions(self):
+        """ Idle without channels and pick up later subscriptions. """
+
+        received = Event()
+        self.pump.timeout = 0.1
+        self.pump.start()
+        self.pump.subscribe(pump_test=lambda message: received.set())
+        self.redis.publish('pump_test', 'test')
+        self.assertTrue(received.wait(1))
+
+    def testReleasesConnection(self):
+        """ Hand the connection back to the pool when stopped. """
+
+        pool = get_pool()
+        # pylint: disable=W0212
+        in_use = len(pool._in_use_connections)
+        pumps = [MessagePump(timeout=0.1) for _ in range(5)]
+
+        for pump in pumps:
+            pump.subscribe(pump_test=lambda message: None)
+            pump.start()
+
+        self.assertGreaterEqual(len(pool._in_use_connections), in_use + 5)
+
+        for pump in pumps:
+            pump.stop()
+
+        self.assertLessEqual(len(pool._in_use_connections), in_use)
+
+    def testRestart(self):
+        """ Subscribe to the same channels again when restarted. """
+
+        received = Event()
+        self.pump.subscribe(pump_test=lambda message: received.set())
+        self.pump.start()
+        self.pump.stop()
+        self.pump.start()
+        self.redis.publish('pump_test', 'test')
+        self.assertTrue(received.wait(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,10 +2,13 @@
 
 # stdlib
 import unittest
+from os import getpid
+from time import sleep, time
 
 # local
 from rodario.actors import Actor, ActorProxy
-from rodario.registry import Registry
+from rodario.codecs import HOST
+from rodario.registry import Registry, HEARTBEAT_TTL
 from rodario.exceptions import RegistrationException
 
 # 3rd party
@@ -21,7 +24,7 @@ class RegistryTestActor(Actor):
         super(RegistryTestActor, self).__init__()
 
 
-# pylint: disable=C0103,E1101
+# pylint: disable=C0103,E1101,W0212
 class RegistryTests(unittest.TestCase):
 
     """ Registry unit tests """
@@ -77,6 +80,215 @@ class RegistryTests(unittest.TestCase):
         actor.stop()
         actor.__del__()
 
+    def testInterface(self):
+        """ Publish an actor's interface alongside it. """
+
+        self.registry.register('noexist_registry', 'test.Interface:1',
+                               set(('one', 'two')), set(('two',)))
+        self.assertEqual((frozenset(('one', 'two')), frozenset(('two',))),
+                         self.registry.interface('noexist_registry'))
+        self.registry.unregister('noexist_registry')
+        self.assertIsNone(self.registry.interface('noexist_registry'))
+        self.redis.hdel(self.registry._interfaces, 'test.Interface:1')
+
+    def _expire(self, uuid):
+        """ Age an actor's last heartbeat past the TTL. """
+
+        self.redis.zadd(self.registry._heartbeats,
+                        {uuid: time() - HEARTBEAT_TTL - 1})
+
+    def testDeadActor(self):
+        """ Stop counting an actor once its heartbeats stop. """
+
+        self.registry.register('noexist_heartbeat')
+        self._expire('noexist_heartbeat')
+
+        try:
+            self.assertFalse(self.registry.exists('noexist_heartbeat'))
+            self.assertNotIn('noexist_heartbeat', self.registry.actors)
+            # its UUID is free again
+            self.registry.register('noexist_heartbeat')
+            self.assertTrue(self.registry.exists('noexist_heartbeat'))
+        finally:
+            self.registry.unregister('noexist_heartbeat')
+
+    def testReap(self):
+        """ Sweep dead actors from the registry. """
+
+        self.registry.register('noexist_heartbeat')
+        self.registry.unregister('noexist_heartbeat')
+        self.registry.register('noexist_heartbeat')
+        self.registry._tracked.pop('noexist_heartbeat')
+        self._expire('noexist_heartbeat')
+
+        try:
+            self.assertIn('noexist_heartbeat', self.registry.reap())
+            self.assertFalse(self.redis.sismember(self.registry._list,
+                                                  'noexist_heartbeat'))
+        finally:
+            self.registry.unregister('noexist_heartbeat')
+
+    def testHeartbeat(self):
+        """ Restore a live actor that was swept. """
+
+        self.registry.register('noexist_heartbeat')
+        self._expire('noexist_heartbeat')
+
+        try:
+            self.registry.reap()
+            self.registry.heartbeat()
+            self.assertTrue(self.registry.exists('noexist_heartbeat'))
+            self.assertTrue(self.redis.sismember(self.registry._list,
+                                                 'noexist_heartbeat'))
+        finally:
+            self.registry.unregister('noexist_heartbeat')
+
+    def testNotServing(self):
+        """ Skip heartbeats for an actor that isn't serving. """
+
+        serving = []
+        self.registry.register('noexist_heartbeat',
+                               serving=lambda: bool(serving))
+        self._expire('noexist_heartbeat')
+
+        try:
+            self.registry.heartbeat()
+            self.assertFalse(self.registry.exists('noexist_heartbeat'))
+            serving.append(True)
+            self.registry.heartbeat()
+            self.assertTrue(self.registry.exists('noexist_heartbeat'))
+        finally:
+            self.registry.unregister('noexist_heartbeat')
+
+    def testStoppedActor(self):
+        """ Let a stopped actor expire, and revive it once restarted. """
+
+        actor = RegistryTestActor()
+        actor.start()
+        actor.stop()
+        self._expire(actor.uuid)
+
+        try:
+            self.registry.heartbeat()
+            self.assertFalse(self.registry.exists(actor.uuid))
+            actor.start()
+            self.registry.heartbeat()
+            self.assertTrue(self.registry.exists(actor.uuid))
+        finally:
+            actor.stop()
+            self.registry.unregister(actor.uuid)
+
+    def testHeartbeatAfterUnregister(self):
+        """ Leave an actor unregistered during a heartbeat alone. """
+
+        self.registry.register('noexist_heartbeat')
+        self._expire('noexist_heartbeat')
+        self.registry.reap()
+        script = self.registry._heartbeat_script
+
+        def heartbeat(**kwargs):
+            """ Unregister the actor while the heartbeat is under way. """
+
+            swept = script(**kwargs)
+            self.registry.unregister('noexist_heartbeat')
+
+            return swept
+
+        self.registry._heartbeat_script = heartbeat
+
+        try:
+            self.registry.heartbeat()
+            self.assertFalse(self.registry.exists('noexist_heartbeat'))
+            self.assertFalse(self.redis.sismember(self.registry._list,
+                                                  'noexist_heartbeat'))
+        finally:
+            self.registry._heartbeat_script = script
+            self.registry.unregister('noexist_heartbeat')
+
+    def testLiveMembers(self):
+        """ Leave dead actors out of a channel's members. """
+
+        self.registry.register('noexist_heartbeat')
+        self.registry.join('noexist_channel', 'noexist_heartbeat')
+
+        try:
+            self.assertEqual(set(('noexist_heartbeat',)),
+                             self.registry.members('noexist_channel'))
+            self._expire('noexist_heartbeat')
+            self.assertEqual(set(), self.registry.members('noexist_channel'))
+        finally:
+            self.registry.part('noexist_channel', 'noexist_heartbeat')
+            self.registry.unregister('noexist_heartbeat')
+
+    def testScan(self):
+        """ Iterate over and count live actors. """
+
+        self.registry.register('noexist_scan')
+        self.registry.register('noexist_scan2')
+        self._expire('noexist_scan2')
+
+        try:
+            uuids = set(self.registry.scan(count=10))
+            self.assertIn('noexist_scan', uuids)
+            self.assertNotIn('noexist_scan2', uuids)
+            self.assertEqual(len(self.registry.actors), self.registry.count())
+        finally:
+            self.registry.unregister('noexist_scan')
+            self.registry.unregister('noexist_scan2')
+
+    def testMetadata(self):
+        """ Record an actor's metadata and index it. """
+
+        actor = RegistryTestActor()
+        actor.join('noexist_channel')
+
+        try:
+            metadata = self.registry.metadata(actor.uuid)
+            self.assertEqual('tests.test_registry.RegistryTestActor',
+                             metadata['class'])
+            self.assertEqual(HOST, metadata['host'])
+            self.assertEqual(getpid(), metadata['pid'])
+            self.assertEqual(set(('noexist_channel',)), metadata['channels'])
+            self.assertIn(actor.uuid,
+                          set(self.registry.by_class(RegistryTestActor)))
+            self.assertIn(actor.uuid, set(self.registry.by_host(HOST)))
+        finally:
+            self.registry.unregister(actor.uuid)
+
+        self.assertIsNone(self.registry.metadata(actor.uuid))
+        self.assertNotIn(actor.uuid,
+                         set(self.registry.by_class(RegistryTestActor)))
+        # unregistering also leaves the channels it joined
+        self.assertNotIn(actor.uuid.encode('utf-8'), self.redis.smembers(
+            self.registry._members_key('noexist_channel')))
+
+    def testExistsCache(self):
+        """ Serve exists() from memory until the actor changes. """
+
+        self.registry.enable_cache(ttl=60)
+
+        try:
+            self.assertFalse(self.registry.exists('noexist_cache'))
+            # a change made elsewhere is announced on the registry channel
+            self.redis.zadd(self.registry._heartbeats,
+                            {'noexist_cache': time()})
+            self.assertFalse(self.registry.exists('noexist_cache'))
+            self.redis.publish(self.registry._changes, 'noexist_cache')
+
+            for _ in range(100):
+                if self.registry.exists('noexist_cache'):
+                    break
+
+                sleep(0.01)
+
+            self.assertTrue(self.registry.exists('noexist_cache'))
+            # changes made here take effect right away
+            self.registry.unregister('noexist_cache')
+            self.assertFalse(self.registry.exists('noexist_cache'))
+        finally:
+            self.registry.disable_cache()
+            self.registry.unregister('noexist_cache')
+
     def testListActors(self):
         """ Test that a valid list of actors is returned upon request. """
 
@@ -0,0 +1,105 @@
+""" ShardedProxy unit tests for rodario framework """
+
+# stdlib
+import unittest
+from uuid import uuid4
+
+# local
+from rodario.actors import Actor, ShardedProxy
+from rodario.exceptions import EmptyClusterException
+from rodario.future import Future
+from rodario.registry import Registry
+
+
+# pylint: disable=R0201
+class ShardTestActor(Actor):
+
+    """ Stubbed Actor class for testing """
+
+    def owner(self, key):
+        """ Return this Actor's UUID. """
+
+        return self.uuid
+
+    def echo(self, key, value=None):
+        """ Return the key and value. """
+
+        return key, value
+
+
+# pylint: disable=C0103,R0904
+class ShardedProxyTests(unittest.TestCase):
+
+    """ ShardedProxy unit tests """
+
+    def setUp(self):
+        """ Create a cluster of Actors. """
+
+        self.channel = 'shard_test:%s' % uuid4()
+        self.actors = [ShardTestActor() for _ in range(4)]
+
+        for actor in self.actors:
+            actor.join(self.channel)
+            actor.start()
+
+        self.proxy = ShardedProxy(self.channel)
+
+    def tearDown(self):
+        """ Kill the Actors. """
+
+        for actor in self.actors:
+            actor.part(self.channel)
+            actor.stop()
+            Registry().unregister(actor.uuid)
+
+    def testMembership(self):
+        """ Track cluster members in the registry. """
+
+        self.assertEqual(set(actor.uuid for actor in self.actors),
+                         Registry().members(self.channel))
+
+    def testCall(self):
+        """ Pass the key (and the other arguments) to the owner. """
+
+        # pylint: disable=E1101
+        result = self.proxy.echo('key', value=1)
+        self.assertIsInstance(result, Future)
+        self.assertEqual(('key', 1), tuple(result.get(timeout=1)))
+
+    def testSameKeySameMember(self):
+        """ Route every call for a key to the member that owns it. """
+
+        # pylint: disable=E1101,W0212
+        for key in range(20):
+            owners = set(self.proxy.owner(key).get(timeout=1)
+                         for _ in range(3))
+            self.assertEqual({self.proxy._route(key)}, owners)
+
+    def testMinimalMovement(self):
+        """ Move only the departing member's keys when it leaves. """
+
+        # pylint: disable=W0212
+        keys = range(1000)
+        before = dict((key, self.proxy._route(key)) for key in keys)
+        self.assertEqual(4, len(set(before.values())))
+        gone = self.actors[0]
+        gone.part(self.channel)
+        self.proxy._refresh(force=True)
+        after = dict((key, self.proxy._route(key)) for key in keys)
+
+        for key in keys:
+            if before[key] != gone.uuid:
+                self.assertEqual(before[key], after[key])
+            else:
+                self.assertNotEqual(gone.uuid, after[key])
+
+    def testEmptyCluster(self):
+        """ Raise EmptyClusterException when the cluster has no members. """
+
+        # pylint: disable=E1101
+        proxy = ShardedProxy('shard_test:%s' % uuid4())
+        self.assertRaises(EmptyClusterException, proxy.owner, 'key')
+
+
+if __name__ == '__main__':
+    unittest.main()
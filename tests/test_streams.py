@@ -0,0 +1,313 @@
+""" Stream mailbox unit tests for rodario framework """
+
+# stdlib
+import unittest
+from threading import Event, Thread
+from time import time
+from uuid import uuid4
+
+# 3rd party
+import redis
+
+# local
+from rodario import codecs, streams
+from rodario.actors import Actor, ActorProxy
+from rodario.registry import Registry
+from rodario.streams import StreamPump
+
+
+# pylint: disable=R0201
+class DurableTestActor(Actor):
+
+    """ Stubbed durable Actor class for testing """
+
+    durable = True
+    #: Event that releases calls to :meth:`block`
+    release = Event()
+
+    def test(self):
+        """ Simple method call. """
+
+        return 1
+
+    def echo(self, value):
+        """ Return the argument. """
+
+        return value
+
+    def block(self):
+        """ Method call that waits to be released. """
+
+        return self.release.wait(5)
+
+
+# pylint: disable=C0103,R0904
+class StreamPumpTests(unittest.TestCase):
+
+    """ StreamPump unit tests """
+
+    def setUp(self):
+        """ Create a pump for a fresh stream. """
+
+        self.redis = redis.StrictRedis()
+        self.stream = 'stream_test:%s' % uuid4()
+        self.pump = StreamPump('consumer', timeout=5)
+        self.received = []
+        self.done = Event()
+
+    def tearDown(self):
+        """ Stop the pump and remove the stream. """
+
+        self.pump.stop()
+        self.redis.delete(self.stream)
+
+    def handler(self, message):
+        """ Collect message data. """
+
+        self.received.append(message['data'])
+
+        if len(self.received) == 3:
+            self.done.set()
+
+    def testBacklog(self):
+        """ Deliver messages sent before the pump subscribed. """
+
+        self.pump.subscribe(**{self.stream: lambda message: None})
+        self.pump.unsubscribe(self.stream)
+
+        for index in range(3):
+            streams.send(self.redis, self.stream, str(index))
+
+        self.pump.subscribe(**{self.stream: self.handler})
+        self.pump.start()
+        self.assertTrue(self.done.wait(1))
+        self.assertEqual([b'0', b'1', b'2'], self.received)
+
+    def testAcknowledge(self):
+        """ Acknowledge entries once they have been handled. """
+
+        self.pump.subscribe(**{self.stream: self.handler})
+        self.pump.start()
+
+        for index in range(3):
+            streams.send(self.redis, self.stream, str(index))
+
+        self.assertTrue(self.done.wait(1))
+        self.pump.stop()
+        pending = self.redis.xpending(self.stream, streams.STREAM_GROUP)
+        self.assertEqual(0, pending['pending'])
+
+    def testRedelivery(self):
+        """ Deliver entries again that were read but never acknowledged. """
+
+        self.pump.subscribe(**{self.stream: self.handler})
+
+        for index in range(3):
+            streams.send(self.redis, self.stream, str(index))
+
+        # read without acknowledging, as if the consumer had crashed
+        self.redis.xreadgroup(streams.STREAM_GROUP, 'consumer',
+                              {self.stream: '>'}, count=2)
+        self.pump.start()
+        self.assertTrue(self.done.wait(1))
+        self.assertEqual([b'0', b'1', b'2'], self.received)
+
+    def testDeferredAcknowledge(self):
+        """ Leave acknowledging to handlers that take it over. """
+
+        acks = []
+
+        def handler(message):
+            """ Hold on to the acknowledgement. """
+
+            acks.append(message.pop('ack'))
+            self.handler(message)
+
+        self.pump.subscribe(**{self.stream: handler})
+        self.pump.start()
+
+        for index in range(3):
+            streams.send(self.redis, self.stream, str(index))
+
+        self.assertTrue(self.done.wait(1))
+        pending = self.redis.xpending(self.stream, streams.STREAM_GROUP)
+        self.assertEqual(3, pending['pending'])
+        # a new subscription doesn't deliver the held entries again
+        self.pump.subscribe(**{self.stream: handler})
+        self.pump.stop()
+        self.assertEqual([b'0', b'1', b'2'], self.received)
+
+        for ack in acks:
+            ack()
+
+        pending = self.redis.xpending(self.stream, streams.STREAM_GROUP)
+        self.assertEqual(0, pending['pending'])
+
+    def testWait(self):
+        """ Read no more entries while one is still being handled. """
+
+        self.pump = StreamPump('consumer', timeout=5, batch=1, wait=True)
+        acks = []
+
+        def handler(message):
+            """ Hold on to the acknowledgement. """
+
+            acks.append(message.pop('ack'))
+            self.handler(message)
+
+        self.pump.subscribe(**{self.stream: handler})
+        self.pump.start()
+
+        for index in range(3):
+            streams.send(self.redis, self.stream, str(index))
+
+        self.assertFalse(self.done.wait(0.2))
+        self.assertEqual([b'0'], self.received)
+        acks[0]()
+        acks[0] = None
+        Event().wait(0.2)
+        self.assertEqual([b'0', b'1'], self.received)
+
+    def testClaim(self):
+        """ Take over entries another consumer left pending too long. """
+
+        self.pump = StreamPump('consumer', timeout=5, claim_idle=0.1)
+        self.pump.subscribe(**{self.stream: self.handler})
+
+        for index in range(3):
+            streams.send(self.redis, self.stream, str(index))
+
+        # read without acknowledging, as if another consumer had died
+        self.redis.xreadgroup(streams.STREAM_GROUP, 'dead',
+                              {self.stream: '>'}, count=2)
+        self.pump.start()
+        self.assertTrue(self.done.wait(1))
+        self.assertEqual([b'0', b'1', b'2'], sorted(self.received))
+        self.pump.stop()
+        pending = self.redis.xpending(self.stream, streams.STREAM_GROUP)
+        self.assertEqual(0, pending['pending'])
+
+    def testStopIsPrompt(self):
+        """ Stop a blocked pump without waiting out its read timeout. """
+
+        self.pump.subscribe(**{self.stream: self.handler})
+        self.pump.start()
+        streams.send(self.redis, self.stream, 'x')
+        self.assertTrue(self.pump.is_alive)
+        start = time()
+        self.pump.stop()
+        self.assertFalse(self.pump.is_alive)
+        self.assertLess(time() - start, 5)
+
+    def testMaxlen(self):
+        """ Trim mailboxes to roughly their maximum length. """
+
+        for index in range(1000):
+            streams.send(self.redis, self.stream, str(index), maxlen=10)
+
+        self.assertLess(self.redis.xlen(self.stream), 1000)
+
+
+# pylint: disable=C0103,R0904
+class DurableActorTests(unittest.TestCase):
+
+    """ Durable Actor unit tests """
+
+    def setUp(self):
+        """ Create a durable Actor. """
+
+        self.actor = DurableTestActor(timeout=5)
+        self.redis = redis.StrictRedis()
+
+    def tearDown(self):
+        """ Kill the Actor and remove its mailbox. """
+
+        self.actor.stop()
+        Registry().unregister(self.actor.uuid)
+        self.redis.delete('mailbox:%s' % self.actor.uuid)
+
+    def testCallWhileStopped(self):
+        """ Answer calls sent before the Actor started. """
+
+        proxy = self.actor.proxy()
+        future = proxy.test()  # pylint: disable=E1101
+        self.actor.start()
+        self.assertEqual(1, future.get(timeout=1))
+
+    def testAcknowledgeAfterRun(self):
+        """ Leave queued calls pending until they have run. """
+
+        DurableTestActor.release.clear()
+        self.actor.start()
+        # keep the mailbox busy, so the next call has to wait in it
+        busy = Thread(target=self.actor.proxy(local=True).block)
+        busy.start()
+        future = self.actor.proxy().test()  # pylint: disable=E1101
+        mailbox = 'mailbox:%s' % self.actor.uuid
+
+        for _ in range(100):
+            if self.redis.xpending(mailbox, streams.STREAM_GROUP)['pending']:
+                break
+
+            Event().wait(0.01)
+
+        # read, but still waiting to run
+        Event().wait(0.1)
+        pending = self.redis.xpending(mailbox, streams.STREAM_GROUP)
+        self.assertEqual(1, pending['pending'])
+        DurableTestActor.release.set()
+        self.assertEqual(1, future.get(timeout=1))
+        busy.join()
+
+        for _ in range(100):
+            pending = self.redis.xpending(mailbox, streams.STREAM_GROUP)
+
+            if not pending['pending']:
+                break
+
+            Event().wait(0.01)
+
+        self.assertEqual(0, pending['pending'])
+
+    def testMailboxOutlivesActor(self):
+        """ Keep an unregistered Actor's backlog for its next start. """
+
+        future = self.actor.proxy().test()  # pylint: disable=E1101
+        mailbox = 'mailbox:%s' % self.actor.uuid
+        Registry().unregister(self.actor.uuid)
+        self.assertGreater(self.redis.ttl(mailbox), 0)
+        # keep the old object alive, so its clean-up can't interfere
+        self.stale = self.actor
+        self.actor = DurableTestActor(uuid=self.stale.uuid, timeout=5)
+        self.assertEqual(-1, self.redis.ttl(mailbox))
+        self.actor.start()
+        self.assertEqual(1, future.get(timeout=1))
+
+    def testInlinePayload(self):
+        """ Keep large calls in the mailbox rather than out-of-band. """
+
+        threshold = codecs.OOB_THRESHOLD
+        codecs.OOB_THRESHOLD = 10
+
+        try:
+            # pylint: disable=E1101
+            future = self.actor.proxy().echo('a' * 100)
+        finally:
+            codecs.OOB_THRESHOLD = threshold
+
+        entry = self.redis.xrange('mailbox:%s' % self.actor.uuid)[0][1]
+        _, flags = codecs.HEADER.unpack_from(entry[b'data'])
+        self.assertFalse(flags & (codecs.FLAG_KEY | codecs.FLAG_SHM))
+        self.actor.start()
+        self.assertEqual('a' * 100, future.get(timeout=1))
+
+    def testProxyByUUID(self):
+        """ Send calls to the mailbox when asked to. """
+
+        self.actor.start()
+        proxy = ActorProxy(uuid=self.actor.uuid, durable=True)
+        self.assertEqual(1, proxy.test().get(timeout=1))
+
+
+if __name__ == '__main__':
+    unittest.main()